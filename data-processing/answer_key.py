@@ -0,0 +1,300 @@
+"""
+解答PDF（午前試験の解答例）専用の抽出処理
+
+解答PDFは「問番号 / 正解（ア〜エ）/ 分野（T・M・S）」の表が並んでいるだけなので、
+問題PDFと同じように300dpiの全ページを日本語モードでOCRする必要はない。
+1. テキスト層があれば、それを厳密なパターンで読む（一瞬で終わる）
+2. なければ低解像度で画像にし、罫線から表のセルを検出して、表の範囲だけを
+   数字・カタカナ（アイウエ）・TMSに限定したOCRにかける
+   image_to_dataの単語の位置をセルに割り当てて (問番号, 正解, 分野) を組み立てる
+   読めた解答が足りなければ、空のページ・問番号が飛んでいるページだけを高解像度で読み直す
+
+使い方:
+  from answer_key import extract_answer_key
+  extract_answer_key(pdf_path, poppler_path=POPPLER_PATH)
+  # → [(1, "d", "T"), (2, "b", "T"), ...]
+"""
+
+import json
+import re
+from bisect import bisect_right
+
+ANSWER_MAP = {"ア": "a", "イ": "b", "ウ": "c", "エ": "d"}
+FIELD_MAP = {"Ｔ": "T", "Ｍ": "M", "Ｓ": "S", "T": "T", "M": "M", "S": "S"}
+
+# 1回の試験の問題数。テキスト層からこの9割以上読めればOCRしない
+EXPECTED_QUESTIONS = 80
+MIN_TEXT_LAYER_RATIO = 0.9
+
+# 解答PDFの画像化の解像度（表の文字は大きいので低めで足りる）
+ANSWER_DPI = 150
+
+# 低解像度で読めた解答が足りないとき、抜けのあるページだけをこの解像度で読み直す
+ESCALATION_DPI = 300
+
+# OCRで認識を許す文字（tesseractのホワイトリスト）
+CHAR_WHITELIST = "問0123456789アイウエTMSＴＭＳ"
+TESSERACT_CONFIG = f"--psm 6 -c tessedit_char_whitelist={CHAR_WHITELIST}"
+
+# 罫線とみなす黒画素の連続の長さ（横線はページ幅、縦線は表の高さに対する割合）
+# 文字の画素はここまで長く続かないので、表の罫線だけが残る
+H_LINE_RATIO = 0.1
+V_LINE_RATIO = 0.8
+
+# これより暗い画素を黒とみなす（低解像度では細い罫線が灰色になるので緩めにする）
+DARK_THRESHOLD = 160
+
+# 「問2 1 イ」のように数字の間に空白が入ることがある（古い年度のテキスト層・OCR）
+ANSWER_PATTERN = re.compile(r'問\s*(\d(?:\s?\d)?)\s*([アイウエ])(?:\s*([ＴＭＳTMS])(?![A-Za-z]))?')
+
+def normalize_ocr_text(text):
+    """OCRでよくある誤認識を直す（間→問）"""
+    return text.replace('間', '問')
+
+def parse_answer_text(text):
+    """
+    テキストから (問番号, 正解a〜d, 分野T/M/S/None) のリストを抽出
+
+    同じ問番号が複数回出てきた場合は最初のものを使う。
+    """
+    answers = {}
+    for number, answer, field in ANSWER_PATTERN.findall(normalize_ocr_text(text)):
+        question_number = int(re.sub(r'\s', '', number))
+        if question_number not in answers:
+            answers[question_number] = (question_number, ANSWER_MAP[answer], FIELD_MAP.get(field))
+    return [answers[n] for n in sorted(answers)]
+
+def _group_runs(indices, max_gap=2):
+    """近接したインデックス（太い線・にじみ）をまとめて、それぞれの中心位置を返す"""
+    centers = []
+    start = prev = None
+    for i in indices:
+        if start is None:
+            start = prev = i
+        elif i - prev <= max_gap:
+            prev = i
+        else:
+            centers.append(int(start + prev) // 2)
+            start = prev = i
+    if start is not None:
+        centers.append(int(start + prev) // 2)
+    return centers
+
+def _line_mask(dark, axis, length):
+    """
+    axis方向にlength画素以上黒が続く箇所を持つ行（axis=1）または列（axis=0）の真偽配列
+
+    累積和の差でウィンドウ内の黒画素数を求め、ウィンドウ全体が黒かどうかを見る。
+    """
+    import numpy as np
+
+    length = max(1, int(length))
+    if dark.shape[axis] < length:
+        return np.zeros(dark.shape[1 - axis], dtype=bool)
+    counts = np.cumsum(dark, axis=axis, dtype=np.int32)
+    zeros_shape = list(counts.shape)
+    zeros_shape[axis] = 1
+    counts = np.concatenate([np.zeros(zeros_shape, dtype=np.int32), counts], axis=axis)
+    if axis == 1:
+        window = counts[:, length:] - counts[:, :-length]
+    else:
+        window = counts[length:] - counts[:-length]
+    return (window == length).any(axis=axis)
+
+def detect_table_grid(gray):
+    """
+    グレースケール画像（ndarray）から表の罫線を検出
+
+    戻り値: (横線のy座標リスト, 縦線のx座標リスト)。表が見つからなければ ([], [])
+    """
+    import numpy as np
+
+    dark = gray < DARK_THRESHOLD
+    width = dark.shape[1]
+
+    rows = np.flatnonzero(_line_mask(dark, 1, H_LINE_RATIO * width))
+    h_lines = _group_runs(rows)
+    if len(h_lines) < 2:
+        return [], []
+
+    top, bottom = h_lines[0], h_lines[-1]
+    span = dark[top:bottom + 1]
+    cols = np.flatnonzero(_line_mask(span, 0, V_LINE_RATIO * span.shape[0]))
+    v_lines = _group_runs(cols)
+    if len(v_lines) < 2:
+        return [], []
+
+    return h_lines, v_lines
+
+def words_to_cells(data, h_lines, v_lines, offset_x=0, offset_y=0):
+    """image_to_dataの単語を、罫線で区切られたセル (行, 列) ごとの文字列にまとめる"""
+    cells = {}
+    for i, text in enumerate(data["text"]):
+        text = text.strip()
+        if not text:
+            continue
+        cx = offset_x + data["left"][i] + data["width"][i] / 2
+        cy = offset_y + data["top"][i] + data["height"][i] / 2
+        row = bisect_right(h_lines, cy)
+        col = bisect_right(v_lines, cx)
+        cells[(row, col)] = cells.get((row, col), "") + text
+    return cells
+
+def cells_to_answers(cells):
+    """
+    セルの文字列を行ごとに左から読み、(問番号, 正解, 分野) を組み立てる
+
+    「数字のセル → ア〜エのセル → (T/M/Sのセル)」の並びを1問とする。
+    """
+    answers = {}
+    by_row = {}
+    for (row, col), text in cells.items():
+        by_row.setdefault(row, []).append((col, normalize_ocr_text(text)))
+
+    for row in sorted(by_row):
+        number = answer = None
+        for _, text in sorted(by_row[row]):
+            digits = re.sub(r'\D', '', text)
+            kana = re.search(r'[アイウエ]', text)
+            field = re.search(r'[ＴＭＳTMS]', text)
+            if digits and not kana:
+                if number is not None and answer is not None:
+                    answers.setdefault(number, (number, answer, None))
+                number, answer = int(digits), None
+            elif kana and number is not None and answer is None:
+                answer = ANSWER_MAP[kana.group()]
+            elif field and number is not None and answer is not None:
+                answers.setdefault(number, (number, answer, FIELD_MAP[field.group()]))
+                number = answer = None
+        if number is not None and answer is not None:
+            answers.setdefault(number, (number, answer, None))
+
+    return [answers[n] for n in sorted(answers)]
+
+def ocr_answer_page(image):
+    """
+    解答PDFの1ページ（PIL画像）から解答を読む
+
+    罫線が見つかれば表の範囲だけを、見つからなければページ全体をOCRする。
+    """
+    import numpy as np
+    import pytesseract
+
+    gray = np.asarray(image.convert("L"))
+    h_lines, v_lines = detect_table_grid(gray)
+
+    if not h_lines:
+        text = pytesseract.image_to_string(image, lang='jpn', config=TESSERACT_CONFIG)
+        return parse_answer_text(text)
+
+    # 表の範囲だけを切り出し、罫線を消してからOCRする（罫線は文字として誤認識されやすい）
+    top, bottom = h_lines[0], h_lines[-1]
+    left, right = v_lines[0], v_lines[-1]
+    table = gray[top:bottom + 1, left:right + 1].copy()
+    dark = table < DARK_THRESHOLD
+    table[_line_mask(dark, 1, H_LINE_RATIO * gray.shape[1])] = 255
+    table[:, _line_mask(dark, 0, V_LINE_RATIO * table.shape[0])] = 255
+
+    from PIL import Image
+    data = pytesseract.image_to_data(
+        Image.fromarray(table),
+        lang='jpn',
+        config=TESSERACT_CONFIG,
+        output_type=pytesseract.Output.DICT,
+    )
+    cells = words_to_cells(data, h_lines, v_lines, offset_x=left, offset_y=top)
+    return cells_to_answers(cells)
+
+def _ocr_answer_pages(pdf_path, page_indices, dpi, poppler_path, cache, pdf_sha256):
+    """指定ページをdpiで画像にして表をOCRし、{ページ番号: [(問番号, 正解, 分野)]} を返す"""
+    from pdf2image import convert_from_path
+
+    results = {}
+    for i in page_indices:
+        key = None
+        page_answers = None
+        if cache is not None:
+            key = cache.key(pdf_sha256, i, dpi, "tesseract-answer-key", TESSERACT_CONFIG)
+            cached = cache.get(key)
+            if cached is not None:
+                page_answers = [tuple(item) for item in json.loads(cached)]
+
+        if page_answers is None:
+            images = convert_from_path(
+                str(pdf_path),
+                dpi=dpi,
+                poppler_path=poppler_path,
+                first_page=i + 1,
+                last_page=i + 1
+            )
+            page_answers = ocr_answer_page(images[0]) if images else []
+            if cache is not None:
+                cache.put(key, json.dumps(page_answers))
+        results[i] = page_answers
+    return results
+
+def has_gaps(page_answers):
+    """1ページ分の解答が空か、問番号が飛んでいるか"""
+    if not page_answers:
+        return True
+    numbers = sorted({number for number, _, _ in page_answers})
+    return numbers[-1] - numbers[0] + 1 > len(numbers)
+
+def extract_answer_key(pdf_path, poppler_path=None, cache=None, report=None):
+    """
+    解答PDFから [(問番号, 正解a〜d, 分野T/M/S/None)] を抽出
+
+    cacheにOCRCacheを渡すと、OCRした結果をページ単位で保存・再利用する。
+    OCRはANSWER_DPIで行い、読めた解答が足りなければ、空のページ・問番号が飛んでいるページだけを
+    ESCALATION_DPIで読み直す。reportに辞書を渡すと {"pages", "escalated"}（OCRしたページ数・
+    読み直したページ数）を入れる。
+    """
+    from PyPDF2 import PdfReader
+
+    # 1. テキスト層
+    try:
+        reader = PdfReader(pdf_path)
+        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        answers = parse_answer_text(text)
+        if len(answers) >= EXPECTED_QUESTIONS * MIN_TEXT_LAYER_RATIO:
+            return answers
+        page_count = len(reader.pages)
+    except Exception:
+        page_count = None
+
+    # 2. 表の範囲だけOCR
+    from pdf2image import pdfinfo_from_path
+
+    from file_utils import file_sha256
+
+    if page_count is None:
+        page_count = int(pdfinfo_from_path(str(pdf_path), poppler_path=poppler_path)["Pages"])
+
+    pdf_sha256 = file_sha256(pdf_path) if cache is not None else None
+    pages = _ocr_answer_pages(pdf_path, range(page_count), ANSWER_DPI, poppler_path, cache, pdf_sha256)
+    found = {number for page_answers in pages.values() for number, _, _ in page_answers}
+
+    escalated = []
+    if len(found) < EXPECTED_QUESTIONS * MIN_TEXT_LAYER_RATIO:
+        escalated = [i for i in range(page_count) if has_gaps(pages[i])]
+        retried = _ocr_answer_pages(pdf_path, escalated, ESCALATION_DPI, poppler_path, cache, pdf_sha256)
+        # 高解像度で読めたページはそちらを使う（読めた解答が少なくなったページは元のまま）
+        for i, page_answers in retried.items():
+            if len(page_answers) >= len(pages[i]):
+                pages[i] = page_answers
+    if report is not None:
+        report.update({"pages": page_count, "escalated": len(escalated)})
+
+    answers = {}
+    for i in range(page_count):
+        for number, answer, field in pages[i]:
+            answers.setdefault(number, (number, answer, field))
+
+    return [answers[n] for n in sorted(answers)]
+
+def answer_key_to_dict(answer_key, year, season):
+    """(問番号, 正解, 分野) のリストを {questionId: 正解} に変換"""
+    return {
+        f"{year}_{season}_Q{str(number).zfill(2)}": answer
+        for number, answer, _ in answer_key
+    }
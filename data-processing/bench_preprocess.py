@@ -0,0 +1,125 @@
+"""
+OCR前の画像の前処理（exam_parser/preprocess.py）のベンチマーク
+
+downloaded_pdfs/old/ のPDFのページを画像に変換し、同じ画像を
+- そのままtesseractに渡したとき
+- 前処理してから渡したとき
+でOCRして、1ページあたりの前処理の時間・OCRの時間と、取れ高を比べる。
+- 問題PDF: 4択がそろった問題の数（中ほどの連続したページ）
+- 解答PDF: 読めた正解の数（全ページ）
+
+キャッシュは使わず、ページは1枚ずつ順にOCRする（並列にすると時間が比べにくいため）。
+
+使い方:
+  python bench_preprocess.py
+  python bench_preprocess.py --pages 6 --line-height 32 --limit 4
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from answer_key import parse_answer_text
+from exam_parser.auto import count_complete_questions, sample_pages
+from exam_parser.preprocess import preprocess_page
+from exam_parser.tesseract_ocr import (OCR_DPI, TESSERACT_CONFIG, TESSERACT_LANG, iter_page_images,
+                                       tesseract_version)
+from PyPDF2 import PdfReader
+
+INPUT_DIR = Path("downloaded_pdfs/old")
+
+def measure(pdf_file, page_indices, line_height):
+    """
+    1つのPDFの指定ページを前処理なし・ありでOCRし、計測結果を返す
+
+    戻り値: {"pages", "prepare", "raw", "prepared"（秒）, "rawYield", "preparedYield", "skewed"}
+    """
+    import pytesseract
+
+    result = {"pages": 0, "prepare": 0.0, "raw": 0.0, "prepared": 0.0, "skewed": 0}
+    raw_texts, prepared_texts = [], []
+    for _, image in iter_page_images(pdf_file, page_indices, dpi=OCR_DPI):
+        start = time.perf_counter()
+        raw_texts.append(pytesseract.image_to_string(image, lang=TESSERACT_LANG, config=TESSERACT_CONFIG))
+        result["raw"] += time.perf_counter() - start
+
+        prepared, stats = preprocess_page(image, line_height)
+        image.close()
+        result["prepare"] += stats["seconds"]
+        result["skewed"] += 1 if stats["skew"] else 0
+
+        start = time.perf_counter()
+        prepared_texts.append(pytesseract.image_to_string(prepared, lang=TESSERACT_LANG, config=TESSERACT_CONFIG))
+        result["prepared"] += time.perf_counter() - start
+        prepared.close()
+        result["pages"] += 1
+
+    count = count_complete_questions if "問題" in pdf_file.stem else (lambda text: len(parse_answer_text(text)))
+    result["rawYield"] = count("\n".join(raw_texts))
+    result["preparedYield"] = count("\n".join(prepared_texts))
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR前の画像の前処理のベンチマーク")
+    parser.add_argument("--input-dir", type=Path, default=INPUT_DIR, help=f"PDFのフォルダ（既定: {INPUT_DIR}）")
+    parser.add_argument("--pages", type=int, default=4, help="問題PDFごとにOCRするページ数")
+    parser.add_argument("--line-height", type=int, default=0,
+                        help="前処理で文字の行の高さをこの画素数に縮小（0で縮小しない）")
+    parser.add_argument("--limit", type=int, default=0, help="計測するPDFの数（0ですべて）")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("OCR前の画像の前処理のベンチマーク")
+    print("=" * 80)
+
+    try:
+        version = tesseract_version()
+    except Exception as e:
+        print(f"\n✗ tesseractが使えません: {e}")
+        return
+
+    pdf_files = sorted(args.input_dir.glob("*.pdf"))
+    if args.limit:
+        pdf_files = pdf_files[:args.limit]
+    if not pdf_files:
+        print(f"\n✗ {args.input_dir} にPDFが見つかりません")
+        return
+    print(f"\n{len(pdf_files)}ファイル（{args.input_dir}、tesseract {version}、{OCR_DPI}dpi、"
+          f"縮小 {args.line_height or 'なし'}）\n")
+    print(f"  {'ファイル':<24}{'ページ':>6}{'前処理':>8}{'OCR(元)':>9}{'OCR(前処理)':>12}{'取れ高':>12}")
+
+    totals = {"pages": 0, "prepare": 0.0, "raw": 0.0, "prepared": 0.0, "skewed": 0}
+    yields = {"問題": [0, 0], "解答": [0, 0]}
+    for pdf_file in pdf_files:
+        page_count = len(PdfReader(pdf_file).pages)
+        kind = "問題" if "問題" in pdf_file.stem else "解答"
+        page_indices = sample_pages(page_count, args.pages) if kind == "問題" else range(page_count)
+        try:
+            result = measure(pdf_file, page_indices, args.line_height)
+        except Exception as e:
+            print(f"  {pdf_file.stem:<24} ✗ {e}")
+            continue
+        pages = max(1, result["pages"])
+        print(f"  {pdf_file.stem:<24}{result['pages']:>6}{result['prepare'] / pages:>7.2f}秒"
+              f"{result['raw'] / pages:>8.2f}秒{result['prepared'] / pages:>11.2f}秒"
+              f"{result['rawYield']:>6} → {result['preparedYield']}")
+        for key in totals:
+            totals[key] += result[key]
+        yields[kind][0] += result["rawYield"]
+        yields[kind][1] += result["preparedYield"]
+
+    if not totals["pages"]:
+        return
+    pages = totals["pages"]
+    prepare, raw, prepared = totals["prepare"] / pages, totals["raw"] / pages, totals["prepared"] / pages
+    print(f"\n  1ページあたり（{pages}ページ、傾き補正 {totals['skewed']}ページ）")
+    print(f"    前処理        : {prepare:.2f}秒")
+    print(f"    OCR           : {raw:.2f}秒 → {prepared:.2f}秒（{raw - prepared:+.2f}秒短縮）")
+    print(f"    前処理込みの差: {raw - prepared - prepare:+.2f}秒"
+          f"（{raw / (prepared + prepare) if prepared + prepare > 0 else 0:.2f}倍）")
+    print(f"  取れ高: 問題 {yields['問題'][0]} → {yields['問題'][1]}問 / "
+          f"正解 {yields['解答'][0]} → {yields['解答'][1]}問")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
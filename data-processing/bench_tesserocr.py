@@ -0,0 +1,120 @@
+"""
+tesseractの呼び出し方のベンチマーク（pytesseract と tesserocr）
+
+- 1回あたりのオーバーヘッド: 小さな白紙の画像をOCRする時間
+  （pytesseractはプロセスの起動・学習データの読み込み・一時ファイルの受け渡しを毎回行う）
+- スループット: downloaded_pdfs/old/ の問題PDFの中ほどのページを画像にしておき、
+  同じ画像を各エンジンでworkers並列にOCRしてページ/秒と取れ高（4択がそろった問題数）を比べる
+
+キャッシュは使わない。画像への変換の時間は含めない。
+
+使い方:
+  python bench_tesserocr.py
+  python bench_tesserocr.py --pages 4 --limit 3 --workers 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from exam_parser import get_backend
+from exam_parser.auto import count_complete_questions, sample_pages
+from exam_parser.tesseract_ocr import OCR_DPI, iter_page_images
+from PyPDF2 import PdfReader
+
+INPUT_DIR = Path("downloaded_pdfs/old")
+ENGINES = ["tesseract", "tesserocr"]
+
+# オーバーヘッドの計測に使う白紙の画像の大きさと回数
+BLANK_SIZE = (200, 200)
+OVERHEAD_REPEAT = 10
+
+def measure_overhead(backend, repeat=OVERHEAD_REPEAT):
+    """(初回の秒数, 2回目以降の平均秒数) を返す（初回は学習データの読み込みを含む）"""
+    from PIL import Image
+
+    seconds = []
+    for _ in range(repeat + 1):
+        image = Image.new("L", BLANK_SIZE, 255)
+        start = time.perf_counter()
+        backend.run_tesseract(image)
+        seconds.append(time.perf_counter() - start)
+        image.close()
+    return seconds[0], sum(seconds[1:]) / repeat
+
+def measure_throughput(backend, pages, workers):
+    """全ページをworkers並列にOCRし、(秒, [ページごとのテキスト]) を返す"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        texts = list(executor.map(lambda image: backend.run_tesseract(image), pages))
+    return time.perf_counter() - start, texts
+
+def load_pages(pdf_files, page_count):
+    """各PDFの中ほどのpage_countページを画像にして [(PDF名, [画像])] を返す"""
+    documents = []
+    for pdf_file in pdf_files:
+        indices = sample_pages(len(PdfReader(pdf_file).pages), page_count)
+        documents.append((pdf_file.stem, [image for _, image in iter_page_images(pdf_file, indices, dpi=OCR_DPI)]))
+    return documents
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pytesseract と tesserocr のベンチマーク")
+    parser.add_argument("--input-dir", type=Path, default=INPUT_DIR, help=f"PDFのフォルダ（既定: {INPUT_DIR}）")
+    parser.add_argument("--pages", type=int, default=4, help="問題PDFごとにOCRするページ数")
+    parser.add_argument("--limit", type=int, default=2, help="計測する問題PDFの数（0ですべて）")
+    parser.add_argument("--workers", type=int, default=4, help="同時にOCRするページ数")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("pytesseract と tesserocr のベンチマーク")
+    print("=" * 80)
+
+    backends = []
+    for name in ENGINES:
+        cls = get_backend(name)
+        if not cls.available():
+            print(f"  {cls.label:<10} ✗ 使えません（ライブラリ・コマンドが見つかりません）")
+            continue
+        backend = cls(argparse.Namespace(no_cache=True, ocr_workers=args.workers))
+        backend.prepare()
+        backends.append(backend)
+    if not backends:
+        return
+
+    # 1回あたりのオーバーヘッド
+    print(f"\n【1回あたりのオーバーヘッド】（{BLANK_SIZE[0]}x{BLANK_SIZE[1]}の白紙、{OVERHEAD_REPEAT}回）")
+    for backend in backends:
+        first, average = measure_overhead(backend)
+        print(f"  {backend.label:<10} 初回 {first * 1000:>7.0f}ms / 2回目以降 {average * 1000:>7.1f}ms"
+              f"（{backend.engine_version()}）")
+
+    # スループット
+    pdf_files = sorted(args.input_dir.glob("*_午前問題.pdf"))
+    if args.limit:
+        pdf_files = pdf_files[:args.limit]
+    if not pdf_files:
+        print(f"\n✗ {args.input_dir} に問題PDFが見つかりません")
+        return
+    documents = load_pages(pdf_files, args.pages)
+    pages = [image for _, images in documents for image in images]
+    print(f"\n【スループット】（{len(pdf_files)}ファイル・{len(pages)}ページ、{OCR_DPI}dpi、{args.workers}並列）")
+    for backend in backends:
+        elapsed, texts = measure_throughput(backend, pages, args.workers)
+        questions = 0
+        position = 0
+        for _, images in documents:
+            questions += count_complete_questions("\n".join(texts[position:position + len(images)]))
+            position += len(images)
+        rate = len(pages) / elapsed if elapsed > 0 else 0
+        print(f"  {backend.label:<10} {rate:>6.2f} ページ/秒（{elapsed:.1f}秒、1ページ {elapsed / len(pages):.2f}秒）"
+              f"  {sum(len(text) for text in texts)}文字  問題{questions}問")
+
+    for image in pages:
+        image.close()
+    for backend in backends:
+        backend.close()
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
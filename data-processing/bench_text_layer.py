@@ -0,0 +1,84 @@
+"""
+テキスト層の読み取りのベンチマーク（PyPDF2 と pdftotext）
+
+downloaded_pdfs/old/ のPDFを各エンジンで全ページ読み、ページ/秒と取れ高を比べる。
+- 問題PDF: 4択がそろった問題の数
+- 解答PDF: 読めた正解の数
+
+使い方:
+  python bench_text_layer.py
+  python bench_text_layer.py --engines text pdftotext --pdftotext-mode bbox
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from pathlib import Path
+
+from answer_key import parse_answer_text
+from exam_parser import get_backend
+from exam_parser.auto import count_complete_questions
+from PyPDF2 import PdfReader
+
+INPUT_DIR = Path("downloaded_pdfs/old")
+
+def measure(backend, pdf_files):
+    """全PDFを読み、(秒, ページ数, 文字数, 問題数, 正解数) を返す"""
+    elapsed = 0.0
+    pages = chars = questions = answers = 0
+    for pdf_file in pdf_files:
+        page_count = len(PdfReader(pdf_file).pages)
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            start = time.perf_counter()
+            page_texts = backend.extract_pages(pdf_file, range(page_count))
+            elapsed += time.perf_counter() - start
+        if page_texts is None:
+            raise RuntimeError(log.getvalue().strip() or f"{pdf_file.name}の読み込みに失敗")
+
+        text = "".join(page_texts.get(i, "") + "\n" for i in range(page_count))
+        pages += page_count
+        chars += len(text.strip())
+        if "問題" in pdf_file.stem:
+            questions += count_complete_questions(text)
+        else:
+            answers += len(parse_answer_text(text))
+    return elapsed, pages, chars, questions, answers
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="テキスト層の読み取りのベンチマーク")
+    parser.add_argument("--engines", nargs="+", default=["text", "pdftotext"],
+                        help="比べるエンジン（既定: text pdftotext）")
+    parser.add_argument("--pdftotext-mode", choices=["layout", "bbox"], default="layout")
+    parser.add_argument("--pdftotext-workers", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("テキスト層の読み取りのベンチマーク")
+    print("=" * 80)
+
+    pdf_files = sorted(INPUT_DIR.glob("*.pdf"))
+    if not pdf_files:
+        print(f"\n✗ {INPUT_DIR} にPDFが見つかりません")
+        return
+    print(f"\n{len(pdf_files)}ファイル（{INPUT_DIR}）\n")
+
+    for name in args.engines:
+        cls = get_backend(name)
+        if not cls.available():
+            print(f"  {cls.label:<10} ✗ 使えません（コマンド・ライブラリが見つかりません）")
+            continue
+        try:
+            elapsed, pages, chars, questions, answers = measure(cls(args), pdf_files)
+        except Exception as e:
+            print(f"  {cls.label:<10} ✗ {e}")
+            continue
+        rate = pages / elapsed if elapsed > 0 else 0
+        print(f"  {cls.label:<10} {rate:>8.1f} ページ/秒（{pages}ページ / {elapsed:.2f}秒）"
+              f"  {chars}文字  問題{questions}問  正解{answers}問")
+
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+問題テキストの分割処理のベンチマーク（MB/s）
+
+従来の re.split + 選択肢ごとの re.search と、question_tokenizer の1パス版を
+同じテキストで比べる。テキストは実際に抽出したものをOCRせずに集める:
+- pipeline.py の extract が書き出した .pipeline/text/<試験>_問題.txt（あればこれを使う）
+- 問題PDFのテキスト層（構造マニフェストでテキスト層と判定されたページ）
+- OCRキャッシュにあるページ（tesseractエンジンで一度OCRしたもの）
+どこからもテキストが取れなければ計測しない（パース済みのJSONから組み立てたテキストは、
+分割処理の結果を元に戻したものなので計測に使わない）。
+
+使い方:
+  python bench_tokenizer.py              # 5回ずつ計測
+  python bench_tokenizer.py --repeat 20
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+from file_utils import file_sha256
+from pdf_manifest import ROUTE_OCR, ROUTE_TEXT, load_structure, read_text_layer, route_pages
+from question_tokenizer import tokenize_questions
+
+INPUT_DIR = Path("downloaded_pdfs")
+
+# pipeline.py の extract が書き出す問題テキスト（<試験>_問題.txt）
+EXTRACTED_TEXT_DIR = Path(".pipeline/text")
+
+def legacy_extract_choices(text):
+    """従来の選択肢の抽出（比較用）"""
+    choices = []
+    markers = ['ア', 'イ', 'ウ', 'エ']
+    for i, marker in enumerate(markers):
+        if i < len(markers) - 1:
+            pattern = f'{marker}[\\s　]+(.+?)(?={markers[i + 1]}|\\Z)'
+        else:
+            pattern = f'{marker}[\\s　]+(.+?)(?=\\n\\n|\\Z)'
+        match = re.search(pattern, text, re.DOTALL)
+        if match:
+            choices.append(re.sub(r'\s+', ' ', match.group(1).strip()))
+    return choices
+
+def legacy_tokenize(text):
+    """従来の問題の分割（比較用）"""
+    splits = re.split(r'問\s*(\d+)\s+', text)
+    questions = []
+    for i in range(1, len(splits) - 1, 2):
+        content = splits[i + 1]
+        choices = legacy_extract_choices(content)
+        idx = content.find('ア')
+        stem = content[:idx] if idx != -1 else content
+        questions.append((splits[i].strip(), re.sub(r'\s+', ' ', stem.strip()), choices))
+    return questions
+
+def tokenize(text):
+    return list(tokenize_questions(text))
+
+def load_cached_text(pdf_path):
+    """
+    OCRせずに取れる範囲で問題PDFのテキストを組み立てる
+
+    戻り値: (テキスト, 取れたページ数, 全ページ数)
+    """
+    pdf_sha256 = file_sha256(pdf_path)
+    structure, layer_texts = load_structure(pdf_path, pdf_sha256)
+    routes = route_pages(structure)
+    text_pages = [i for i, route in enumerate(routes) if route == ROUTE_TEXT]
+    ocr_targets = [i for i, route in enumerate(routes) if route == ROUTE_OCR]
+
+    if layer_texts is None:
+        layer_texts = read_text_layer(pdf_path, text_pages)
+    page_texts = {i: layer_texts[i] for i in text_pages}
+
+    if ocr_targets:
+        from exam_parser.tesseract_ocr import OCR_DPI, TesseractBackend
+
+        backend = TesseractBackend()
+        try:
+            config = backend.config()
+        except Exception:
+            # tesseractがない環境ではキャッシュのキーが作れないので、テキスト層だけを使う
+            config = None
+        if config is not None:
+            for i in ocr_targets:
+                key = backend.cache.key(pdf_sha256, i, OCR_DPI, "tesseract", config)
+                text = backend.cache.get(key)
+                if text is not None:
+                    page_texts[i] = text
+
+    text = "".join(page_texts.get(i, "") + "\n" for i in range(structure["page_count"]))
+    return text, len(text_pages) + sum(1 for i in ocr_targets if i in page_texts), structure["page_count"]
+
+def collect_texts():
+    """試験ごとのテキストを集める（extractの出力を優先し、なければ問題PDFから）"""
+    texts = {}
+    for text_file in sorted(EXTRACTED_TEXT_DIR.glob("*_問題.txt")):
+        text = text_file.read_text(encoding='utf-8')
+        if text.strip():
+            texts[text_file.stem.replace("_問題", "")] = text
+    if texts:
+        print(f"  {EXTRACTED_TEXT_DIR}/: {len(texts)}回分")
+
+    pdf_files = sorted(INPUT_DIR.glob("*_午前問題.pdf")) + sorted(INPUT_DIR.glob("old/*_午前問題.pdf"))
+    for pdf_file in pdf_files:
+        exam_id = pdf_file.stem.replace("_午前問題", "")
+        if exam_id in texts:
+            continue
+        text, available, total = load_cached_text(pdf_file)
+        print(f"  {pdf_file.name}: {available}/{total}ページ")
+        if text.strip():
+            texts[exam_id] = text
+
+    if not texts:
+        print("  ⚠ extractの出力・テキスト層・OCRキャッシュからテキストが取れませんでした")
+        print("  python pipeline.py --to extract で問題PDFからテキストを抽出してから実行してください")
+    return texts
+
+def measure(fn, texts, repeat):
+    """全テキストをrepeat回処理した最良の時間（秒）と、4択がそろった問題数を返す"""
+    best = None
+    complete = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(text) for text in texts]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        complete = sum(1 for questions in results for _, _, choices in questions if len(choices) == 4)
+    return best, complete
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="問題テキストの分割処理のベンチマーク")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数（最良値を使う）")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("問題テキストの分割処理のベンチマーク")
+    print("=" * 80)
+
+    texts = collect_texts()
+    if not texts:
+        print("\n✗ テキストが見つかりません")
+        return
+
+    size = sum(len(text.encode('utf-8')) for text in texts.values())
+    print(f"\n{len(texts)}回分 / {size / 1024 / 1024:.2f} MB")
+
+    print("\n" + "=" * 80)
+    for name, fn in [("従来（re.split + re.search）", legacy_tokenize), ("1パス（question_tokenizer）", tokenize)]:
+        elapsed, complete = measure(fn, list(texts.values()), max(1, args.repeat))
+        print(f"  {name}: {size / 1024 / 1024 / elapsed:.1f} MB/s "
+              f"（{elapsed * 1000:.1f} ms、4択がそろった問題 {complete}問）")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,218 @@
 """
-Firestoreの全questionsデータを削除
+Firestoreのquestionsデータを削除
+
+試験（年度_期）やquestionIdの先頭で範囲を絞って削除できる。削除はバッチで並列に行う
+（firestore_upload.delete_documents）。1回分の試験だけを消してアップロードし直せる。
+
+消した問題を含む集計ドキュメント（exams / categories）も同じ実行で直す。
+全データの削除なら集計もすべて消し、範囲を絞ったときは残った問題から作り直す（問題が残らなければ消す）。
+
+使い方:
+  python clear_firestore.py                           # 全データを削除
+  python clear_firestore.py --exam R07_秋期           # R07秋期の問題だけを削除
+  python clear_firestore.py --prefix R07_             # questionIdが R07_ で始まる問題を削除
+  python clear_firestore.py --exam R07_秋期 --dry-run # 削除する件数だけを表示
 """
 
-import firebase_admin
-from firebase_admin import credentials, firestore
-
-def delete_collection(db, collection_name, batch_size=500):
-    """コレクションの全ドキュメントを削除"""
-    collection_ref = db.collection(collection_name)
-    
-    deleted = 0
-    while True:
-        # batch_size件ずつ取得
-        docs = collection_ref.limit(batch_size).stream()
-        docs_list = list(docs)
-        
-        if not docs_list:
-            break
-        
-        # バッチで削除
-        batch = db.batch()
-        for doc in docs_list:
-            batch.delete(doc.reference)
-            deleted += 1
-        
-        batch.commit()
-        print(f"  {deleted}件削除...")
-    
-    return deleted
-
-def main():
+import argparse
+import sys
+import time
+
+from firestore_upload import (COLLECTION, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, GET_ALL_CHUNK, MAX_BATCH_SIZE,
+                              Write, aggregate_collections, content_hash, delete_documents, init_firestore,
+                              list_remote_ids, load_manifest, manifest_target, save_manifest, upload_questions)
+from question_aggregates import AggregateBuilder
+
+def exam_question_ids(db, collection, year, season):
+    """1回分の試験のドキュメントID（examYear・examSeasonで検索し、中身は読まない）"""
+    query = (db.collection(collection)
+             .where("examYear", "==", year)
+             .where("examSeason", "==", season)
+             .select([]))
+    return {snapshot.id for snapshot in query.stream()}
+
+def collect_ids(db, collection, exams=None, prefixes=None):
+    """
+    削除するドキュメントIDを集める
+
+    exams（"R07_秋期" の形）もprefixesも指定しなければコレクション全体。
+    """
+    if not exams and not prefixes:
+        return list_remote_ids(db, collection)
+
+    ids = set()
+    for exam in exams or []:
+        year, season = exam.split('_', 1)
+        ids |= exam_question_ids(db, collection, year, season)
+    if prefixes:
+        ids |= {doc_id for doc_id in list_remote_ids(db, collection)
+                if any(doc_id.startswith(prefix) for prefix in prefixes)}
+    return ids
+
+def affected_aggregates(db, collection, doc_ids, everything=False):
+    """
+    削除する問題を含む集計ドキュメントを探し、{"コレクション/ID": 含まれる問題ID} を返す
+
+    集計ドキュメントは試験・分野の数（数十件）しかないので、すべて読んでquestionIdsを比べる。
+    everything（全データの削除）なら中身を読まずにすべてを返す（問題は1問も残らない）。
+    """
+    doc_ids = set(doc_ids)
+    affected = {}
+    for aggregate_collection in aggregate_collections(collection):
+        if everything:
+            affected.update({f"{aggregate_collection}/{doc_id}": []
+                             for doc_id in list_remote_ids(db, aggregate_collection)})
+            continue
+        for snapshot in db.collection(aggregate_collection).stream():
+            question_ids = snapshot.to_dict().get("questionIds", [])
+            if doc_ids.intersection(question_ids):
+                affected[f"{aggregate_collection}/{snapshot.id}"] = question_ids
+    return affected
+
+def rebuild_aggregates(db, collection, affected, deleted_ids):
+    """
+    影響を受けた集計ドキュメントを、Firestoreに残っている問題から作り直すWriteのリストを返す
+
+    問題が1問も残らない集計はdataがNoneのWrite（削除）になる。
+    """
+    deleted_ids = set(deleted_ids)
+    remaining = sorted({question_id for question_ids in affected.values()
+                        for question_id in question_ids if question_id not in deleted_ids})
+    builder = AggregateBuilder()
+    collection_ref = db.collection(collection)
+    for i in range(0, len(remaining), GET_ALL_CHUNK):
+        chunk = remaining[i:i + GET_ALL_CHUNK]
+        for snapshot in db.get_all([collection_ref.document(question_id) for question_id in chunk]):
+            if snapshot.exists:
+                question = snapshot.to_dict()
+                builder.add(question, content_hash(question))
+
+    docs = builder.documents(aggregate_collections(collection))
+    writes = []
+    for key in sorted(affected):
+        aggregate_collection, doc_id = key.split("/", 1)
+        writes.append(Write(aggregate_collection, doc_id, docs.get((aggregate_collection, doc_id))))
+    return writes
+
+def forget_uploaded(db, collection, keys):
+    """
+    削除・作り直したドキュメントをアップロードのマニフェストからも消す
+
+    消しておかないと、次のアップロードで「変更なし」と判断されて上がらない。
+    作り直した集計ドキュメント（"exams/..." などのキー）も忘れ、次のアップロードで手元の内容に書き直させる。
+    """
+    target = manifest_target(db, collection)
+    manifest = load_manifest(target)
+    if any(key in manifest for key in keys):
+        for key in keys:
+            manifest.pop(key, None)
+        save_manifest(target, manifest)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Firestoreのquestionsデータを削除")
+    parser.add_argument("--exam", nargs="+", metavar="EXAM", help="削除する試験（例: R07_秋期 R07_春期）")
+    parser.add_argument("--prefix", nargs="+", help="削除するquestionIdの先頭（例: R07_）")
+    parser.add_argument("--collection", default=COLLECTION, help=f"削除するコレクション（既定: {COLLECTION}）")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"1回のバッチの件数（最大{MAX_BATCH_SIZE}）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="同時に送るバッチ数")
+    parser.add_argument("--dry-run", action="store_true", help="削除する件数だけを表示して終わる")
+    parser.add_argument("--yes", action="store_true", help="確認せずに削除する")
+    args = parser.parse_args(argv)
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size は1〜{MAX_BATCH_SIZE}で指定してください")
+    for exam in args.exam or []:
+        if '_' not in exam:
+            parser.error(f"--exam は 年度_期 の形で指定してください: {exam}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
     print("=" * 80)
     print("Firestore データ削除")
     print("=" * 80)
-    
-    # 初期化
-    cred_path = "serviceAccountKey.json"
-    
+
+    if args.exam or args.prefix:
+        scope = " / ".join([*(args.exam or []), *(f"{prefix}*" for prefix in args.prefix or [])])
+    else:
+        scope = "全データ"
+
     try:
-        # 既に初期化されている場合はスキップ
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(cred_path)
-            firebase_admin.initialize_app(cred)
-        
-        db = firestore.client()
+        db = init_firestore()
         print("✓ Firebaseに接続しました\n")
-        
-        # 確認
-        print("⚠️  警告: questionsコレクションの全データを削除します")
-        print("この操作は取り消せません。\n")
-        
-        response = input("続行しますか？ (yes/no): ").strip().lower()
-        
-        if response != "yes":
-            print("\n✗ 削除をキャンセルしました")
+
+        start = time.perf_counter()
+        doc_ids = sorted(collect_ids(db, args.collection, args.exam, args.prefix))
+        everything = not args.exam and not args.prefix
+        affected = affected_aggregates(db, args.collection, doc_ids, everything)
+        print(f"対象: {args.collection}コレクションの{scope}（{len(doc_ids)}件、"
+              f"検索 {time.perf_counter() - start:.1f}秒）")
+        if affected:
+            action = "削除" if everything else "作り直し"
+            print(f"  集計ドキュメント: {len(affected)}件を{action}（{' / '.join(aggregate_collections(args.collection))}）")
+
+        if not doc_ids and not affected:
+            print("\n✓ 削除するドキュメントはありません")
             return
-        
-        # 削除実行
-        print("\n削除中...")
-        deleted = delete_collection(db, "questions")
-        
-        print(f"\n✓ {deleted}件のドキュメントを削除しました")
+        if args.dry_run:
+            print("\n⚠ --dry-run のため削除しません")
+            return
+
+        # 確認
+        if not args.yes:
+            print(f"\n⚠️  警告: {args.collection}コレクションの{scope}（{len(doc_ids)}件）を削除します")
+            print("この操作は取り消せません。\n")
+
+            response = input("続行しますか？ (yes/no): ").strip().lower()
+
+            if response != "yes":
+                print("\n✗ 削除をキャンセルしました")
+                return
+
+        # 削除実行（バッチを並列に送り、終わったバッチごとに進捗を表示）
+        print(f"\n削除中（{args.batch_size}件/バッチ、{args.workers}並列）...")
+        deleted_ids = []
+
+        def show_progress(report):
+            if report["error"]:
+                print(f"  ✗ バッチ{report['batch']}（{report['firstId']}〜{report['lastId']}）失敗: {report['error']}")
+                return
+            deleted_ids.extend(report["ids"])
+            elapsed = time.perf_counter() - start
+            print(f"  {len(deleted_ids)}/{len(doc_ids)}件削除...（{len(deleted_ids) / elapsed:.0f}件/秒）")
+
+        start = time.perf_counter()
+        summary = delete_documents(db, doc_ids, collection=args.collection, batch_size=args.batch_size,
+                                   workers=args.workers, on_batch=show_progress)
+
+        # 消した問題を含む集計ドキュメントを、残っている問題から作り直す（残らなければ消す）
+        aggregate_summary = None
+        if affected:
+            writes = rebuild_aggregates(db, args.collection, affected, deleted_ids)
+            aggregate_summary = upload_questions(db, writes, collection=args.collection,
+                                                 batch_size=args.batch_size, workers=args.workers)
+        forget_uploaded(db, args.collection, [*deleted_ids, *affected])
+
+        rate = summary["written"] / summary["elapsed"] if summary["elapsed"] > 0 else 0
+        print(f"\n✓ {summary['written']}件のドキュメントを削除しました"
+              f"（{summary['elapsed']:.1f}秒、{rate:.0f}件/秒）")
+        if summary["failed"]:
+            print(f"  ✗ {summary['failed']}件は削除できませんでした（もう一度実行してください）")
+        if aggregate_summary is not None:
+            removed = sum(1 for write in writes if write.data is None)
+            print(f"  集計ドキュメント: 作り直し {len(writes) - removed}件 / 削除 {removed}件")
+            if aggregate_summary["failed"]:
+                print(f"  ✗ 集計ドキュメント{aggregate_summary['failed']}件を書き込めませんでした"
+                      "（アップロードし直すと手元の内容で書き直されます）")
         print("=" * 80)
-        
+
     except Exception as e:
         print(f"\n✗ エラー: {e}")
+        sys.exit(1)
+
+    if summary["failed"] or (aggregate_summary is not None and aggregate_summary["failed"]):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,66 +2,49 @@
 解答PDFの抽出内容を確認
 """
 
+import sys
+import time
 from pathlib import Path
-from pdf2image import convert_from_path
 import pytesseract
-import re
+
+from answer_key import extract_answer_key
+from exam_parser.poppler_tools import poppler_path
 
 # Tesseractのパス
 pytesseract.pytesseract.tesseract_cmd = r'C:\Users\10074256\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'
-POPPLER_PATH = r'C:\Users\10074256\Desktop\ap-dojo\poppler\Library\bin'
-
-def extract_text_from_answer_pdf(pdf_path):
-    """解答PDFからテキストを抽出"""
-    print(f"PDFを処理中: {pdf_path.name}")
-    
-    images = convert_from_path(
-        str(pdf_path),
-        dpi=300,
-        poppler_path=POPPLER_PATH
-    )
-    
-    text = ""
-    for image in images:
-        page_text = pytesseract.image_to_string(image, lang='jpn')
-        text += page_text + "\n"
-    
-    return text
 
-def parse_answers(text):
-    """解答を抽出（デバッグ版）"""
-    print("\n【抽出されたテキスト（最初の1000文字）】")
+def show_answers(answer_key):
+    """抽出した解答を表示（デバッグ版）"""
+    print("\n【抽出された解答】")
     print("=" * 80)
-    print(text[:1000])
+    for number, answer, field in answer_key:
+        print(f"  問{number:>2}: {answer}  ({field or '-'})")
     print("=" * 80)
-    
-    print("\n【正規表現でのマッチング】")
-    
-    patterns = [
-        (r'問\s*(\d+)\s+([アイウエ])', "パターン1: 問\\s*(\\d+)\\s+([アイウエ])"),
-        (r'(\d+)\s+([アイウエ])', "パターン2: (\\d+)\\s+([アイウエ])"),
-        (r'問(\d+)[\\s　]*([アイウエ])', "パターン3: 問(\\d+)[\\s　]*([アイウエ])"),
-    ]
-    
-    for pattern, desc in patterns:
-        matches = re.findall(pattern, text)
-        print(f"\n{desc}")
-        print(f"  マッチ数: {len(matches)}")
-        if matches:
-            print(f"  最初の10個:")
-            for i, match in enumerate(matches[:10]):
-                print(f"    {i+1}. {match}")
+
+    numbers = {number for number, _, _ in answer_key}
+    missing = [n for n in range(1, max(numbers, default=0) + 1) if n not in numbers]
+    print(f"\n  抽出数: {len(answer_key)}")
+    if missing:
+        print(f"  ⚠ 抜けている問番号: {missing}")
 
 def main():
-    # R07秋期の解答PDFを確認
-    answer_pdf = Path("downloaded_pdfs/R07_秋期_午前解答.pdf")
+    # 既定はR07秋期の解答PDF（引数でほかのPDFも確認できる）
+    answer_pdf = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("downloaded_pdfs/R07_秋期_午前解答.pdf")
     
     if not answer_pdf.exists():
         print(f"✗ ファイルが見つかりません: {answer_pdf}")
         return
     
-    text = extract_text_from_answer_pdf(answer_pdf)
-    parse_answers(text)
+    print(f"PDFを処理中: {answer_pdf.name}")
+    start = time.perf_counter()
+    report = {}
+    answer_key = extract_answer_key(answer_pdf, poppler_path=poppler_path(), report=report)
+    elapsed = time.perf_counter() - start
+    
+    show_answers(answer_key)
+    if report:
+        print(f"  高解像度で読み直したページ: {report['escalated']}/{report['pages']}")
+    print(f"  処理時間: {elapsed:.2f}秒")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
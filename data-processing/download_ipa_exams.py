@@ -1,345 +1,757 @@
-"""
-IPA応用情報技術者試験の過去問PDFをダウンロードするスクリプト（検証済み版）
-2009年度〜2025年度（H21〜R07）の全34回分
-※ URLは2025年11月時点で動作確認済み
-"""
-
-import requests
-from pathlib import Path
-import time
-
-# ダウンロード先フォルダ
-OUTPUT_DIR = Path("downloaded_pdfs")
-OUTPUT_DIR.mkdir(exist_ok=True)
-
-# 過去問のURL一覧（検証済み）
-EXAM_URLS = [
-    # === 2025年度（令和7年度）===
-    {
-        "year": "R07",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07a_ap_am_ans.pdf",
-    },
-    {
-        "year": "R07",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07h_ap_am_ans.pdf",
-    },
-    
-    # === 2024年度（令和6年度）===
-    {
-        "year": "R06",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06a_ap_am_ans.pdf",
-    },
-    {
-        "year": "R06",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06h_ap_am_ans.pdf",
-    },
-    
-    # === 2023年度（令和5年度）===
-    {
-        "year": "R05",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05a_ap_am_ans.pdf",
-    },
-    {
-        "year": "R05",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05h_ap_am_ans.pdf",
-    },
-    
-    # === 2022年度（令和4年度）===
-    {
-        "year": "R04",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000008smf-att/2022r04a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000008smf-att/2022r04a_ap_am_ans.pdf",
-    },
-    {
-        "year": "R04",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000009sgk-att/2022r04h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000009sgk-att/2022r04h_ap_am_ans.pdf",
-    },
-    
-    # === 2021年度（令和3年度）===
-    {
-        "year": "R03",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000apad-att/2021r03a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000apad-att/2021r03a_ap_am_ans.pdf",
-    },
-    {
-        "year": "R03",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d5ru-att/2021r03h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d5ru-att/2021r03h_ap_am_ans.pdf",
-    },
-    
-    # === 2020年度（令和2年度）===
-    {
-        "year": "R02",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d05l-att/2020r02o_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d05l-att/2020r02o_ap_am_ans.pdf",
-    },
-    
-    # === 2019年度（令和元年度）===
-    {
-        "year": "R01",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000dict-att/2019r01a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000dict-att/2019r01a_ap_am_ans.pdf",
-    },
-    {
-        "year": "R01",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000ddiw-att/2019h31h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000ddiw-att/2019h31h_ap_am_ans.pdf",
-    },
-    
-    # === 2018年度（平成30年度）===
-    {
-        "year": "H30",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f01f-att/2018h30a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f01f-att/2018h30a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H30",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fabr-att/2018h30h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fabr-att/2018h30h_ap_am_ans.pdf",
-    },
-    
-    # === 2017年度（平成29年度）===
-    {
-        "year": "H29",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fqpm-att/2017h29a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fqpm-att/2017h29a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H29",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fzx1-att/2017h29h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fzx1-att/2017h29h_ap_am_ans.pdf",
-    },
-    
-    # === 2016年度（平成28年度）===
-    {
-        "year": "H28",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000g6fw-att/2016h28a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000g6fw-att/2016h28a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H28",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gn5o-att/2016h28h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gn5o-att/2016h28h_ap_am_ans.pdf",
-    },
-    
-    # === 2015年度（平成27年度）===
-    {
-        "year": "H27",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gxj0-att/2015h27a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gxj0-att/2015h27a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H27",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000f52-att/2015h27h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000f52-att/2015h27h_ap_am_ans.pdf",
-    },
-    
-    # === 2014年度（平成26年度）===
-    {
-        "year": "H26",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000ye5-att/2014h26a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000ye5-att/2014h26a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H26",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000001dzu-att/2014h26h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000001dzu-att/2014h26h_ap_am_ans.pdf",
-    },
-    
-    # === 2013年度（平成25年度）===
-    {
-        "year": "H25",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000027za-att/2013h25a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000027za-att/2013h25a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H25",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002e6g-att/2013h25h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002e6g-att/2013h25h_ap_am_ans.pdf",
-    },
-    
-    # === 2012年度（平成24年度）===
-    {
-        "year": "H24",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002h5m-att/2012h24a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002h5m-att/2012h24a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H24",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000038er-att/2012h24h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000038er-att/2012h24h_ap_am_ans.pdf",
-    },
-    
-    # === 2011年度（平成23年度）===
-    {
-        "year": "H23",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ojp-att/2011h23a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ojp-att/2011h23a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H23",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ya2-att/2011h23tokubetsu_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ya2-att/2011h23tokubetsu_ap_am_ans.pdf",
-    },
-    
-    # === 2010年度（平成22年度）===
-    {
-        "year": "H22",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004d6f-att/2010h22a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004d6f-att/2010h22a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H22",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004n2z-att/2010h22h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004n2z-att/2010h22h_ap_am_ans.pdf",
-    },
-    
-    # === 2009年度（平成21年度）===
-    {
-        "year": "H21",
-        "season": "秋期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f3yi-att/2009h21a_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f3yi-att/2009h21a_ap_am_ans.pdf",
-    },
-    {
-        "year": "H21",
-        "season": "春期",
-        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000009bhl-att/2009h21h_ap_am_qs.pdf",
-        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000009bhl-att/2009h21h_ap_am_ans.pdf",
-    },
-]
-
-def download_file(url, output_path):
-    """URLからファイルをダウンロード"""
-    try:
-        print(f"  ダウンロード中: {output_path.name}")
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-        
-        file_size = len(response.content) / 1024
-        print(f"    ✓ 成功 ({file_size:.1f} KB)")
-        return True
-        
-    except requests.exceptions.HTTPError as e:
-        print(f"    ✗ HTTPエラー ({e.response.status_code})")
-        return False
-    except Exception as e:
-        print(f"    ✗ エラー: {e}")
-        return False
-
-def main():
-    """メイン処理"""
-    print("=" * 80)
-    print("IPA応用情報技術者試験 過去問ダウンロード（検証済み版）")
-    print("対象: 2009年度〜2025年度（34回分、2,720問）")
-    print("=" * 80)
-    print()
-    
-    total_files = 0
-    success_count = 0
-    failed_list = []
-    
-    for i, exam in enumerate(EXAM_URLS, 1):
-        year = exam["year"]
-        season = exam["season"]
-        print(f"[{i}/{len(EXAM_URLS)}] 【{year} {season}】")
-        
-        # 午前問題
-        if "am_url" in exam:
-            filename = f"{year}_{season}_午前問題.pdf"
-            output_path = OUTPUT_DIR / filename
-            total_files += 1
-            
-            if download_file(exam["am_url"], output_path):
-                success_count += 1
-            else:
-                failed_list.append(f"{year} {season} 午前問題")
-            
-            time.sleep(0.5)
-        
-        # 午前解答
-        if "am_ans_url" in exam:
-            filename = f"{year}_{season}_午前解答.pdf"
-            output_path = OUTPUT_DIR / filename
-            total_files += 1
-            
-            if download_file(exam["am_ans_url"], output_path):
-                success_count += 1
-            else:
-                failed_list.append(f"{year} {season} 午前解答")
-            
-            time.sleep(0.5)
-        
-        print()
-    
-    # 結果サマリー
-    print("=" * 80)
-    print(f"ダウンロード完了: {success_count}/{total_files} ファイル")
-    print(f"保存先: {OUTPUT_DIR.absolute()}")
-    
-    if failed_list:
-        print(f"\n⚠ 失敗したファイル ({len(failed_list)}件):")
-        for item in failed_list:
-            print(f"  - {item}")
-    
-    if success_count == total_files:
-        print("\n✓ すべてのファイルのダウンロードに成功しました！")
-        print(f"\n統計:")
-        print(f"  - 試験回数: {len(EXAM_URLS)}回")
-        print(f"  - 問題数: 約{len(EXAM_URLS) * 80}問")
-        print(f"  - PDFファイル数: {total_files}個")
-        print("\n次のステップ:")
-        print("  python parse_pdf.py")
-    else:
-        print(f"\n⚠ {len(failed_list)}件のファイルがダウンロードできませんでした")
-    
-    print("=" * 80)
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+"""
+IPA応用情報技術者試験の過去問PDFをダウンロードするスクリプト（検証済み版）
+2009年度〜2025年度（H21〜R07）の全34回分
+※ URLは2025年11月時点で動作確認済み
+
+使い方:
+  python download_ipa_exams.py                 # 4並列でダウンロード
+  python download_ipa_exams.py --jobs 8 --rate 4
+  python download_ipa_exams.py --base-url http://127.0.0.1:8000  # ローカルのテスト用サーバーから取得
+  python download_ipa_exams.py --force          # 更新確認をせずに取得し直す
+
+2回目以降は downloaded_pdfs/manifest.json のETag/Last-Modifiedを使って
+更新されたファイルだけを取得する。中断したファイルは続きから再開する。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from file_utils import atomic_write, file_sha256
+
+# ダウンロード先フォルダ
+OUTPUT_DIR = Path("downloaded_pdfs")
+
+# 並列ダウンロードの既定値
+DEFAULT_JOBS = 4        # 同時ダウンロード数
+DEFAULT_RATE = 2.0      # 1ホストあたりのリクエスト数/秒（平均）
+DEFAULT_BURST = 4       # 1ホストあたりの瞬間的な最大リクエスト数
+MAX_RETRIES = 4         # 5xx・タイムアウト時の再試行回数
+BACKOFF_BASE = 1.0      # 再試行の待ち時間の基準（秒）、1, 2, 4, 8...と倍になる
+TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+
+# ダウンロード済みファイルの一覧（URL → path, size, sha256, ETag, Last-Modified）
+MANIFEST_NAME = "manifest.json"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# 過去問のURL一覧（検証済み）
+EXAM_URLS = [
+    # === 2025年度（令和7年度）===
+    {
+        "year": "R07",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07a_ap_am_ans.pdf",
+    },
+    {
+        "year": "R07",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/nl10bi0000009lh8-att/2025r07h_ap_am_ans.pdf",
+    },
+    
+    # === 2024年度（令和6年度）===
+    {
+        "year": "R06",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06a_ap_am_ans.pdf",
+    },
+    {
+        "year": "R06",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/m42obm000000afqx-att/2024r06h_ap_am_ans.pdf",
+    },
+    
+    # === 2023年度（令和5年度）===
+    {
+        "year": "R05",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05a_ap_am_ans.pdf",
+    },
+    {
+        "year": "R05",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ps6vr70000010d6y-att/2023r05h_ap_am_ans.pdf",
+    },
+    
+    # === 2022年度（令和4年度）===
+    {
+        "year": "R04",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000008smf-att/2022r04a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000008smf-att/2022r04a_ap_am_ans.pdf",
+    },
+    {
+        "year": "R04",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000009sgk-att/2022r04h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt80000009sgk-att/2022r04h_ap_am_ans.pdf",
+    },
+    
+    # === 2021年度（令和3年度）===
+    {
+        "year": "R03",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000apad-att/2021r03a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000apad-att/2021r03a_ap_am_ans.pdf",
+    },
+    {
+        "year": "R03",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d5ru-att/2021r03h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d5ru-att/2021r03h_ap_am_ans.pdf",
+    },
+    
+    # === 2020年度（令和2年度）===
+    {
+        "year": "R02",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d05l-att/2020r02o_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000d05l-att/2020r02o_ap_am_ans.pdf",
+    },
+    
+    # === 2019年度（令和元年度）===
+    {
+        "year": "R01",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000dict-att/2019r01a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000dict-att/2019r01a_ap_am_ans.pdf",
+    },
+    {
+        "year": "R01",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000ddiw-att/2019h31h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000ddiw-att/2019h31h_ap_am_ans.pdf",
+    },
+    
+    # === 2018年度（平成30年度）===
+    {
+        "year": "H30",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f01f-att/2018h30a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f01f-att/2018h30a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H30",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fabr-att/2018h30h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fabr-att/2018h30h_ap_am_ans.pdf",
+    },
+    
+    # === 2017年度（平成29年度）===
+    {
+        "year": "H29",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fqpm-att/2017h29a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fqpm-att/2017h29a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H29",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fzx1-att/2017h29h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000fzx1-att/2017h29h_ap_am_ans.pdf",
+    },
+    
+    # === 2016年度（平成28年度）===
+    {
+        "year": "H28",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000g6fw-att/2016h28a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000g6fw-att/2016h28a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H28",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gn5o-att/2016h28h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gn5o-att/2016h28h_ap_am_ans.pdf",
+    },
+    
+    # === 2015年度（平成27年度）===
+    {
+        "year": "H27",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gxj0-att/2015h27a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000gxj0-att/2015h27a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H27",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000f52-att/2015h27h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000f52-att/2015h27h_ap_am_ans.pdf",
+    },
+    
+    # === 2014年度（平成26年度）===
+    {
+        "year": "H26",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000ye5-att/2014h26a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000000ye5-att/2014h26a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H26",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000001dzu-att/2014h26h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000001dzu-att/2014h26h_ap_am_ans.pdf",
+    },
+    
+    # === 2013年度（平成25年度）===
+    {
+        "year": "H25",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000027za-att/2013h25a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000027za-att/2013h25a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H25",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002e6g-att/2013h25h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002e6g-att/2013h25h_ap_am_ans.pdf",
+    },
+    
+    # === 2012年度（平成24年度）===
+    {
+        "year": "H24",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002h5m-att/2012h24a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000002h5m-att/2012h24a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H24",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000038er-att/2012h24h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p900000038er-att/2012h24h_ap_am_ans.pdf",
+    },
+    
+    # === 2011年度（平成23年度）===
+    {
+        "year": "H23",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ojp-att/2011h23a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ojp-att/2011h23a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H23",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ya2-att/2011h23tokubetsu_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000003ya2-att/2011h23tokubetsu_ap_am_ans.pdf",
+    },
+    
+    # === 2010年度（平成22年度）===
+    {
+        "year": "H22",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004d6f-att/2010h22a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004d6f-att/2010h22a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H22",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004n2z-att/2010h22h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000004n2z-att/2010h22h_ap_am_ans.pdf",
+    },
+    
+    # === 2009年度（平成21年度）===
+    {
+        "year": "H21",
+        "season": "秋期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f3yi-att/2009h21a_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/gmcbt8000000f3yi-att/2009h21a_ap_am_ans.pdf",
+    },
+    {
+        "year": "H21",
+        "season": "春期",
+        "am_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000009bhl-att/2009h21h_ap_am_qs.pdf",
+        "am_ans_url": "https://www.ipa.go.jp/shiken/mondai-kaiotu/ug65p90000009bhl-att/2009h21h_ap_am_ans.pdf",
+    },
+]
+
+class TokenBucket:
+    """トークンバケット方式のレートリミッタ（スレッドセーフ）"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ取得する。空なら補充されるまで待つ"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    """ホストごとにトークンバケットを割り当てるレートリミッタ"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[host] = bucket
+        bucket.acquire()
+
+def create_session(pool_size):
+    """コネクションプールを共有するセッションを作成"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+def rebase_url(url, base_url):
+    """URLのスキーム・ホスト部分を差し替える（ローカルのテスト用サーバー向け）"""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path, parts.query, ''))
+
+def is_retryable(error):
+    """再試行すべきエラーか判定（5xx・タイムアウト・接続エラー・転送途中の切断）"""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                          requests.exceptions.ChunkedEncodingError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return False
+
+def load_manifest(path):
+    """マニフェスト（URL → size, sha256, ETag...）を読み込む"""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest, path):
+    """マニフェストを一時ファイル経由で書き込む（途中で落ちても壊れない）"""
+    with atomic_write(path) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def conditional_headers(output_path, entry):
+    """
+    前回のETag/Last-Modifiedから条件付きリクエストのヘッダーを作成
+
+    手元のファイルの大きさがマニフェストと違う（途中で切れた・壊れた）ときは
+    条件を付けずに取り直す（304で壊れたファイルを残さない）。
+    """
+    if not output_path.exists():
+        return {}
+
+    headers = {}
+    if entry:
+        if entry.get("size") != output_path.stat().st_size:
+            return {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    if "If-Modified-Since" not in headers:
+        headers["If-Modified-Since"] = formatdate(output_path.stat().st_mtime, usegmt=True)
+    return headers
+
+def range_validator(response):
+    """
+    If-Rangeに使える検証子（強いETag、なければLast-Modified）。どちらもなければNone
+
+    弱いETag（W/"..."）はIf-Rangeに使えない。
+    """
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+def fetch_to_file(session, url, output_path, entry=None, force=False):
+    """
+    1回分のリクエストを行い、ストリーミングで保存する
+
+    - 書き込みは「.part」ファイルに行い、完了後にリネームする
+    - 「.part」が残っていればRangeリクエストで続きから再開する。書き始めたときのETag/Last-Modifiedを
+      「.part.validator」に覚えておき、If-Rangeで送る（サーバーのファイルが変わっていれば200で
+      最初から送られてくるので、古い内容と新しい内容をつなげない）。検証子がなければ最初から取り直す
+    - ETag/If-Modified-Sinceで未更新のファイルはスキップする
+    """
+    part_path = output_path.with_name(output_path.name + ".part")
+    validator_path = output_path.with_name(output_path.name + ".part.validator")
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    validator = validator_path.read_text(encoding='utf-8').strip() if validator_path.exists() else ""
+    if offset and not validator:
+        offset = 0
+
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    elif not force:
+        headers.update(conditional_headers(output_path, entry))
+
+    with session.get(url, headers=headers, timeout=TIMEOUT, stream=True) as response:
+        if response.status_code == 304:
+            size = output_path.stat().st_size
+            # マニフェストのハッシュは大きさが一致するときだけ使う（それ以外は読み直す）
+            known = entry and entry.get("sha256") and entry.get("size") == size
+            return {
+                "status": "not_modified",
+                "bytes": 0,
+                "size": size,
+                "sha256": entry["sha256"] if known else file_sha256(output_path),
+                "etag": response.headers.get("ETag") or (entry or {}).get("etag"),
+                "last_modified": response.headers.get("Last-Modified") or (entry or {}).get("last_modified"),
+            }
+
+        if response.status_code == 416:
+            # 「.part」がサーバー側のファイルより大きい → 最初から取り直す
+            part_path.unlink()
+            validator_path.unlink(missing_ok=True)
+            return fetch_to_file(session, url, output_path, entry, force)
+
+        response.raise_for_status()
+
+        hasher = hashlib.sha256()
+        resumed = response.status_code == 206 and offset > 0
+        if resumed:
+            # 既存の「.part」の内容をハッシュに反映してから追記する
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+            mode = 'ab'
+        else:
+            # 最初から書く。続きから再開できるように、この内容の検証子を覚えておく
+            offset = 0
+            mode = 'wb'
+            validator = range_validator(response)
+            if validator:
+                validator_path.write_text(validator, encoding='utf-8')
+            else:
+                validator_path.unlink(missing_ok=True)
+
+        transferred = 0
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                hasher.update(chunk)
+                transferred += len(chunk)
+
+        size = offset + transferred
+        expected = response.headers.get("Content-Length")
+        if expected is not None and int(expected) != transferred:
+            raise requests.exceptions.ConnectionError(
+                f"途中で切断されました ({transferred}/{expected} bytes)"
+            )
+
+        os.replace(part_path, output_path)
+        validator_path.unlink(missing_ok=True)
+
+        return {
+            "status": "resumed" if resumed else "downloaded",
+            "bytes": transferred,
+            "size": size,
+            "sha256": hasher.hexdigest(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+def download_file(session, url, output_path, limiter, entry=None, force=False,
+                  retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+    """
+    URLからファイルをダウンロード
+
+    5xxエラーとタイムアウトは、最初の1回に加えてretries回まで指数バックオフで再試行する。
+    途中で切れた場合も「.part」が残るので、再試行時は続きから取得する。
+    戻り値: {"ok", "status", "bytes", "size", "sha256", "etag", "last_modified", "attempts", "error"}
+    """
+    result = {"ok": False, "status": None, "bytes": 0, "attempts": 0, "error": None}
+
+    for attempt in range(retries + 1):
+        limiter.acquire(url)
+        result["attempts"] = attempt + 1
+        try:
+            fetched = fetch_to_file(session, url, output_path, entry, force)
+            result["bytes"] += fetched.pop("bytes")
+            result.update(fetched)
+            result["ok"] = True
+            result["error"] = None
+            return result
+
+        except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+                result["error"] = f"HTTPエラー ({e.response.status_code})"
+            else:
+                result["error"] = f"{type(e).__name__}: {e}"
+
+            if not is_retryable(e) or attempt == retries:
+                return result
+
+            # 指数バックオフ（同時に再試行が集中しないよう揺らぎを加える）
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+        except OSError as e:
+            result["error"] = f"書き込みエラー: {e}"
+            return result
+
+    return result
+
+def build_tasks(exams, output_dir, base_url=None):
+    """ダウンロード対象の一覧を作成"""
+    tasks = []
+    for exam in exams:
+        year = exam["year"]
+        season = exam["season"]
+
+        # 午前問題
+        if "am_url" in exam:
+            tasks.append({
+                "label": f"{year} {season} 午前問題",
+                "url": rebase_url(exam["am_url"], base_url),
+                "path": output_dir / f"{year}_{season}_午前問題.pdf",
+            })
+
+        # 午前解答
+        if "am_ans_url" in exam:
+            tasks.append({
+                "label": f"{year} {season} 午前解答",
+                "url": rebase_url(exam["am_ans_url"], base_url),
+                "path": output_dir / f"{year}_{season}_午前解答.pdf",
+            })
+    return tasks
+
+def adopt_old_copies(tasks, old_dir, manifest):
+    """
+    old/フォルダにある同名PDFを取り込む
+
+    保存先にまだファイルがなければold/から移動して、マニフェストに登録する。
+    （その後のダウンロードは条件付きリクエストになり、更新がなければ転送されない）
+    保存先と内容が同じコピーは重複として返す。
+    """
+    adopted = []
+    duplicates = []
+    if not old_dir.is_dir():
+        return adopted, duplicates
+
+    for task in tasks:
+        old_path = old_dir / task["path"].name
+        if not old_path.exists():
+            continue
+
+        if not task["path"].exists():
+            os.replace(old_path, task["path"])
+            manifest[task["url"]] = {
+                "path": task["path"].name,
+                "size": task["path"].stat().st_size,
+                "sha256": file_sha256(task["path"]),
+                "etag": None,
+                "last_modified": None,
+            }
+            adopted.append(task["path"].name)
+        elif file_sha256(old_path) == file_sha256(task["path"]):
+            duplicates.append(old_path)
+
+    return adopted, duplicates
+
+def download_all(tasks, manifest=None, manifest_path=None, force=False, jobs=DEFAULT_JOBS,
+                 rate=DEFAULT_RATE, burst=DEFAULT_BURST, retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+    """
+    複数ファイルを並列ダウンロード
+
+    manifestは完了したファイルごとに更新し、manifest_pathがあればその都度保存する。
+    各結果の"changed"は前回のマニフェストからSHA-256が変わったかどうか。
+    戻り値: (tasksと同じ順の結果リスト, 経過秒数)
+    """
+    if manifest is None:
+        manifest = {}
+    limiter = HostRateLimiter(rate, burst)
+    results = [None] * len(tasks)
+    done = 0
+    start = time.perf_counter()
+
+    with create_session(jobs) as session, ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                download_file, session, task["url"], task["path"], limiter,
+                manifest.get(task["url"]), force, retries, backoff
+            ): i
+            for i, task in enumerate(tasks)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            result = future.result()
+            results[i] = result
+            done += 1
+
+            name = tasks[i]["path"].name
+            retry_note = f", {result['attempts']}回目" if result["attempts"] > 1 else ""
+            if result["ok"]:
+                previous = manifest.get(tasks[i]["url"], {})
+                result["changed"] = previous.get("sha256") != result["sha256"]
+                manifest[tasks[i]["url"]] = {
+                    "path": name,
+                    "size": result["size"],
+                    "sha256": result["sha256"],
+                    "etag": result["etag"],
+                    "last_modified": result["last_modified"],
+                }
+                if manifest_path is not None:
+                    save_manifest(manifest, manifest_path)
+
+                if result["status"] == "not_modified":
+                    print(f"  [{done}/{len(tasks)}] - {name} (更新なし{retry_note})")
+                elif result["status"] == "resumed":
+                    print(f"  [{done}/{len(tasks)}] ✓ {name} (再開, {result['bytes'] / 1024:.1f} KB{retry_note})")
+                else:
+                    print(f"  [{done}/{len(tasks)}] ✓ {name} ({result['bytes'] / 1024:.1f} KB{retry_note})")
+            else:
+                result["changed"] = False
+                print(f"  [{done}/{len(tasks)}] ✗ {name}: {result['error']}{retry_note}")
+
+    return results, time.perf_counter() - start
+
+def positive_int(value):
+    """argparse用: 1以上の整数"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
+
+def non_negative_int(value):
+    """argparse用: 0以上の整数"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"0以上の整数を指定してください: {value}")
+    return number
+
+def positive_float(value):
+    """argparse用: 0より大きい数"""
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"0より大きい数を指定してください: {value}")
+    return number
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IPA応用情報技術者試験 過去問PDFのダウンロード")
+    parser.add_argument("--jobs", type=positive_int, default=DEFAULT_JOBS, help="同時ダウンロード数")
+    parser.add_argument("--rate", type=positive_float, default=DEFAULT_RATE, help="1ホストあたりのリクエスト数/秒")
+    parser.add_argument("--burst", type=positive_int, default=DEFAULT_BURST,
+                        help="1ホストあたりの瞬間的な最大リクエスト数")
+    parser.add_argument("--retries", type=non_negative_int, default=MAX_RETRIES,
+                        help="5xx・タイムアウト時の再試行回数（最初の1回とは別に数える。0で再試行しない）")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help="保存先フォルダ")
+    parser.add_argument("--base-url", help="ダウンロード元のホストを差し替える（例: http://127.0.0.1:8000）")
+    parser.add_argument("--force", action="store_true", help="更新確認をせずにすべて取得し直す")
+    parser.add_argument("--prune-old", action="store_true", help="old/内の内容が同じ重複コピーを削除する")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """メイン処理"""
+    args = parse_args(argv)
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    print("=" * 80)
+    print("IPA応用情報技術者試験 過去問ダウンロード（検証済み版）")
+    print("対象: 2009年度〜2025年度（34回分、2,720問）")
+    print(f"並列数: {args.jobs} / レート制限: {args.rate}回/秒（ホストごと）")
+    print("=" * 80)
+    print()
+
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    tasks = build_tasks(EXAM_URLS, output_dir, args.base_url)
+
+    # old/にある既存のコピーを取り込む
+    adopted, duplicates = adopt_old_copies(tasks, output_dir / "old", manifest)
+    if adopted:
+        print(f"old/から{len(adopted)}件を取り込みました")
+        save_manifest(manifest, manifest_path)
+    if duplicates:
+        print(f"old/に内容が同じ重複コピーが{len(duplicates)}件あります")
+        if args.prune_old:
+            for path in duplicates:
+                path.unlink()
+            print(f"  ✓ {len(duplicates)}件の重複コピーを削除しました")
+        else:
+            print("  （--prune-old で削除できます）")
+    if adopted or duplicates:
+        print()
+
+    results, elapsed = download_all(
+        tasks, manifest, manifest_path, force=args.force,
+        jobs=args.jobs, rate=args.rate, burst=args.burst, retries=args.retries
+    )
+
+    total_files = len(tasks)
+    success_count = sum(1 for r in results if r["ok"])
+    failed_list = [task["label"] for task, r in zip(tasks, results) if not r["ok"]]
+    total_bytes = sum(r["bytes"] for r in results)
+    retried = sum(1 for r in results if r["attempts"] > 1)
+    not_modified = sum(1 for r in results if r["status"] == "not_modified")
+    changed = sum(1 for r in results if r.get("changed"))
+
+    # 結果サマリー
+    print()
+    print("=" * 80)
+    print(f"ダウンロード完了: {success_count}/{total_files} ファイル")
+    print(f"保存先: {output_dir.absolute()}")
+    print(f"所要時間: {elapsed:.1f}秒")
+    if elapsed > 0:
+        print(f"スループット: {total_bytes / 1024 / 1024 / elapsed:.2f} MB/秒, "
+              f"{success_count / elapsed:.2f} ファイル/秒 (合計 {total_bytes / 1024 / 1024:.1f} MB)")
+    print(f"更新なし: {not_modified}件 / 内容が変わったファイル: {changed}件")
+    if retried:
+        print(f"再試行したファイル: {retried}件")
+    print(f"マニフェスト: {manifest_path}")
+
+    if failed_list:
+        print(f"\n⚠ 失敗したファイル ({len(failed_list)}件):")
+        for item in failed_list:
+            print(f"  - {item}")
+
+    if success_count == total_files:
+        print("\n✓ すべてのファイルのダウンロードに成功しました！")
+        print("\n統計:")
+        print(f"  - 試験回数: {len(EXAM_URLS)}回")
+        print(f"  - 問題数: 約{len(EXAM_URLS) * 80}問")
+        print(f"  - PDFファイル数: {total_files}個")
+        print("\n次のステップ:")
+        print("  python parse_pdf.py")
+    else:
+        print(f"\n⚠ {len(failed_list)}件のファイルがダウンロードできませんでした")
+
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+IPA過去問PDFから問題・選択肢・正解を抽出するパッケージ
+
+テキストの取り出し方（エンジン）だけを差し替えられるようにして、
+問題・解答のパースと試験単位の並列処理はすべてのエンジンで共通にしている。
+
+エンジン:
+  text       PyPDF2でテキスト層を読む（OCRなし）
+  pdftotext  Poppler（同梱）のpdftotextでテキスト層を読む（OCRなし）
+  tesseract  テキスト層が足りないページをtesseractでOCR
+  tesserocr  tesseractと同じ。tesserocrでプロセス内のハンドルを使い回す（ページごとに起動しない）
+  yomitoku   テキスト層が足りないページをyomitokuでOCR
+
+使い方:
+  python -m exam_parser --engine auto --jobs 4
+"""
+
+from importlib import import_module
+
+from .registry import BACKENDS, Backend, available_backends, get_backend, register_backend, release_at_exit
+
+# 登録済みのエンジン（追加するときはここにモジュール名を加える）
+BUILTIN_BACKENDS = ["text_layer", "pdftotext_layer", "tesseract_ocr", "tesserocr_ocr", "yomitoku_ocr"]
+
+for _module in BUILTIN_BACKENDS:
+    import_module(f".{_module}", __name__)
+
+from .cli import main  # noqa: E402
+from .exam import parse_am_questions, process_exam_pair  # noqa: E402
+
+__all__ = [
+    "BACKENDS",
+    "Backend",
+    "available_backends",
+    "get_backend",
+    "main",
+    "parse_am_questions",
+    "process_exam_pair",
+    "register_backend",
+    "release_at_exit",
+]
@@ -0,0 +1,141 @@
+"""
+エンジンの計測と --engine auto の選択
+
+問題PDFの中ほどの連続したページを各エンジンで（キャッシュなしで）処理し、
+ページ/秒と、1ページあたりに4択がそろった問題数（問題の取れ高）を測る。
+取れ高が最良のエンジンのMIN_YIELD_RATIO以上あるエンジンのうち、最も速いものを選ぶ。
+
+- 本番でOCRに回る画像だけのページを使い、OCRエンジンはocr_pagesを直接呼ぶ
+  （extract_pagesだとテキスト層のあるページはOCRされず、OCRの速さを測れない）
+  テキスト層のエンジンも同じページで測る（取れ高が低ければ、そのPDFには使えない）
+  画像だけのページがないPDFでは、中ほどのページを全エンジンで（OCRエンジンはそのままOCRして）測る
+- 構造マニフェストの走査は計測の前に1回済ませておく（最初のエンジンだけが走査の時間を払わないように）
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from file_utils import file_sha256
+from pdf_manifest import ROUTE_OCR, load_structure, route_pages
+from question_tokenizer import tokenize_questions
+
+from .registry import available_backends
+from .routing import OCRBackend
+
+# 計測に使うページ数（問題が前後のページにまたがるので連続したページを使う）
+SAMPLE_PAGES = 4
+
+# 最良の取れ高に対して、これ以上あれば品質を満たすとみなす
+MIN_YIELD_RATIO = 0.9
+
+REPORT_FILE = "engine_report.json"
+
+def sample_pages(page_count, count=SAMPLE_PAGES):
+    """表紙・裏表紙を避けて、中ほどの連続したcountページを選ぶ"""
+    count = min(count, page_count)
+    start = max(0, (page_count - count) // 2)
+    return list(range(start, start + count))
+
+def sample_ocr_pages(routes, count=SAMPLE_PAGES):
+    """画像だけのページ（OCRに回るページ）の中ほどからcountページを選ぶ（なければ空のリスト）"""
+    ocr_pages = [i for i, route in enumerate(routes) if route == ROUTE_OCR]
+    return [ocr_pages[k] for k in sample_pages(len(ocr_pages), count)]
+
+def count_complete_questions(text):
+    """4択がそろった問題の数"""
+    return sum(1 for _, _, choices in tokenize_questions(text) if len(choices) == 4)
+
+def measure_backend(cls, args, pdf_path, page_indices, pdf_sha256=None):
+    """
+    1つのエンジンでサンプルページを処理して計測結果を返す
+
+    OCRエンジンはテキスト層への振り分けをせず、page_indicesをすべてOCRする。
+    """
+    # キャッシュが当たると速さを測れないので、計測中は使わない
+    backend = cls(argparse.Namespace(**{**vars(args), "no_cache": True}))
+    result = {"engine": cls.name, "pages": len(page_indices)}
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            prepare_start = time.perf_counter()
+            backend.prepare()
+            start = time.perf_counter()
+            if isinstance(backend, OCRBackend):
+                page_texts = backend.ocr_pages(pdf_path, page_indices, pdf_sha256)
+            else:
+                page_texts = backend.extract_pages(pdf_path, page_indices)
+            elapsed = time.perf_counter() - start
+        result["config"] = backend.config()
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
+    if page_texts is None:
+        lines = log.getvalue().strip().splitlines()
+        result["error"] = lines[-1].strip() if lines else "抽出に失敗"
+        return result
+
+    text = "".join(page_texts.get(i, "") + "\n" for i in page_indices)
+    questions = count_complete_questions(text)
+    result.update({
+        "prepare_seconds": round(start - prepare_start, 3),
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(page_indices) / elapsed, 3) if elapsed > 0 else None,
+        "questions": questions,
+        "questions_per_page": round(questions / len(page_indices), 3),
+    })
+    return result
+
+def benchmark_backends(args, pdf_path, page_count):
+    """使えるエンジンをすべて計測して結果のリストを返す"""
+    # 構造マニフェストを先に作っておく（どのエンジンの計測にも走査の時間を含めない）
+    pdf_sha256 = file_sha256(pdf_path)
+    structure, _ = load_structure(pdf_path, pdf_sha256)
+    page_indices = sample_ocr_pages(route_pages(structure))
+    if not page_indices:
+        page_indices = sample_pages(page_count)
+        print("  ⚠ 画像だけのページがないので、中ほどのページをOCRして計測します")
+    pages = ", ".join(f"p.{i + 1}" for i in page_indices)
+
+    results = []
+    for cls in available_backends():
+        print(f"  {cls.label}: {pages}を計測中...")
+        results.append(measure_backend(cls, args, pdf_path, page_indices, pdf_sha256))
+    return results
+
+def choose_backend(results, min_yield_ratio=MIN_YIELD_RATIO):
+    """取れ高の条件を満たすエンジンのうち最も速いものの名前を返す（なければNone）"""
+    measured = [r for r in results if "error" not in r and r["pages_per_sec"]]
+    if not measured:
+        return None
+    best_yield = max(r["questions_per_page"] for r in measured)
+    if best_yield <= 0:
+        return None
+    candidates = [r for r in measured if r["questions_per_page"] >= best_yield * min_yield_ratio]
+    return max(candidates, key=lambda r: r["pages_per_sec"])["engine"]
+
+def print_report(results, chosen=None):
+    """エンジンごとの計測結果を表示"""
+    for r in results:
+        mark = "→" if r["engine"] == chosen else " "
+        if "error" in r:
+            print(f"  {mark} {r['engine']:<10} ✗ {r['error']}")
+            continue
+        print(f"  {mark} {r['engine']:<10} {r['pages_per_sec'] or 0:>8.2f} ページ/秒  "
+              f"{r['questions_per_page']:>5.2f} 問/ページ（準備 {r['prepare_seconds']:.1f}秒）")
+
+def write_report(output_dir, pdf_path, results, chosen, min_yield_ratio=MIN_YIELD_RATIO):
+    """計測結果をoutput_dir/engine_report.jsonに保存"""
+    report_file = output_dir / REPORT_FILE
+    output_dir.mkdir(exist_ok=True)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            "sample": str(pdf_path),
+            "chosen": chosen,
+            "min_yield_ratio": min_yield_ratio,
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    return report_file
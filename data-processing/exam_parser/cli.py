@@ -0,0 +1,121 @@
+"""
+IPA過去問 PDFパース処理のコマンドライン
+
+使い方:
+  python -m exam_parser --engine text        # テキスト層のみ（PyPDF2）
+  python -m exam_parser --engine pdftotext   # テキスト層のみ（Popplerのpdftotext）
+  python -m exam_parser --engine tesseract   # テキスト層 + tesseractでOCR
+  python -m exam_parser --engine yomitoku    # テキスト層 + yomitokuでOCR
+  python -m exam_parser --engine auto        # 計測して速くて取れ高の良いエンジンを選ぶ
+  python -m exam_parser --benchmark          # エンジンごとの計測結果だけを表示
+"""
+
+import argparse
+
+from exam_runner import default_jobs, run_exam_pairs
+from questions_jsonl import AGGREGATE_NAME, merge_exam_files
+
+from . import auto
+from .exam import INPUT_DIR, OUTPUT_DIR, find_exam_pairs, init_worker, process_exam_pair
+from .registry import BACKENDS, get_backend
+from .routing import evict_cache
+
+def build_parser(default_engine="auto", description="IPA過去問 PDFパース処理"):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--engine", choices=["auto", *BACKENDS], default=default_engine,
+                        help=f"テキストを取り出すエンジン（既定は{default_engine}）")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="並列に処理する試験数（0でCPUコア数、既定は1=直列）")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="OCR結果のキャッシュを使わない（すべてのページをOCRし直す）")
+    parser.add_argument("--min-yield", type=float, default=auto.MIN_YIELD_RATIO,
+                        help="autoで選ぶエンジンに求める問題の取れ高（最良のエンジンに対する比）")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="エンジンごとの速さ・取れ高を計測して表示するだけ（パースはしない）")
+    for cls in BACKENDS.values():
+        cls.add_arguments(parser)
+    return parser
+
+def select_engine(args, exam_pairs):
+    """
+    使えるエンジンを計測し、結果を表示・保存する
+
+    戻り値: autoで選ばれたエンジン名（選べなければNone）
+    """
+    year, season = exam_pairs[0]
+    sample_pdf = INPUT_DIR / f"{year}_{season}_午前問題.pdf"
+
+    from PyPDF2 import PdfReader
+    page_count = len(PdfReader(sample_pdf).pages)
+
+    print(f"\nエンジンを計測中（{sample_pdf.name}）...")
+    results = auto.benchmark_backends(args, sample_pdf, page_count)
+    chosen = auto.choose_backend(results, args.min_yield)
+    auto.print_report(results, chosen)
+    report_file = auto.write_report(OUTPUT_DIR, sample_pdf, results, chosen, args.min_yield)
+    print(f"  計測結果: {report_file}")
+    return chosen
+
+def main(argv=None, default_engine="auto", description="IPA過去問 PDFパース処理"):
+    """メイン処理"""
+    args = build_parser(default_engine, description).parse_args(argv)
+    args.jobs = args.jobs if args.jobs > 0 else default_jobs()
+
+    print("=" * 80)
+    print(description)
+    print("=" * 80)
+
+    exam_pairs = find_exam_pairs(INPUT_DIR)
+
+    if not exam_pairs:
+        print("\n✗ PDFファイルが見つかりません")
+        print(f"  {INPUT_DIR.absolute()} にPDFをダウンロードしてください")
+        return
+
+    print(f"\n{len(exam_pairs)}回分の試験を発見しました")
+
+    engine = args.engine
+    if args.benchmark or engine == "auto":
+        chosen = select_engine(args, exam_pairs)
+        if args.benchmark:
+            return
+        if chosen is None:
+            print("\n✗ 条件を満たすエンジンがありません")
+            return
+        engine = chosen
+
+    backend_cls = get_backend(engine)
+    if not backend_cls.available():
+        print(f"\n⚠ {backend_cls.label}が使えない可能性があります（ライブラリ・コマンドを確認してください）")
+
+    print(f"処理対象: {len(exam_pairs)}回分（エンジン: {backend_cls.label}）")
+    print()
+
+    # 各試験を処理（--jobs 2以上ならプロセスプールで並列）
+    # 問題データは試験ごとのJSONとして処理が終わった時点で書き出され、ここにはパスだけが返る
+    results = run_exam_pairs(process_exam_pair, exam_pairs, args.jobs,
+                             initializer=init_worker, initargs=(engine, args))
+    exam_files = [path for path in results if path]
+
+    # OCRキャッシュが上限を超えていれば古いものから削除（エンジンは作らない）
+    if not args.no_cache:
+        evict_cache()
+
+    # 試験ごとのJSONを1回分ずつ読み、1つのJSON Linesにまとめる（並び順は新しい順）
+    if exam_files:
+        all_file = OUTPUT_DIR / AGGREGATE_NAME
+        question_count = merge_exam_files(exam_files, all_file)
+
+        print("\n" + "=" * 80)
+        print("✓ パース完了")
+        print(f"  処理成功: {len(exam_files)}/{len(exam_pairs)}回")
+        print(f"  総問題数: {question_count}問")
+        print(f"  個別ファイル: {OUTPUT_DIR.absolute()}")
+        print(f"  統合ファイル: {all_file.name}")
+        print("=" * 80)
+        print("\n次のステップ:")
+        print(f"  1. parsed_questions/{AGGREGATE_NAME} を確認")
+        print("  2. python categorize_questions.py（問題の分類）")
+        print(f"  3. python upload_to_firebase.py parsed_questions/{AGGREGATE_NAME}（Firebaseアップロード）")
+    else:
+        print("\n✗ パースに失敗しました")
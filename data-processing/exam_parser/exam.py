@@ -0,0 +1,181 @@
+"""
+1回分の試験（問題PDF+解答PDF）の処理（エンジン共通）
+"""
+
+import json
+from functools import partial
+from pathlib import Path
+
+from answer_key import answer_key_to_dict, extract_answer_key, parse_answer_text
+from exam_runner import extract_pair
+from file_utils import atomic_write
+from question_tokenizer import tokenize_questions
+
+from .poppler_tools import poppler_path
+from .registry import get_backend, release_at_exit
+
+# 入力・出力フォルダ
+INPUT_DIR = Path("downloaded_pdfs")
+OUTPUT_DIR = Path("parsed_questions")
+
+# ワーカープロセスごとに1つだけ作るエンジン（init_workerで設定）
+_backend = None
+
+def init_worker(engine, args=None):
+    """ワーカープロセスごとの設定（exam_runnerのinitializerとして呼ばれる）"""
+    global _backend
+    _backend = release_at_exit(get_backend(engine)(args))
+
+def find_exam_pairs(input_dir=INPUT_DIR):
+    """問題PDFのファイル名から (年度, 期) の一覧を新しい順に返す"""
+    exam_pairs = set()
+    for pdf_file in input_dir.glob("*_午前問題.pdf"):
+        parts = pdf_file.stem.split('_')
+        if len(parts) >= 2:
+            exam_pairs.add((parts[0], parts[1]))
+    return sorted(exam_pairs, reverse=True)
+
+def parse_am_questions(text, year, season):
+    """
+    午前問題のテキストから問題データを抽出
+
+    フォーマット:
+    問1 問題文...
+
+    ア 選択肢A
+    イ 選択肢B
+    ウ 選択肢C
+    エ 選択肢D
+    """
+    questions = []
+
+    # 「問N」・選択肢の記号・空行を1回の走査で区切る
+    for question_num, question_text, choices in tokenize_questions(text):
+        if choices and len(choices) == 4:
+            question_data = {
+                "questionId": f"{year}_{season}_Q{question_num.zfill(2)}",
+                "examYear": year,
+                "examSeason": season,
+                "questionNumber": int(question_num),
+                "questionText": question_text,
+                "choices": {
+                    "a": choices[0],
+                    "b": choices[1],
+                    "c": choices[2],
+                    "d": choices[3]
+                },
+                "correctAnswer": None,  # 後で解答PDFから追加
+                "category": None,
+                "subcategory": None,
+                "difficulty": None,
+                "explanation": None,
+            }
+            questions.append(question_data)
+        else:
+            # 選択肢が4つでない場合はスキップ（デバッグ用に出力）
+            if len(question_num) <= 2:  # 問番号が妥当な場合のみ警告
+                print(f"    ⚠ 問{question_num}: 選択肢が{len(choices)}個（スキップ）")
+
+    return questions
+
+def extract_answers(backend, answer_pdf):
+    """
+    解答PDFから (問番号, 正解, 分野) のリストを抽出
+
+    解答表専用の抽出（テキスト層 → 表の範囲だけOCR）を使い、
+    それで読めなければエンジンで取り出したテキストから読む。
+    """
+    try:
+        answer_key = extract_answer_key(answer_pdf, poppler_path=poppler_path(),
+                                        cache=getattr(backend, "cache", None))
+    except Exception as e:
+        print(f"    ⚠ 解答表の読み取りエラー: {e}")
+        answer_key = []
+    if answer_key:
+        return answer_key
+
+    text = backend.extract_text(answer_pdf)
+    return parse_answer_text(text) if text else []
+
+def merge_questions_and_answers(questions, answers):
+    """問題データに正解を追加"""
+    for question in questions:
+        question_id = question["questionId"]
+        if question_id in answers:
+            question["correctAnswer"] = answers[question_id]
+    return questions
+
+def exam_pdfs(year, season, input_dir=INPUT_DIR):
+    """1回分の (問題PDF, 解答PDF) のパス"""
+    return (input_dir / f"{year}_{season}_午前問題.pdf",
+            input_dir / f"{year}_{season}_午前解答.pdf")
+
+def extract_exam(backend, question_pdf, answer_pdf):
+    """
+    問題PDFと解答PDFを同時に処理して (問題テキスト, 解答のリスト) を返す
+
+    どちらかが取り出せなければNone
+    """
+    print(f"  問題PDF・解答PDFを処理中（{backend.label}）...")
+    question_text, answer_key = extract_pair(backend.extract_text, question_pdf, answer_pdf,
+                                             answer_fn=partial(extract_answers, backend))
+
+    if not question_text or not answer_key:
+        print("  ✗ テキスト抽出に失敗")
+        return None
+    return question_text, answer_key
+
+def build_questions(question_text, answer_key, year, season):
+    """問題テキストと解答のリストから、正解付きの問題データを作る"""
+    print("  問題をパース中...")
+    questions = parse_am_questions(question_text, year, season)
+    print(f"    ✓ {len(questions)}問を抽出")
+
+    print("  解答をパース中...")
+    answers = answer_key_to_dict(answer_key, year, season)
+    print(f"    ✓ {len(answers)}問の正解を抽出")
+
+    questions = merge_questions_and_answers(questions, answers)
+
+    with_answer = sum(1 for q in questions if q['correctAnswer'])
+    print(f"    ✓ {with_answer}/{len(questions)}問に正解を設定")
+    return questions
+
+def save_questions(questions, year, season, output_dir=OUTPUT_DIR):
+    """
+    1回分の問題データをoutput_dir/<年度>_<期>.jsonに保存
+
+    一時ファイルに書いてからリネームするので、途中で落ちても読む側が書きかけのJSONを見ることはない。
+    """
+    output_file = output_dir / f"{year}_{season}.json"
+    with atomic_write(output_file) as f:
+        json.dump(questions, f, ensure_ascii=False, indent=2)
+
+    print(f"  ✓ 保存完了: {output_file.name}")
+    return output_file
+
+def process_exam_pair(year, season):
+    """
+    1回分の試験（問題+解答）を処理し、保存した試験ごとのJSONのパスを返す
+
+    問題データはワーカー側でファイルに書き出し、呼び出し側にはパスだけを返す
+    （全問をメイン側のメモリに集めない）。失敗したらNone。
+    """
+    print(f"\n【{year} {season}】")
+
+    question_pdf, answer_pdf = exam_pdfs(year, season)
+
+    if not question_pdf.exists():
+        print(f"  ✗ 問題PDFが見つかりません: {question_pdf}")
+        return None
+
+    if not answer_pdf.exists():
+        print(f"  ✗ 解答PDFが見つかりません: {answer_pdf}")
+        return None
+
+    extracted = extract_exam(_backend, question_pdf, answer_pdf)
+    if extracted is None:
+        return None
+
+    questions = build_questions(*extracted, year, season)
+    return save_questions(questions, year, season)
@@ -0,0 +1,149 @@
+"""
+Popplerのpdftotextでテキスト層を読むエンジン
+
+PyPDF2の extract_text() は純Pythonで遅く、段組みのページでは読み順が崩れる。
+pdftotextを数ページずつ別プロセスで並列に動かし、まとまりごとに結果を返す。
+
+モード:
+  layout  -layout で紙面の配置を保ったテキスト（既定）
+  bbox    -bbox-layout のブロック座標から段組みを判定し、左の段→右の段の順に並べる
+"""
+
+import os
+import subprocess
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from .poppler_tools import page_runs, poppler_command, require_command
+from .registry import Backend, register_backend
+
+# 1回のpdftotext呼び出しで読むページ数（プロセス起動の回数を減らす）
+PAGES_PER_CALL = 8
+
+# -bbox-layout の出力（XHTML）の名前空間
+XHTML_NS = "{http://www.w3.org/1999/xhtml}"
+
+@lru_cache(maxsize=None)
+def pdftotext_version():
+    """
+    pdftotextのバージョン（例: "pdftotext version 24.02.0"）
+
+    設定（config）にはコマンドのフルパスではなくこれを含める（パスはPCごとに違い、
+    パイプラインのフィンガープリントやエンジンの計測結果に入れると別のPCで一致しなくなる）。
+    """
+    completed = subprocess.run([require_command("pdftotext"), "-v"], capture_output=True)
+    output = (completed.stderr or completed.stdout).decode("utf-8", errors="replace").strip()
+    return output.splitlines()[0] if output else "unknown"
+
+def run_pdftotext(pdf_path, first, last, mode="layout"):
+    """first〜lastページ（0始まり）をpdftotextで読み、ページごとのテキストのリストを返す"""
+    command = [require_command("pdftotext"), "-enc", "UTF-8", "-f", str(first + 1), "-l", str(last + 1)]
+    command.append("-bbox-layout" if mode == "bbox" else "-layout")
+    command += [str(pdf_path), "-"]
+    completed = subprocess.run(command, capture_output=True, check=True)
+    output = completed.stdout.decode("utf-8", errors="replace")
+
+    if mode == "bbox":
+        return bbox_to_pages(output)
+
+    # ページの区切りは改ページ文字（最後のページのあとにも付く）
+    pages = output.split("\f")
+    count = last - first + 1
+    return (pages + [""] * count)[:count]
+
+def _block_text(block):
+    lines = []
+    for line in block.iter(f"{XHTML_NS}line"):
+        words = [word.text or "" for word in line.iter(f"{XHTML_NS}word")]
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+def order_blocks(blocks, page_width):
+    """
+    ブロック (xMin, yMin, xMax, テキスト) を読み順に並べる
+
+    ページの中央をまたぐブロック（見出し・全幅の図表など）で区切り、
+    その間は左の段を上から読んでから右の段を上から読む。
+    """
+    middle = page_width / 2
+    ordered = []
+    left, right = [], []
+
+    def flush():
+        ordered.extend(text for _, text in sorted(left))
+        ordered.extend(text for _, text in sorted(right))
+        left.clear()
+        right.clear()
+
+    for x_min, y_min, x_max, text in sorted(blocks, key=lambda b: (b[1], b[0])):
+        if x_max <= middle:
+            left.append((y_min, text))
+        elif x_min >= middle:
+            right.append((y_min, text))
+        else:
+            flush()
+            ordered.append(text)
+    flush()
+    return ordered
+
+def bbox_to_pages(output):
+    """-bbox-layout の出力をページごとの読み順のテキストにする"""
+    root = ET.fromstring(output)
+    pages = []
+    for page in root.iter(f"{XHTML_NS}page"):
+        blocks = [
+            (float(block.get("xMin")), float(block.get("yMin")), float(block.get("xMax")), _block_text(block))
+            for block in page.iter(f"{XHTML_NS}block")
+        ]
+        pages.append("\n\n".join(order_blocks(blocks, float(page.get("width")))))
+    return pages
+
+@register_backend
+class PdftotextBackend(Backend):
+    name = "pdftotext"
+    label = "pdftotext"
+
+    def __init__(self, args=None):
+        super().__init__(args)
+        self.mode = getattr(args, "pdftotext_mode", "layout")
+        workers = getattr(args, "pdftotext_workers", 0)
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        group = parser.add_argument_group("pdftotext")
+        group.add_argument("--pdftotext-mode", choices=["layout", "bbox"], default="layout",
+                           help="layout: 紙面の配置のまま / bbox: ブロック座標から段組みを判定して並べる")
+        group.add_argument("--pdftotext-workers", type=int, default=0,
+                           help="同時に動かすpdftotextのプロセス数（0でCPUコア数）")
+
+    @classmethod
+    def available(cls):
+        return poppler_command("pdftotext") is not None
+
+    def config(self):
+        return f"mode={self.mode};version={pdftotext_version()}"
+
+    def iter_pages(self, pdf_path, page_indices):
+        """
+        指定ページ（0始まり）を (ページ番号, テキスト) の順に返す
+
+        PAGES_PER_CALLページずつpdftotextを並列に起動し、先頭のまとまりから順に結果を返す。
+        """
+        runs = page_runs(sorted(page_indices), PAGES_PER_CALL)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                (first, executor.submit(run_pdftotext, pdf_path, first, last, self.mode))
+                for first, last in runs
+            ]
+            for first, future in futures:
+                for offset, text in enumerate(future.result()):
+                    yield first + offset, text
+
+    def extract_pages(self, pdf_path, page_indices):
+        try:
+            return dict(self.iter_pages(pdf_path, page_indices))
+        except (OSError, subprocess.CalledProcessError, ET.ParseError) as e:
+            print(f"  ✗ pdftotextエラー: {e}")
+            return None
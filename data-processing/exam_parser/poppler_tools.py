@@ -0,0 +1,77 @@
+"""
+Popplerのコマンド（pdftotext・pdftoppmなど）の場所を探す・Popplerに渡すページ範囲を作る
+
+次の順に探し、最初に見つかったものを使う。
+1. 環境変数 POPPLER_PATH
+2. リポジトリ同梱の poppler/Library/bin
+3. 以前から使っている固定のパス（POPPLER_PATH）
+4. PATH上のコマンド
+"""
+
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+
+# Popplerのパス（同梱のものが使えないときに使う）
+POPPLER_PATH = r'C:\Users\10074256\Desktop\ap-dojo\poppler\Library\bin'  # ← 実際のパスに変更
+
+# リポジトリ同梱のPopplerのbin（data-processing/exam_parser/ から2つ上がリポジトリのルート）
+BUNDLED_POPPLER_BIN = Path(__file__).resolve().parents[2] / "poppler" / "Library" / "bin"
+
+def _executable(directory, name):
+    """directoryにこのOSで実行できるnameがあればそのパス"""
+    suffix = ".exe" if os.name == "nt" else ""
+    path = Path(directory) / f"{name}{suffix}"
+    return path if path.is_file() else None
+
+def candidate_dirs():
+    """Popplerのbinの候補を優先順に返す"""
+    dirs = []
+    if os.environ.get("POPPLER_PATH"):
+        dirs.append(Path(os.environ["POPPLER_PATH"]))
+    dirs.append(BUNDLED_POPPLER_BIN)
+    dirs.append(Path(POPPLER_PATH))
+    return dirs
+
+@lru_cache(maxsize=None)
+def find_poppler_bin(name="pdftoppm"):
+    """
+    nameのコマンドがあるPopplerのbinフォルダを返す
+
+    見つからなければNone（pdf2imageなどはPATH上のコマンドを使う）。
+    """
+    for directory in candidate_dirs():
+        if _executable(directory, name):
+            return str(directory)
+    return None
+
+@lru_cache(maxsize=None)
+def poppler_command(name):
+    """nameのコマンドのフルパスを返す（見つからなければNone）"""
+    directory = find_poppler_bin(name)
+    if directory is not None:
+        return str(_executable(directory, name))
+    return shutil.which(name)
+
+def require_command(name):
+    """nameのコマンドのフルパスを返す（見つからなければ探した場所を書いたFileNotFoundError）"""
+    command = poppler_command(name)
+    if command is None:
+        places = ", ".join(str(directory) for directory in candidate_dirs())
+        raise FileNotFoundError(f"{name}が見つかりません（{places}、PATH を探しました）")
+    return command
+
+def page_runs(page_indices, window):
+    """ページ番号の列を、連続したwindowページ以下のまとまり (first, last) に分ける"""
+    runs = []
+    for i in page_indices:
+        if runs and runs[-1][1] == i - 1 and runs[-1][1] - runs[-1][0] + 1 < window:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+    return runs
+
+def poppler_path():
+    """pdf2imageに渡すPopplerのパス（見つからなければNone = PATH上のpdftoppmを使う）"""
+    return find_poppler_bin("pdftoppm")
@@ -0,0 +1,191 @@
+"""
+OCRの前に行うページ画像の前処理（NumPyでページ全体をまとめて計算する）
+
+convert_from_pathのカラー画像をそのままtesseractに渡すと、tesseractが自分で二値化し、
+余白やノイズの部分も読もうとする。ここで先に次の処理をしておく。
+1. グレースケール化
+2. 適応的二値化（周囲の平均より一定の割合暗い画素を黒にする。積分画像で窓の平均を求める）
+   周りに黒画素のない孤立した点（スキャンのゴミ）は消す
+3. 傾き補正（黒画素を少しずつ傾けて横方向に投影し、行の山が最も鋭くなる角度を選ぶ）
+4. 余白の切り取り
+5. 文字の高さが target_line_height になるように縮小（指定したときだけ。拡大はしない）
+
+使い方:
+  from exam_parser.preprocess import preprocess_page
+  image, stats = preprocess_page(page_image, target_line_height=32)
+"""
+
+import time
+
+# 処理を変えたら上げる（OCRキャッシュのキーに含める）
+PREPROCESS_VERSION = 1
+
+# 二値化の窓の大きさ（ページ幅に対する割合）と、窓の平均よりどれだけ暗ければ黒とするか（%）
+BLOCK_RATIO = 1 / 32
+THRESHOLD_PERCENT = 15
+
+# 傾き補正で試す角度の範囲と刻み（度）。これより小さい傾きは直さない
+MAX_SKEW = 2.0
+SKEW_STEP = 0.1
+MIN_SKEW = 0.05
+
+# 傾きの推定に使う黒画素の数の上限（多いページは間引く）
+SKEW_SAMPLE = 200_000
+
+# 余白とみなす行・列の黒画素数（これ以下ならゴミとして無視する）と、切り取ったあとに残す余白
+NOISE_PIXELS = 2
+MARGIN = 16
+
+def to_gray(image):
+    """PIL画像をグレースケールのndarray（uint8）に変換"""
+    import numpy as np
+
+    return np.asarray(image.convert("L"))
+
+def adaptive_threshold(gray, block=None, percent=THRESHOLD_PERCENT):
+    """
+    周囲block画素四方の平均よりpercent%以上暗い画素を黒（True）とする真偽配列
+
+    窓の合計は積分画像（2回の累積和）の4点の差で求めるので、窓の大きさによらず一定の計算量。
+    """
+    import numpy as np
+
+    height, width = gray.shape
+    if block is None:
+        block = max(3, int(width * BLOCK_RATIO))
+    radius = block // 2
+
+    # 合計は 255 × 窓の画素数 を超えないので、差をとる限りuint32のあふれは打ち消し合う
+    integral = np.zeros((height + 1, width + 1), dtype=np.uint32)
+    np.cumsum(np.cumsum(gray, axis=0, dtype=np.uint32), axis=1, dtype=np.uint32, out=integral[1:, 1:])
+
+    y0 = np.clip(np.arange(height) - radius, 0, height)
+    y1 = np.clip(np.arange(height) + radius + 1, 0, height)
+    x0 = np.clip(np.arange(width) - radius, 0, width)
+    x1 = np.clip(np.arange(width) + radius + 1, 0, width)
+    sums = (integral[np.ix_(y1, x1)] - integral[np.ix_(y0, x1)]
+            - integral[np.ix_(y1, x0)] + integral[np.ix_(y0, x0)])
+    areas = np.outer(y1 - y0, x1 - x0).astype(np.uint32)
+
+    # gray < 平均 × (100 - percent) / 100 を整数で比べる
+    return gray.astype(np.uint32) * areas * 100 < sums * (100 - percent)
+
+def despeckle(dark, min_neighbors=1):
+    """周囲8画素の黒画素がmin_neighbors個未満の黒画素を消す"""
+    import numpy as np
+
+    padded = np.pad(dark, 1).astype(np.uint8)
+    height, width = dark.shape
+    neighbors = np.zeros(dark.shape, dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dy != 1 or dx != 1:
+                neighbors += padded[dy:dy + height, dx:dx + width]
+    return dark & (neighbors >= min_neighbors)
+
+def estimate_skew(dark, max_angle=MAX_SKEW, step=SKEW_STEP, sample=SKEW_SAMPLE):
+    """
+    文字の行の傾き（度。右下がりが正）を推定
+
+    黒画素の座標を各角度でずらして行ごとの黒画素数を数え、その二乗和が最大になる角度を返す。
+    全角度を1回のbincountで数える。
+    """
+    import numpy as np
+
+    ys, xs = np.nonzero(dark)
+    if len(ys) == 0:
+        return 0.0
+    if len(ys) > sample:
+        stride = len(ys) // sample + 1
+        ys, xs = ys[::stride], xs[::stride]
+
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    rows = np.rint(ys[None, :] - xs[None, :] * np.tan(np.radians(angles))[:, None]).astype(np.int64)
+    rows -= rows.min()
+    span = int(rows.max()) + 1
+    rows += np.arange(len(angles))[:, None] * span
+    counts = np.bincount(rows.ravel(), minlength=len(angles) * span).reshape(len(angles), span)
+    scores = (counts.astype(np.float64) ** 2).sum(axis=1)
+    return float(angles[int(np.argmax(scores))])
+
+def deskew(dark, angle):
+    """黒画素の配列を -angle 度回して傾きを直す（はみ出した部分は白）"""
+    import numpy as np
+    from PIL import Image
+
+    image = Image.fromarray(dark.astype(np.uint8) * 255)
+    # PILのrotateは反時計回りが正（画面上で右下がりの行は反時計回りに回すと水平になる）
+    rotated = image.rotate(angle, resample=Image.NEAREST, fillcolor=0)
+    return np.asarray(rotated) > 127
+
+def content_box(dark, noise=NOISE_PIXELS, margin=MARGIN):
+    """余白を除いた範囲 (left, top, right, bottom)。黒画素がなければNone"""
+    import numpy as np
+
+    rows = np.flatnonzero(dark.sum(axis=1) > noise)
+    cols = np.flatnonzero(dark.sum(axis=0) > noise)
+    if len(rows) == 0 or len(cols) == 0:
+        return None
+    height, width = dark.shape
+    return (max(0, int(cols[0]) - margin), max(0, int(rows[0]) - margin),
+            min(width, int(cols[-1]) + 1 + margin), min(height, int(rows[-1]) + 1 + margin))
+
+def median_line_height(dark, min_height=4, noise=NOISE_PIXELS):
+    """
+    文字の行の高さの中央値（画素）。行が見つからなければ0
+
+    日本語は小文字がないので、x-heightの代わりに行の高さ（ほぼ文字の高さ）を使う。
+    """
+    import numpy as np
+
+    inked = np.concatenate([[False], dark.sum(axis=1) > noise, [False]])
+    edges = np.flatnonzero(inked[1:] != inked[:-1])
+    heights = edges[1::2] - edges[::2]
+    heights = heights[heights >= min_height]
+    return int(np.median(heights)) if len(heights) else 0
+
+def preprocess_page(image, target_line_height=0):
+    """
+    1ページ分のPIL画像を前処理し、(tesseractに渡す画像, 処理の記録) を返す
+
+    記録: {"seconds", "skew"（度）, "crop"（切り取った範囲）, "lineHeight", "scale"}
+    """
+    import numpy as np
+    from PIL import Image
+
+    start = time.perf_counter()
+    gray = to_gray(image)
+    dark = despeckle(adaptive_threshold(gray))
+
+    skew = estimate_skew(dark)
+    if abs(skew) >= MIN_SKEW:
+        dark = deskew(dark, skew)
+    else:
+        skew = 0.0
+
+    box = content_box(dark)
+    if box is not None:
+        left, top, right, bottom = box
+        dark = dark[top:bottom, left:right]
+
+    line_height = median_line_height(dark)
+    scale = 1.0
+    if target_line_height and line_height > target_line_height:
+        scale = target_line_height / line_height
+
+    if scale < 1.0:
+        # 縮小は灰色の中間調を残す（tesseractが自分で二値化する）
+        result = Image.fromarray(np.where(dark, 0, 255).astype(np.uint8))
+        size = (max(1, round(result.width * scale)), max(1, round(result.height * scale)))
+        result = result.resize(size, Image.BOX)
+    else:
+        # 白がTrueの1ビット画像（tesseractに渡す一時ファイルも小さくなる）
+        result = Image.fromarray(~dark)
+
+    return result, {
+        "seconds": time.perf_counter() - start,
+        "skew": skew,
+        "crop": box,
+        "lineHeight": line_height,
+        "scale": scale,
+    }
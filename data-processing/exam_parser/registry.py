@@ -0,0 +1,103 @@
+"""
+抽出エンジン（バックエンド）の登録
+
+エンジンを追加するときは Backend を継承したクラスを作り、@register_backend を付けて
+exam_parser/__init__.py の BUILTIN_BACKENDS にモジュール名を加える。
+"""
+
+BACKENDS = {}
+
+class Backend:
+    """
+    PDFからテキストを取り出すエンジンの共通インターフェース
+
+    name: --engine で指定する名前
+    label: 画面表示用の名前
+    """
+
+    name = None
+    label = None
+
+    def __init__(self, args=None):
+        self.args = args
+
+    @classmethod
+    def add_arguments(cls, parser):
+        """エンジン固有のコマンドライン引数を追加"""
+
+    @classmethod
+    def available(cls):
+        """必要なライブラリ・コマンドがそろっているか"""
+        return True
+
+    def prepare(self):
+        """モデルの読み込みなど、最初のページの前に1回だけ行う準備"""
+
+    def config(self):
+        """キャッシュキー・レポートに含めるエンジンの設定"""
+        return ""
+
+    def extract_pages(self, pdf_path, page_indices):
+        """指定ページ（0始まり）のテキストを {ページ番号: テキスト} で返す（エラー時はNone）"""
+        raise NotImplementedError
+
+    def extract_text(self, pdf_path):
+        """PDF全体のテキストを返す（エラー時はNone）"""
+        from PyPDF2 import PdfReader
+
+        try:
+            total = len(PdfReader(pdf_path).pages)
+        except Exception as e:
+            print(f"    ✗ PDFの読み込みエラー: {e}")
+            return None
+        page_texts = self.extract_pages(pdf_path, range(total))
+        if page_texts is None:
+            return None
+        return "".join(page_texts.get(i, "") + "\n" for i in range(total))
+
+    def release(self):
+        """
+        このインスタンスが持っているハンドルなどを解放する
+
+        ワーカープロセスごとのインスタンスは、プロセスの終了時に呼ばれる（release_at_exit）。
+        """
+
+    def close(self):
+        """キャッシュの整理など、処理の最後に1回だけ行う後始末（release()も呼ぶ）"""
+        self.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def release_at_exit(backend):
+    """
+    プロセスの終了時に backend.release() を呼ぶように登録する
+
+    プロセスプールのワーカーはatexitを呼ばずに終わるので、multiprocessingの終了処理に登録する
+    （直列のときは自プロセスの終了時に呼ばれる）。
+    """
+    from multiprocessing.util import Finalize
+
+    Finalize(backend, backend.release, exitpriority=0)
+    return backend
+
+def register_backend(cls):
+    """Backendのサブクラスを登録するデコレータ"""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} に name がありません")
+    BACKENDS[cls.name] = cls
+    return cls
+
+def get_backend(name):
+    """名前からBackendのクラスを返す"""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"不明なエンジン: {name}（{', '.join(BACKENDS)}）") from None
+
+def available_backends():
+    """使えるエンジンのクラスを登録順に返す"""
+    return [cls for cls in BACKENDS.values() if cls.available()]
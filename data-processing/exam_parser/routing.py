@@ -0,0 +1,68 @@
+"""
+OCRエンジン共通の処理（ページごとにテキスト層とOCRを振り分ける）
+
+構造マニフェスト（pdf_manifest.py）を見て、テキスト層が十分なページはそのまま使い、
+足りないページだけをOCRする。OCR結果はページ単位でキャッシュする。
+"""
+
+from file_utils import file_sha256
+from ocr_cache import OCRCache
+from pdf_manifest import ROUTE_BLANK, ROUTE_OCR, ROUTE_TEXT, load_structure, read_text_layer, route_pages
+
+from .registry import Backend
+
+def evict_cache(cache=None):
+    """
+    OCRキャッシュが上限を超えていれば古いものから削除
+
+    エンジンを作らずに呼べる（パースの最後にメインプロセスから1回だけ呼ぶ）。
+    """
+    if cache is None:
+        cache = OCRCache()
+    removed, freed = cache.evict()
+    if removed:
+        print(f"\nOCRキャッシュを{removed}件削除しました（{freed / 1024 / 1024:.1f} MB）")
+
+class OCRBackend(Backend):
+    """ページ単位でOCRするエンジンの基底クラス（ocr_pagesを実装する）"""
+
+    def __init__(self, args=None):
+        super().__init__(args)
+        use_cache = not getattr(args, "no_cache", False)
+        self.cache = OCRCache(enabled=use_cache)
+
+    def ocr_pages(self, pdf_path, page_indices, pdf_sha256):
+        """指定ページをOCRして {ページ番号: テキスト} を返す（エラー時はNone）"""
+        raise NotImplementedError
+
+    def extract_pages(self, pdf_path, page_indices):
+        page_indices = list(page_indices)
+        try:
+            pdf_sha256 = file_sha256(pdf_path)
+            structure, layer_texts = load_structure(pdf_path, pdf_sha256)
+            routes = route_pages(structure)
+        except Exception as e:
+            print(f"    ⚠ エラー: {e}")
+            print(f"    {self.label}ですべてのページを処理...")
+            return self.ocr_pages(pdf_path, page_indices, None)
+
+        text_pages = [i for i in page_indices if routes[i] == ROUTE_TEXT]
+        ocr_targets = [i for i in page_indices if routes[i] == ROUTE_OCR]
+        blank_pages = sum(1 for i in page_indices if routes[i] == ROUTE_BLANK)
+        print(f"    {len(page_indices)}ページ: テキスト層{len(text_pages)} / "
+              f"{self.label}{len(ocr_targets)} / 白紙{blank_pages}")
+
+        if layer_texts is None:
+            layer_texts = read_text_layer(pdf_path, text_pages)
+        page_texts = {i: layer_texts[i] for i in text_pages}
+
+        if ocr_targets:
+            ocr_texts = self.ocr_pages(pdf_path, ocr_targets, pdf_sha256)
+            if ocr_texts is None:
+                return None
+            page_texts.update(ocr_texts)
+        return page_texts
+
+    def close(self):
+        super().close()
+        evict_cache(self.cache)
@@ -0,0 +1,314 @@
+"""
+pytesseractでOCRするエンジン
+
+--preprocess を付けると、ページ画像をNumPyで前処理（二値化・傾き補正・余白の切り取り・縮小）
+してからtesseractに渡す（preprocess.py）。
+
+--adaptive-dpi を付けると、まず低い解像度（--low-dpi）でOCRし、単語の信頼度や
+4択がそろった問題の割合が足りないページだけを高い解像度（OCR_DPI）で変換し直してOCRする。
+変換・OCRの時間は解像度の2乗に比例するので、読みやすいページの分だけ速くなる。
+"""
+
+import importlib.util
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+
+from exam_runner import default_jobs
+from question_tokenizer import tokenize_questions
+
+from .poppler_tools import page_runs, poppler_path
+from .preprocess import PREPROCESS_VERSION, preprocess_page
+from .registry import register_backend
+from .routing import OCRBackend
+
+# Tesseractのパス（存在しない環境ではPATH上のtesseractを使う）
+TESSERACT_CMD = r'C:\Users\10074256\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'
+
+OCR_DPI = 300
+TESSERACT_LANG = 'jpn'  # 日本語
+TESSERACT_CONFIG = '--psm 6'  # ページセグメンテーションモード
+
+# 1回のpdftoppm呼び出しで変換するページ数
+RENDER_WINDOW = 2
+
+# --adaptive-dpi で最初にOCRする解像度
+LOW_DPI = 200
+
+# 単語の信頼度（文字数で重みを付けた平均、0〜100）がこれ未満のページは高解像度でやり直す
+MIN_CONFIDENCE = 70
+
+# 問番号が見つかった問のうち、4択がそろった割合がこれ未満のページも高解像度でやり直す
+MIN_COMPLETE_RATIO = 0.75
+
+@lru_cache(maxsize=None)
+def tesseract_version():
+    """tesseractのバージョン（キャッシュキーに含める）"""
+    import pytesseract
+
+    if Path(TESSERACT_CMD).exists():
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return str(pytesseract.get_tesseract_version())
+
+def iter_page_images(pdf_path, page_indices, dpi=OCR_DPI, window=RENDER_WINDOW):
+    """
+    指定ページ（0始まり）をwindowページずつ画像に変換して (ページ番号, 画像) を順に返す
+
+    convert_from_pathで全ページを一度に変換するとページ数に比例してメモリを使うため、
+    first_page/last_pageで少しずつ変換する。
+    """
+    from pdf2image import convert_from_path
+
+    for first, last in page_runs(page_indices, window):
+        first_page = first + 1
+        last_page = last + 1
+        images = convert_from_path(
+            str(pdf_path),
+            dpi=dpi,
+            poppler_path=poppler_path(),
+            first_page=first_page,
+            last_page=last_page
+        )
+        for offset, image in enumerate(images):
+            yield first_page - 1 + offset, image
+
+def data_to_text(data):
+    """
+    image_to_dataの結果を (テキスト, 平均信頼度) にする
+
+    image_to_stringと同じように、行ごとに改行し、段落の間は空行にする。
+    """
+    paragraphs = {}
+    total = weighted = 0.0
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        paragraph = paragraphs.setdefault((data["block_num"][i], data["par_num"][i]), {})
+        paragraph.setdefault(data["line_num"][i], []).append(word)
+        confidence = float(data["conf"][i])
+        if confidence >= 0:
+            total += len(word)
+            weighted += confidence * len(word)
+    text = "\n\n".join(
+        "\n".join(" ".join(words) for words in lines.values()) for lines in paragraphs.values()
+    )
+    return text, (weighted / total if total else 0.0)
+
+def needs_escalation(text, confidence, min_confidence=MIN_CONFIDENCE):
+    """低解像度のOCR結果を高解像度でやり直すべきか（単語の信頼度と、問題・選択肢の取れ高で判断）"""
+    if confidence < min_confidence:
+        return True
+    # ページ末尾の問は選択肢が次のページに続くことがあるので数えない
+    questions = list(tokenize_questions(text))[:-1]
+    if not questions:
+        return False
+    complete = sum(1 for _, _, choices in questions if len(choices) == 4)
+    return complete < len(questions) * MIN_COMPLETE_RATIO
+
+@register_backend
+class TesseractBackend(OCRBackend):
+    name = "tesseract"
+    label = "tesseract"
+
+    def __init__(self, args=None):
+        super().__init__(args)
+        jobs = max(1, getattr(args, "jobs", 1))
+        ocr_workers = getattr(args, "ocr_workers", 0)
+        # 1つのPDFの中で同時にOCRするページ数
+        self.ocr_workers = ocr_workers if ocr_workers > 0 else max(1, default_jobs() // jobs)
+        # 画像に変換済みでOCR待ち・OCR中のページ数の上限（0ならocr_workersの2倍）
+        # 300dpiのA4 1ページは約25MBなので、これでPDF1つあたりのメモリ使用量が決まる
+        self.max_pages_in_flight = max(0, getattr(args, "max_pages_in_flight", 0))
+        self.preprocess = getattr(args, "preprocess", False)
+        # 前処理で縮小するときの文字の行の高さ（画素、0なら縮小しない）
+        self.target_line_height = max(0, getattr(args, "ocr_line_height", 0))
+        self.adaptive_dpi = getattr(args, "adaptive_dpi", False)
+        self.low_dpi = getattr(args, "low_dpi", LOW_DPI)
+        self.min_confidence = getattr(args, "min_confidence", MIN_CONFIDENCE)
+        # 最初に画像へ変換する解像度
+        self.render_dpi = self.low_dpi if self.adaptive_dpi else OCR_DPI
+
+    @classmethod
+    def add_arguments(cls, parser):
+        group = parser.add_argument_group("tesseract")
+        group.add_argument("--ocr-workers", type=int, default=0,
+                           help="1つのPDFで同時にOCRするページ数（0でCPUコア数÷jobs）")
+        group.add_argument("--max-pages-in-flight", type=int, default=0,
+                           help="画像に変換済みのページ数の上限（0でocr-workersの2倍）")
+        group.add_argument("--preprocess", action="store_true",
+                           help="OCRの前にページ画像を二値化・傾き補正・余白の切り取りする")
+        group.add_argument("--ocr-line-height", type=int, default=0,
+                           help="--preprocess で文字の行の高さがこの画素数になるように縮小（0で縮小しない）")
+        group.add_argument("--adaptive-dpi", action="store_true",
+                           help=f"低い解像度でOCRし、読み取りが悪いページだけ{OCR_DPI}dpiでやり直す")
+        group.add_argument("--low-dpi", type=int, default=LOW_DPI,
+                           help=f"--adaptive-dpi で最初にOCRする解像度（既定: {LOW_DPI}）")
+        group.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE,
+                           help=f"--adaptive-dpi で単語の平均信頼度がこれ未満ならやり直す（既定: {MIN_CONFIDENCE}）")
+
+    @classmethod
+    def available(cls):
+        if importlib.util.find_spec("pdf2image") is None:
+            return False
+        try:
+            tesseract_version()
+        except Exception:
+            return False
+        return True
+
+    def prepare(self):
+        tesseract_version()
+        if self.ocr_workers > 1:
+            # tesseract自体のOpenMPスレッドがページ並列と取り合わないようにする
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    def engine_version(self):
+        """キャッシュキーに含めるtesseractのバージョン"""
+        return tesseract_version()
+
+    def config(self):
+        """キャッシュキーに含めるOCR設定（tesseractのバージョンが変わったら取り直す）"""
+        config = f"lang={TESSERACT_LANG};config={TESSERACT_CONFIG};version={self.engine_version()}"
+        if self.preprocess:
+            config += f";preprocess=v{PREPROCESS_VERSION},line={self.target_line_height}"
+        if self.adaptive_dpi:
+            config += f";adaptive={self.low_dpi}>{OCR_DPI},confidence={self.min_confidence}"
+        return config
+
+    def run_tesseract(self, image, with_confidence=False):
+        """
+        1枚の画像をOCRする（pytesseractはページごとにtesseractのプロセスを起動する）
+
+        with_confidence なら image_to_data で単語ごとの信頼度も読み、(テキスト, 平均信頼度) を返す。
+        """
+        import pytesseract
+
+        if with_confidence:
+            data = pytesseract.image_to_data(image, lang=TESSERACT_LANG, config=TESSERACT_CONFIG,
+                                             output_type=pytesseract.Output.DICT)
+            return data_to_text(data)
+        return pytesseract.image_to_string(image, lang=TESSERACT_LANG, config=TESSERACT_CONFIG)
+
+    def recognize(self, image, timings, with_confidence=False):
+        """画像を（前処理して）OCRする。timings（[前処理の秒数, OCRの秒数]）に時間を足す"""
+        prepared = None
+        if self.preprocess:
+            prepared, stats = preprocess_page(image, self.target_line_height)
+            timings[0] += stats["seconds"]
+        try:
+            target = prepared if prepared is not None else image
+            start = time.perf_counter()
+            result = self.run_tesseract(target, with_confidence)
+            timings[1] += time.perf_counter() - start
+            return result
+        finally:
+            if prepared is not None:
+                prepared.close()
+
+    def ocr_page(self, image, cache_key=None, pdf_path=None, page_index=None):
+        """
+        1ページ分の画像をOCRし、結果をすぐキャッシュに保存
+
+        --adaptive-dpi のときは、読み取りが悪ければpdf_pathのpage_indexを高解像度で変換し直してOCRする。
+        戻り値: (テキスト, (前処理の秒数, OCRの秒数), 高解像度でやり直したか)
+        （問題PDFと解答PDFを別スレッドで同時に処理するので、記録はインスタンスに持たず呼び出し側に返す）
+        """
+        timings = [0.0, 0.0]
+        escalated = False
+        try:
+            if self.adaptive_dpi:
+                text, confidence = self.recognize(image, timings, with_confidence=True)
+                if needs_escalation(text, confidence, self.min_confidence):
+                    image.close()
+                    _, image = next(iter_page_images(pdf_path, [page_index], dpi=OCR_DPI))
+                    text = self.recognize(image, timings)
+                    escalated = True
+            else:
+                text = self.recognize(image, timings)
+        finally:
+            image.close()
+        if cache_key is not None:
+            self.cache.put(cache_key, text)
+        return text, tuple(timings), escalated
+
+    def ocr_pages(self, pdf_path, page_indices, pdf_sha256):
+        """
+        OCRでPDFの指定ページ（0始まり）からテキストを抽出
+
+        キャッシュにあるページは使い回し、残りのページだけをOCRする。
+        ページ単位でocr_workers個のスレッドに振り分ける。
+        （tesseractは別プロセスで動き、tesserocrはOCR中にGILを解放するので、スレッドでもコア数分並列になる）
+        画像への変換はOCRの進み具合に合わせて少しずつ行い、変換済みのページが
+        max_pages_in_flightを超えないようにする。
+        """
+        from file_utils import file_sha256
+
+        try:
+            self.prepare()
+            page_indices = list(page_indices)
+            total = len(page_indices)
+
+            if pdf_sha256 is None:
+                pdf_sha256 = file_sha256(pdf_path)
+            keys = {
+                i: self.cache.key(pdf_sha256, i, self.render_dpi, self.name, self.config())
+                for i in page_indices
+            }
+            page_texts = {i: self.cache.get(keys[i]) for i in page_indices}
+            missing = [i for i in page_indices if page_texts[i] is None]
+            if self.cache.enabled:
+                print(f"    キャッシュ: {total - len(missing)}/{total}ページ")
+
+            max_in_flight = self.max_pages_in_flight or self.ocr_workers * 2
+            if missing:
+                print("    OCR処理中（時間がかかります）...")
+                print(f"    {len(missing)}ページを処理中（{self.ocr_workers}並列、変換済みページは最大{max_in_flight}）...")
+
+            done = 0
+            # この呼び出しの記録（ページごとの (前処理の秒数, OCRの秒数) と、高解像度でやり直したページ）
+            page_timings = []
+            escalated = []
+            with ThreadPoolExecutor(max_workers=self.ocr_workers) as executor:
+                pending = {}
+
+                def collect():
+                    nonlocal done
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        i = pending.pop(future)
+                        page_texts[i], timings, retried = future.result()
+                        page_timings.append(timings)
+                        if retried:
+                            escalated.append(i)
+                        done += 1
+                        print(f"      {done}/{len(missing)}ページ完了（p.{i + 1}）")
+
+                for i, image in iter_page_images(pdf_path, missing, dpi=self.render_dpi):
+                    pending[executor.submit(self.ocr_page, image, keys[i], pdf_path, i)] = i
+                    del image
+                    # 上限に達したら空きができるまで次のページを変換しない
+                    while len(pending) >= max_in_flight:
+                        collect()
+
+                while pending:
+                    collect()
+
+            print(f"    ✓ OCRで{sum(len(t) for t in page_texts.values())}文字を抽出")
+            if page_timings:
+                count = len(page_timings)
+                prepare_seconds = sum(p for p, _ in page_timings) / count
+                ocr_seconds = sum(o for _, o in page_timings) / count
+                label = f"前処理 {prepare_seconds:.2f}秒 + " if self.preprocess else ""
+                print(f"    1ページあたり: {label}OCR {ocr_seconds:.2f}秒（{count}ページ）")
+            if self.adaptive_dpi and missing:
+                pages = ", ".join(f"p.{i + 1}" for i in sorted(escalated))
+                print(f"    {self.low_dpi}dpi → {OCR_DPI}dpiでやり直し: {len(escalated)}/{len(missing)}ページ"
+                      + (f"（{pages}）" if pages else ""))
+            return page_texts
+
+        except Exception as e:
+            print(f"    ✗ OCRエラー: {e}")
+            return None
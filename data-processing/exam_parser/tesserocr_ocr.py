@@ -0,0 +1,132 @@
+"""
+tesserocrでOCRするエンジン（tesseractをプロセス内で使い続ける）
+
+pytesseractはページごとにtesseractのプロセスを起動し、そのたびにjpnの学習データを
+読み込み、画像を一時ファイル経由で渡す。ここではtesseractのAPIハンドル（PyTessBaseAPI）を
+ocr_workers個だけ作っておき、ページ・PDF・試験をまたいで使い回す。画像はメモリのまま渡す。
+
+- ハンドルはプールから借りて返す（同じハンドルを2つのスレッドで同時に使わない）
+- tesserocrはOCR中にGILを解放するので、スレッドでもコア数分並列になる
+- 前処理（--preprocess）・段階的な解像度（--adaptive-dpi）はtesseractエンジンと同じ
+- ハンドルはワーカープロセスの終了時（直列ならプログラムの終了時）にrelease()で解放する
+"""
+
+import importlib.util
+import os
+import queue
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from .registry import register_backend
+from .tesseract_ocr import TESSERACT_CMD, TESSERACT_LANG, TesseractBackend
+
+# TESSERACT_CONFIG（--psm 6）と同じページセグメンテーションモード
+PAGE_SEG_MODE = "SINGLE_BLOCK"
+
+def load_tesserocr():
+    """
+    tesserocrを読み込む（このモジュールではtesserocrを必ずここから読み込む）
+
+    tesseractのOpenMPのスレッド数はライブラリを読み込んだ時点で決まるので、その前に1に制限する。
+    ページ並列・試験並列でコアは埋まるため、tesseract内部のスレッドは取り合いになるだけ。
+    環境変数 OMP_THREAD_LIMIT が指定されていればそちらに従う。
+    """
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    import tesserocr
+
+    return tesserocr
+
+@lru_cache(maxsize=None)
+def tesserocr_version():
+    """tesserocrが使うtesseractのバージョン（キャッシュキーに含める）"""
+    return load_tesserocr().tesseract_version().splitlines()[0]
+
+def tessdata_path():
+    """Windowsのインストール先にtessdataがあればそのパス（なければtesserocrの既定値）"""
+    path = Path(TESSERACT_CMD).parent / "tessdata"
+    return str(path) if path.exists() else None
+
+@register_backend
+class TesserocrBackend(TesseractBackend):
+    name = "tesserocr"
+    label = "tesserocr"
+
+    def __init__(self, args=None):
+        super().__init__(args)
+        self._apis = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def add_arguments(cls, parser):
+        """tesseractエンジンと同じ引数を使う（TesseractBackendが追加するので、ここでは追加しない）"""
+
+    @classmethod
+    def available(cls):
+        if importlib.util.find_spec("pdf2image") is None:
+            return False
+        try:
+            tesserocr_version()
+        except Exception:
+            return False
+        return True
+
+    def prepare(self):
+        tesserocr_version()
+
+    def engine_version(self):
+        return tesserocr_version()
+
+    def _acquire(self):
+        """APIハンドルをプールから借りる（足りなければocr_workers個まで作る）"""
+        tesserocr = load_tesserocr()
+
+        try:
+            return self._apis.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.ocr_workers
+            if create:
+                self._created += 1
+        if not create:
+            return self._apis.get()
+        options = {"lang": TESSERACT_LANG, "psm": getattr(tesserocr.PSM, PAGE_SEG_MODE)}
+        if tessdata_path():
+            options["path"] = tessdata_path()
+        try:
+            return tesserocr.PyTessBaseAPI(**options)
+        except BaseException:
+            # 作れなかった分は数えない（次に借りるときに作り直せるように）
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def run_tesseract(self, image, with_confidence=False):
+        """
+        1枚の画像を、プールのAPIハンドルでOCRする（学習データの読み込み・一時ファイルなし）
+
+        with_confidence なら (テキスト, 平均信頼度) を返す。
+        """
+        api = self._acquire()
+        try:
+            api.SetImage(image)
+            text = api.GetUTF8Text()
+            if with_confidence:
+                return text, float(api.MeanTextConf())
+            return text
+        finally:
+            api.Clear()
+            self._apis.put(api)
+
+    def release(self):
+        """プールのAPIハンドルをすべて解放する（OCR中のものはないときに呼ぶ）"""
+        while True:
+            try:
+                api = self._apis.get_nowait()
+            except queue.Empty:
+                break
+            api.End()
+            with self._lock:
+                self._created -= 1
@@ -0,0 +1,30 @@
+"""
+PyPDF2でテキスト層を読むエンジン（OCRなし・最速）
+"""
+
+import importlib.util
+
+from .registry import Backend, register_backend
+
+@register_backend
+class TextLayerBackend(Backend):
+    name = "text"
+    label = "PyPDF2"
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec("PyPDF2") is not None
+
+    def config(self):
+        import PyPDF2
+        return f"PyPDF2={PyPDF2.__version__}"
+
+    def extract_pages(self, pdf_path, page_indices):
+        from PyPDF2 import PdfReader
+
+        try:
+            reader = PdfReader(pdf_path)
+            return {i: reader.pages[i].extract_text() or "" for i in page_indices}
+        except Exception as e:
+            print(f"  ✗ PDFの読み込みエラー: {e}")
+            return None
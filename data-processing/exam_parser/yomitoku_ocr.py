@@ -0,0 +1,176 @@
+"""
+yomitokuでOCRするエンジン（スキャン画像PDFにも対応）
+
+yomitokuのDocumentAnalyzerは1回の呼び出しで1ページの画像しか受け取らないので、
+モデルには1ページずつ渡す（複数ページをまとめて推論することはできない）。
+画像への変換だけをrender_windowページずつまとめて行い、メモリに載る画像の数を抑える。
+"""
+
+import importlib.util
+import threading
+import time
+
+from .registry import register_backend
+from .routing import OCRBackend
+
+# yomitokuに渡す画像の解像度
+YOMITOKU_DPI = 200
+
+# 1回にまとめて画像へ変換するページ数の既定値
+DEFAULT_RENDER_WINDOW = 4
+
+def render_pages(pdf_path, page_indices, dpi=YOMITOKU_DPI):
+    """指定ページだけを画像（yomitokuが受け取るBGRのndarray）に変換"""
+    import cv2
+    import numpy as np
+    import pypdfium2 as pdfium
+
+    document = pdfium.PdfDocument(str(pdf_path))
+    try:
+        images = []
+        for i in page_indices:
+            bitmap = document[i].render(scale=dpi / 72)
+            images.append(cv2.cvtColor(np.array(bitmap.to_pil()), cv2.COLOR_RGB2BGR))
+        return images
+    finally:
+        document.close()
+
+def result_to_text(result):
+    """yomitokuの解析結果（1ページ分）を読み順のテキストに変換"""
+    blocks = []
+    for paragraph in result.paragraphs:
+        blocks.append((paragraph.order, paragraph.contents))
+
+    # 表（解答PDFの「問番号 正解 分野」など）は行ごとに1行にまとめる
+    for table in result.tables:
+        rows = {}
+        for cell in table.cells:
+            rows.setdefault(cell.row, []).append((cell.col, cell.contents))
+        lines = [" ".join(c for _, c in sorted(cells)) for _, cells in sorted(rows.items())]
+        blocks.append((table.order, "\n".join(lines)))
+
+    blocks.sort(key=lambda block: block[0] if block[0] is not None else 0)
+    return "\n".join(contents for _, contents in blocks if contents)
+
+@register_backend
+class YomitokuBackend(OCRBackend):
+    name = "yomitoku"
+    label = "yomitoku"
+
+    def __init__(self, args=None):
+        super().__init__(args)
+        self.device = getattr(args, "device", "cpu")
+        self.threads = max(0, getattr(args, "threads", 0))  # torchのスレッド数（0ならtorchの既定値）
+        self.render_window = max(1, getattr(args, "render_window", DEFAULT_RENDER_WINDOW))
+        # ワーカープロセスごとに1回だけ読み込んで使い回すモデル
+        self._analyzer = None
+        self._analyzer_lock = threading.Lock()
+
+    @classmethod
+    def add_arguments(cls, parser):
+        group = parser.add_argument_group("yomitoku")
+        group.add_argument("--device", default="cpu", help="yomitokuを実行するデバイス（cpu / cuda）")
+        group.add_argument("--threads", type=int, default=0,
+                           help="ワーカーごとのtorchのスレッド数（0でtorchの既定値）")
+        group.add_argument("--render-window", type=int, default=DEFAULT_RENDER_WINDOW,
+                           help="1回にまとめて画像へ変換するページ数（yomitokuには1ページずつ渡す）")
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec("yomitoku") is not None
+
+    def config(self):
+        """キャッシュキーに含めるOCR設定（yomitokuのバージョン・デバイスが変わったら取り直す）"""
+        import yomitoku
+        return f"version={getattr(yomitoku, '__version__', 'unknown')};device={self.device}"
+
+    def prepare(self):
+        self.get_analyzer()
+
+    def get_analyzer(self):
+        """
+        yomitokuのDocumentAnalyzerを返す
+
+        モデルの読み込みはプロセスごとに1回だけ行い、以降のPDFでは使い回す。
+        初回は読み込みとウォームアップ（1回目の推論）の時間を表示する。
+        """
+        if self._analyzer is not None:
+            return self._analyzer
+
+        import numpy as np
+        from yomitoku import DocumentAnalyzer
+
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+
+        start = time.perf_counter()
+        analyzer = DocumentAnalyzer(configs={}, visualize=False, device=self.device)
+        loaded = time.perf_counter()
+
+        # 1回目の推論は初期化を含んで遅いので、白紙の画像で済ませておく
+        analyzer(np.full((640, 480, 3), 255, dtype=np.uint8))
+        warmed = time.perf_counter()
+
+        threads_label = self.threads or "既定"
+        print(f"    yomitokuモデル読み込み: {loaded - start:.1f}秒 / ウォームアップ: {warmed - loaded:.1f}秒"
+              f"（device={self.device}, threads={threads_label}）")
+
+        self._analyzer = analyzer
+        return self._analyzer
+
+    def ocr_pages(self, pdf_path, page_indices, pdf_sha256):
+        """
+        yomitokuを使って指定ページ（0始まり）のテキストを抽出
+
+        ページ単位でキャッシュし、キャッシュにないページだけをOCRする。
+        ページはrender_windowページずつ画像に変換し、プロセス共通のモデルに1ページずつ渡す。
+        """
+        from file_utils import file_sha256
+
+        try:
+            page_indices = list(page_indices)
+            total = len(page_indices)
+
+            if pdf_sha256 is None:
+                pdf_sha256 = file_sha256(pdf_path)
+            keys = {
+                i: self.cache.key(pdf_sha256, i, YOMITOKU_DPI, "yomitoku", self.config())
+                for i in page_indices
+            }
+            page_texts = {i: self.cache.get(keys[i]) for i in page_indices}
+            missing = [i for i in page_indices if page_texts[i] is None]
+            if self.cache.enabled:
+                print(f"    キャッシュ: {total - len(missing)}/{total}ページ")
+
+            elapsed = 0.0
+            if missing:
+                print("    OCR処理中（時間がかかります）...")
+
+                # 問題PDFと解答PDFを別スレッドで処理するので、モデルは1つずつ使う
+                with self._analyzer_lock:
+                    analyzer = self.get_analyzer()
+                    start = time.perf_counter()
+                    done = 0
+                    for b in range(0, len(missing), self.render_window):
+                        window = missing[b:b + self.render_window]
+                        for i, image in zip(window, render_pages(pdf_path, window)):
+                            result, _, _ = analyzer(image)
+                            page_texts[i] = result_to_text(result)
+                            # 1ページごとに保存（途中で落ちてもここまでは再利用できる）
+                            self.cache.put(keys[i], page_texts[i])
+                            done += 1
+                            print(f"      {done}/{len(missing)}ページ完了（p.{i + 1}）")
+                    elapsed = time.perf_counter() - start
+
+            rate = f"、{len(missing) / elapsed:.2f}ページ/秒" if elapsed > 0 else ""
+            print(f"    ✓ yomitokuで{sum(len(t) for t in page_texts.values())}文字を抽出{rate}")
+            return page_texts
+
+        except ImportError:
+            print("    ✗ yomitokuがインストールされていません")
+            print("      pip install yomitoku を実行してください")
+            return None
+        except Exception as e:
+            print(f"    ✗ yomitokuエラー: {e}")
+            return None
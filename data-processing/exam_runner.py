@@ -0,0 +1,76 @@
+"""
+試験ごとの処理を並列実行するための共通処理
+
+exam_parser パッケージ（python -m exam_parser）の main() から使う。
+- 試験（問題PDF+解答PDF）単位でプロセスプールに振り分ける
+- 各試験の中では問題PDFと解答PDFを同時に抽出する
+- 結果は完了順に受け取るが、呼び出し側には exam_pairs と同じ順で返す
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+def default_jobs():
+    """--jobs 0 のときに使う並列数（CPUコア数）"""
+    return os.cpu_count() or 1
+
+def extract_pair(extract_fn, question_pdf, answer_pdf, answer_fn=None):
+    """
+    問題PDFと解答PDFを同時に抽出して (問題テキスト, 解答) を返す
+
+    answer_fnを渡すと解答PDFはそちらで抽出する（解答表専用の抽出処理など）。
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        question_future = executor.submit(extract_fn, question_pdf)
+        answer_future = executor.submit(answer_fn or extract_fn, answer_pdf)
+        return question_future.result(), answer_future.result()
+
+def _run_safely(process_fn, year, season):
+    """1回分を処理する。例外が出てもほかの試験は続けられるようにNoneを返す"""
+    try:
+        return process_fn(year, season)
+    except Exception as e:
+        print(f"  ✗ 処理エラー: {e}")
+        return None
+
+def _run_captured(process_fn, year, season):
+    """ワーカープロセス側: 1回分を処理し、ログをまとめて返す"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        result = _run_safely(process_fn, year, season)
+    return result, buffer.getvalue()
+
+def run_exam_pairs(process_fn, exam_pairs, jobs=1, initializer=None, initargs=()):
+    """
+    exam_pairs の各試験に process_fn(year, season) を適用する
+
+    jobs が1なら従来どおり直列に処理する。2以上ならプロセスプールで並列に処理し、
+    各試験のログは完了した時点でまとめて表示する（個別JSONもワーカー側で書き出される）。
+    initializer(*initargs) は各ワーカープロセス（直列なら自プロセス）で最初に1回呼ばれる。
+    途中の試験で例外が出ても、その試験の結果をNoneにして残りの試験を続ける。
+    戻り値: exam_pairs と同じ順の結果リスト
+    """
+    if jobs <= 1 or len(exam_pairs) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [_run_safely(process_fn, year, season) for year, season in exam_pairs]
+
+    results = [None] * len(exam_pairs)
+    done = 0
+    with ProcessPoolExecutor(max_workers=min(jobs, len(exam_pairs)),
+                             initializer=initializer, initargs=initargs) as executor:
+        futures = {
+            executor.submit(_run_captured, process_fn, year, season): i
+            for i, (year, season) in enumerate(exam_pairs)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            result, log = future.result()
+            results[i] = result
+            done += 1
+            print(log, end="")
+            print(f"  [{done}/{len(exam_pairs)}回完了]")
+
+    return results
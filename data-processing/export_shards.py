@@ -0,0 +1,171 @@
+"""
+アプリの読み込み用に、問題データを試験ごと・分野ごとのgzip圧縮JSONに分けて書き出す
+
+アプリが起動のたびにFirestoreのquestionsを全件読まなくて済むように、静的ホスティングや
+端末のキャッシュに置けるファイルを作る。
+
+  static_export/
+    index.json                          # シャードの一覧（試験・分野ごとの件数・バージョン・パス）
+    exams/R07_秋期.<バージョン>.json.gz   # 1回分の問題（JSONの配列）
+    categories/<分野ID>.<バージョン>.json.gz
+
+- バージョンはシャードの中身（圧縮前のJSON）のハッシュ。変わらなければファイル名も変わらないので、
+  アプリはindex.jsonだけを読み、手元と同じバージョンのシャードは読み直さなくてよい
+- シャードのファイル名にバージョンを含めるので、ホスティング側で長期間キャッシュさせてよい
+  （毎回読み直すのは index.json だけ）
+- gzipは更新日時を入れずに作るので、同じ中身なら同じバイト列になる
+- 問題は1問ずつ読み、各シャードに書き出していく（全問をメモリに載せない）
+
+使い方:
+  python export_shards.py                                   # parsed_questions/all_questions.jsonl から
+  python export_shards.py parsed_questions/all_questions.jsonl --output-dir static_export
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from file_utils import atomic_write
+from question_fields import category_id
+from questions_jsonl import AGGREGATE_NAME, OUTPUT_DIR, iter_questions
+
+EXPORT_DIR = Path("static_export")
+INDEX_NAME = "index.json"
+FORMAT_VERSION = 1
+
+class ShardWriter:
+    """
+    1つのシャードを書き出す（JSONの配列をgzipで圧縮しながら、圧縮前の内容のハッシュを取る）
+
+    close() でバージョン入りのファイル名にリネームし、一覧に載せる情報を返す。
+    """
+
+    def __init__(self, directory, name, meta):
+        self.directory = Path(directory)
+        self.name = name
+        self.meta = meta
+        self.count = 0
+        self.hasher = hashlib.sha256()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.directory / f"{name}.{os.getpid()}.tmp"
+        self._raw = open(self.tmp_path, 'wb')
+        self._gzip = gzip.GzipFile(filename="", mode='wb', fileobj=self._raw, mtime=0)
+        self._write("[")
+
+    def _write(self, text):
+        data = text.encode('utf-8')
+        self.hasher.update(data)
+        self._gzip.write(data)
+
+    def add(self, question):
+        self._write(("," if self.count else "") + json.dumps(question, ensure_ascii=False, separators=(",", ":")))
+        self.count += 1
+
+    def abort(self):
+        """書きかけの一時ファイルを消す"""
+        self._gzip.close()
+        self._raw.close()
+        self.tmp_path.unlink()
+
+    def close(self, root):
+        self._write("]")
+        self._gzip.close()
+        self._raw.close()
+
+        version = self.hasher.hexdigest()[:16]
+        path = self.directory / f"{self.name}.{version}.json.gz"
+        os.replace(self.tmp_path, path)
+        return {
+            **self.meta,
+            "count": self.count,
+            "version": version,
+            "path": path.relative_to(root).as_posix(),
+            "bytes": path.stat().st_size,
+        }
+
+def export_shards(questions, output_dir=EXPORT_DIR):
+    """
+    問題データを試験ごと・分野ごとのシャードに書き出し、index.jsonを作る
+
+    前回のシャードで今回使わなくなったファイルは削除する。
+    戻り値: index.json の内容
+    """
+    output_dir = Path(output_dir)
+    exams, categories = {}, {}
+    total = 0
+    try:
+        for question in questions:
+            exam_id = f"{question['examYear']}_{question['examSeason']}"
+            if exam_id not in exams:
+                exams[exam_id] = ShardWriter(output_dir / "exams", exam_id, {
+                    "id": exam_id, "examYear": question["examYear"], "examSeason": question["examSeason"],
+                })
+            exams[exam_id].add(question)
+
+            category = question.get("category")
+            shard_id = category_id(category)
+            if shard_id not in categories:
+                categories[shard_id] = ShardWriter(output_dir / "categories", shard_id, {
+                    "id": shard_id, "name": category,
+                })
+            categories[shard_id].add(question)
+            total += 1
+    except BaseException:
+        for writer in [*exams.values(), *categories.values()]:
+            writer.abort()
+        raise
+
+    index = {
+        "formatVersion": FORMAT_VERSION,
+        "questionCount": total,
+        # 試験は新しい順、分野はID順（同じ内容なら同じindex.jsonになるように）
+        "exams": [exams[key].close(output_dir) for key in sorted(exams, reverse=True)],
+        "categories": [categories[key].close(output_dir) for key in sorted(categories)],
+    }
+    versions = [shard["version"] for shard in index["exams"] + index["categories"]]
+    index["version"] = hashlib.sha256("".join(versions).encode('utf-8')).hexdigest()[:16]
+
+    # 新しいシャードがすべてそろってからindex.jsonを置き換える
+    # （読み込み中のアプリが古い一覧と新しいシャードを混ぜないように）
+    with atomic_write(output_dir / INDEX_NAME) as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+    # index.jsonが新しい一覧を指してから、どこからも参照されなくなったシャードを削除する
+    # （途中で落ちても、残っているindex.jsonが指すシャードは消えていない）
+    current = {shard["path"] for shard in index["exams"] + index["categories"]}
+    for path in output_dir.glob("*/*.json.gz"):
+        if path.relative_to(output_dir).as_posix() not in current:
+            path.unlink()
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="問題データを試験ごと・分野ごとのgzip圧縮JSONに書き出す")
+    parser.add_argument("input", nargs="?", type=Path, default=OUTPUT_DIR / AGGREGATE_NAME,
+                        help=f"問題データ（.jsonl / .json、既定: {OUTPUT_DIR / AGGREGATE_NAME}）")
+    parser.add_argument("--output-dir", type=Path, default=EXPORT_DIR,
+                        help=f"書き出し先（既定: {EXPORT_DIR}）")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("アプリ用の静的エクスポート")
+    print("=" * 80)
+
+    if not args.input.exists():
+        print(f"\n✗ {args.input} が見つかりません")
+        return
+
+    index = export_shards(iter_questions(args.input), args.output_dir)
+
+    shards = index["exams"] + index["categories"]
+    compressed = sum(shard["bytes"] for shard in shards)
+    print(f"\n✓ {index['questionCount']}問を書き出しました（バージョン {index['version']}）")
+    print(f"  試験: {len(index['exams'])}シャード / 分野: {len(index['categories'])}シャード"
+          f"（合計 {compressed / 1024:.0f}KB）")
+    print(f"  一覧: {args.output_dir / INDEX_NAME}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+ファイルのハッシュと、途中で落ちても壊れない書き込み（各スクリプト共通）
+
+使い方:
+  from file_utils import atomic_write, file_sha256
+  with atomic_write(path) as f:
+      json.dump(data, f)
+"""
+
+import hashlib
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+
+def file_sha256(path):
+    """ファイルのSHA-256を計算"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8', newline=None):
+    """
+    同じフォルダの一時ファイルに書き、問題なく閉じられたらpathにリネームする
+
+    一時ファイルの名前は毎回変えるので、複数のスレッド・プロセスが同じpathに書いてもぶつからない。
+    例外が出たら一時ファイルを消し、前のファイルはそのまま残す。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+    try:
+        if 'b' in mode:
+            f = open(tmp_path, mode)
+        else:
+            f = open(tmp_path, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
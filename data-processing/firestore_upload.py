@@ -0,0 +1,426 @@
+"""
+Firestoreへの一括アップロード（バッチ書き込み + 並列 + バックオフ）
+
+1問ずつ set() すると全問で数千回の往復になり、1回遅いとそこで全体が止まる。
+ここでは問題をbatch_size件（最大500件）ずつのバッチ書き込みにまとめ、
+workers個のバッチを同時に送る。
+
+- RESOURCE_EXHAUSTED / UNAVAILABLE などの一時的なエラーはバックオフして送り直す
+- バックオフの待ち時間はワーカー全体で共有し、混んでいる間は全ワーカーが間隔をあける
+  （成功が続けば少しずつ短くする）
+- 送り直しても失敗したバッチは、問題IDの範囲とエラーを報告に残して次へ進む
+- 問題は1バッチ分ずつ読み込むので、全問をメモリに載せない
+
+差分アップロード:
+  問題ごとに内容のハッシュ（content_hash）を取り、前回アップロードしたときのハッシュ
+  （ローカルのマニフェスト .upload_manifest.json、またはFirestoreから get_all で読んだ内容）と
+  比べて、新しい問題・変わった問題だけを書き込む。手元にない問題（orphan）は削除もできる。
+  試験ごと・分野ごとの集計ドキュメント（question_aggregates.py）も同じように比べ、
+  試験の集計はその試験の問題と同じバッチで書き込む。
+
+環境変数 FIRESTORE_EMULATOR_HOST（例: localhost:8080）があればエミュレータに接続する。
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+from file_utils import atomic_write
+from question_aggregates import CATEGORIES_COLLECTION, EXAMS_COLLECTION, AggregateBuilder
+
+COLLECTION = "questions"
+MAX_BATCH_SIZE = 500  # Firestoreのバッチ書き込みの上限
+DEFAULT_BATCH_SIZE = 400
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_RETRIES = 6
+
+# get_allで1回に読むドキュメント数
+GET_ALL_CHUNK = 300
+
+# 前回アップロードした内容のハッシュ {接続先: {questionId: ハッシュ}}
+MANIFEST_PATH = Path(".upload_manifest.json")
+
+# エミュレータに接続するときのプロジェクトID（GCLOUD_PROJECT がなければこれ）
+EMULATOR_PROJECT = "demo-ap-dojo"
+
+# questions 以外のコレクションへの書き込み（集計ドキュメントなど）。dataがNoneなら削除
+Write = namedtuple("Write", ["collection", "doc_id", "data"])
+
+# questions のドキュメントの一部の項目だけの書き換え（update()。ドキュメントがなければそのバッチは失敗する）
+Update = namedtuple("Update", ["doc_id", "fields"])
+
+def write_key(item):
+    """
+    バッチの1件を表すキー（マニフェストのキーにも使う）
+
+    問題データ・UpdateはquestionId、Writeは "コレクション/ドキュメントID"。
+    """
+    if isinstance(item, Write):
+        return f"{item.collection}/{item.doc_id}"
+    if isinstance(item, Update):
+        return item.doc_id
+    return item["questionId"]
+
+def init_firestore(cred_path="serviceAccountKey.json"):
+    """
+    Firebaseを初期化してFirestoreのクライアントを返す
+
+    FIRESTORE_EMULATOR_HOST があればエミュレータに接続する（サービスアカウントキーは不要）。
+    """
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            project_id = os.environ.get("GCLOUD_PROJECT", EMULATOR_PROJECT)
+            firebase_admin.initialize_app(options={"projectId": project_id})
+        else:
+            firebase_admin.initialize_app(credentials.Certificate(str(Path(cred_path))))
+    return firestore.client()
+
+def is_retryable(error):
+    """送り直せば通る見込みのあるエラーか（混雑・一時的な接続エラー・タイムアウト）"""
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return False
+    return isinstance(error, (exceptions.ResourceExhausted, exceptions.ServiceUnavailable,
+                              exceptions.DeadlineExceeded))
+
+def iter_batches(questions, batch_size):
+    """問題をbatch_size件ずつのリストにして返す（全体は読み込まない）"""
+    iterator = iter(questions)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def pack_groups(groups, batch_size):
+    """
+    グループ（一緒に書き込みたい件のリスト）をbatch_size件までのバッチに詰める
+
+    グループは途中で分けずに1つのバッチに入れる（batch_sizeより大きいグループだけは分ける）。
+    """
+    batch = []
+    for group in groups:
+        if batch and len(batch) + len(group) > batch_size:
+            yield batch
+            batch = []
+        if len(group) > batch_size:
+            yield from iter_batches(group, batch_size)
+        else:
+            batch.extend(group)
+    if batch:
+        yield batch
+
+class AdaptiveBackoff:
+    """
+    ワーカー全体で共有するバックオフ
+
+    一時的なエラーが出るたびに待ち時間を倍にし（上限max_delay）、
+    成功するたびに半分に戻していく。送る前には今の待ち時間だけ待つ。
+    """
+
+    def __init__(self, base_delay=0.5, max_delay=30.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            delay = self.delay
+        if delay > 0:
+            # 全ワーカーが同時に送り直さないように少しずらす
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def on_success(self):
+        with self._lock:
+            self.delay = self.delay / 2 if self.delay >= self.base_delay else 0.0
+
+    def on_throttle(self):
+        with self._lock:
+            self.throttled += 1
+            self.delay = min(self.max_delay, max(self.base_delay, self.delay * 2))
+
+def commit_batch(db, collection, index, questions, backoff, max_retries=DEFAULT_MAX_RETRIES, operation="set"):
+    """
+    1バッチを書き込み（operation="delete" なら削除し）、結果を辞書で返す
+
+    questionsは問題データ（削除ならquestionIdだけの辞書でよい）。Writeを混ぜると、
+    そのコレクションのドキュメントも同じバッチで書き込む（dataがNoneなら削除）。
+    Updateは問題の一部の項目だけを update() で書き換える。
+    一時的なエラーならbackoffで待って最大max_retries回まで送り直す。
+    """
+    keys = [write_key(item) for item in questions]
+    report = {
+        "batch": index,
+        "operation": operation,
+        "count": len(questions),
+        "firstId": keys[0],
+        "lastId": keys[-1],
+        "ids": keys,
+        "attempts": 0,
+        "error": None,
+    }
+    collection_ref = db.collection(collection)
+    while True:
+        backoff.wait()
+        report["attempts"] += 1
+        batch = db.batch()
+        for item in questions:
+            if isinstance(item, Update):
+                batch.update(collection_ref.document(item.doc_id), item.fields)
+                continue
+            if isinstance(item, Write):
+                doc_ref = db.collection(item.collection).document(item.doc_id)
+                data = item.data
+            else:
+                doc_ref = collection_ref.document(item["questionId"])
+                data = None if operation == "delete" else item
+            if data is None:
+                batch.delete(doc_ref)
+            else:
+                batch.set(doc_ref, data)
+        try:
+            batch.commit()
+        except Exception as e:
+            if is_retryable(e) and report["attempts"] <= max_retries:
+                backoff.on_throttle()
+                continue
+            report["error"] = f"{type(e).__name__}: {e}"
+            return report
+        backoff.on_success()
+        return report
+
+def upload_questions(db, questions, collection=COLLECTION, batch_size=DEFAULT_BATCH_SIZE,
+                     workers=DEFAULT_WORKERS, max_retries=DEFAULT_MAX_RETRIES, on_batch=None, operation="set",
+                     grouped=False):
+    """
+    問題データをバッチ書き込みで並列にアップロードする（operation="delete" なら削除する）
+
+    grouped=True ならquestionsはグループ（リスト）の並びで、グループごとに同じバッチに入れる。
+    同時に送るのはworkers個まで、読み込み済みで待っているのも同じ数までにする。
+    on_batch(report) はバッチが終わるたびに呼ばれる（進捗表示用）。
+    戻り値: {"written", "failed", "batches", "retries", "throttled", "elapsed", "errors": [失敗したバッチ]}
+    """
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch_sizeは1〜{MAX_BATCH_SIZE}で指定してください: {batch_size}")
+
+    backoff = AdaptiveBackoff()
+    summary = {"written": 0, "failed": 0, "batches": 0, "retries": 0, "throttled": 0, "elapsed": 0.0, "errors": []}
+
+    def collect(future):
+        report = future.result()
+        summary["batches"] += 1
+        summary["retries"] += report["attempts"] - 1
+        if report["error"]:
+            summary["failed"] += report["count"]
+            summary["errors"].append(report)
+        else:
+            summary["written"] += report["count"]
+        if on_batch is not None:
+            on_batch(report)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = set()
+        batches = pack_groups(questions, batch_size) if grouped else iter_batches(questions, batch_size)
+        for index, batch in enumerate(batches, 1):
+            if len(pending) >= max(1, workers) * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            pending.add(executor.submit(commit_batch, db, collection, index, batch, backoff, max_retries,
+                                        operation))
+        for future in wait(pending).done:
+            collect(future)
+
+    summary["throttled"] = backoff.throttled
+    summary["elapsed"] = time.perf_counter() - start
+    summary["errors"].sort(key=lambda report: report["batch"])
+    return summary
+
+def item_for_key(key):
+    """write_keyのキーから削除用の1件を作る（"コレクション/ID" ならWrite、それ以外はquestionId）"""
+    if "/" in key:
+        aggregate_collection, doc_id = key.split("/", 1)
+        return Write(aggregate_collection, doc_id, None)
+    return {"questionId": key}
+
+def delete_documents(db, keys, collection=COLLECTION, **options):
+    """
+    ドキュメントをバッチで並列に削除する（戻り値はupload_questionsと同じ）
+
+    keysはquestionId、または集計ドキュメントの "コレクション/ID"。
+    """
+    return upload_questions(db, (item_for_key(key) for key in keys),
+                            collection=collection, operation="delete", **options)
+
+# ---------------------------------------------------------------- 差分アップロード
+
+def content_hash(question):
+    """問題データの内容のハッシュ（キーの順番・空白に左右されない）"""
+    canonical = json.dumps(question, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def manifest_target(db, collection):
+    """マニフェストの接続先のキー（本番とエミュレータ、コレクションごとに分ける）"""
+    emulator = os.environ.get("FIRESTORE_EMULATOR_HOST")
+    host = f"emulator:{emulator}" if emulator else getattr(db, "project", "default")
+    return f"{host}/{collection}"
+
+def load_manifest(target, path=MANIFEST_PATH):
+    """前回アップロードした {questionId: ハッシュ}（なければ空）"""
+    if not Path(path).exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get(target, {})
+
+def save_manifest(target, hashes, path=MANIFEST_PATH):
+    """接続先の {questionId: ハッシュ} を書き換える（一時ファイル経由）"""
+    path = Path(path)
+    manifest = {}
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    manifest[target] = dict(sorted(hashes.items()))
+    with atomic_write(path) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+def fetch_remote_hashes(db, keys, collection=COLLECTION):
+    """
+    Firestoreのドキュメントを get_all でまとめて読み、{キー: ハッシュ} を返す（ないものは含めない）
+
+    keysはquestionId、または集計ドキュメントの "コレクション/ID"。
+    """
+    by_collection = {}
+    for key in keys:
+        item = item_for_key(key)
+        if isinstance(item, Write):
+            by_collection.setdefault(item.collection, []).append((key, item.doc_id))
+        else:
+            by_collection.setdefault(collection, []).append((key, key))
+
+    hashes = {}
+    for name, entries in by_collection.items():
+        collection_ref = db.collection(name)
+        for i in range(0, len(entries), GET_ALL_CHUNK):
+            chunk = dict((doc_id, key) for key, doc_id in entries[i:i + GET_ALL_CHUNK])
+            for snapshot in db.get_all([collection_ref.document(doc_id) for doc_id in chunk]):
+                if snapshot.exists:
+                    hashes[chunk[snapshot.id]] = content_hash(snapshot.to_dict())
+    return hashes
+
+def list_remote_ids(db, collection=COLLECTION):
+    """コレクションにあるドキュメントのID（中身は読まない）"""
+    return {doc_ref.id for doc_ref in db.collection(collection).list_documents()}
+
+def aggregate_collections(collection=COLLECTION):
+    """
+    問題のコレクションに対応する集計ドキュメントのコレクション名 (試験, 分野)
+
+    既定の questions ならアプリが読む exams / categories。別のコレクションに書くとき
+    （upload_to_firebase.py --collection）は <コレクション>_exams / <コレクション>_categories にして、
+    アプリが読む集計を別の問題の一覧で上書きしないようにする。
+    """
+    if collection == COLLECTION:
+        return EXAMS_COLLECTION, CATEGORIES_COLLECTION
+    return f"{collection}_{EXAMS_COLLECTION}", f"{collection}_{CATEGORIES_COLLECTION}"
+
+def list_remote_keys(db, collection=COLLECTION):
+    """questions と集計ドキュメントのコレクションにあるドキュメントのキー（中身は読まない）"""
+    keys = set(list_remote_ids(db, collection))
+    for aggregate_collection in aggregate_collections(collection):
+        keys |= {f"{aggregate_collection}/{doc_id}" for doc_id in list_remote_ids(db, aggregate_collection)}
+    return keys
+
+def scan_questions(questions, collection=COLLECTION):
+    """
+    手元の問題データを1回読み、({キー: ハッシュ}, {キー: 集計ドキュメントのWrite}, AggregateBuilder) を返す
+
+    キーはquestionIdと集計ドキュメントの "コレクション/ID"（コレクションは aggregate_collections(collection)）。
+    同じquestionIdが2回出てきたら後のものを使う（1問ずつ set() していたときと同じ結果）。
+    """
+    local = {}
+    builder = AggregateBuilder()
+    for question in questions:
+        digest = content_hash(question)
+        local[question["questionId"]] = digest
+        builder.add(question, digest)
+
+    aggregates = {}
+    for (aggregate_collection, doc_id), doc in builder.documents(aggregate_collections(collection)).items():
+        write = Write(aggregate_collection, doc_id, doc)
+        aggregates[write_key(write)] = write
+        local[write_key(write)] = content_hash(doc)
+    return local, aggregates, builder
+
+def plan_upload(local, remote, delete_orphans=False):
+    """
+    書き込みの計画を作る
+
+    local・remote は {questionId: ハッシュ}。
+    戻り値: {"create": [...], "update": [...], "delete": [...], "unchanged": [...]}（questionIdのリスト）
+    """
+    plan = {"create": [], "update": [], "delete": [], "unchanged": []}
+    for question_id, digest in local.items():
+        if question_id not in remote:
+            plan["create"].append(question_id)
+        elif remote[question_id] != digest:
+            plan["update"].append(question_id)
+        else:
+            plan["unchanged"].append(question_id)
+    if delete_orphans:
+        plan["delete"] = sorted(set(remote) - set(local))
+    return plan
+
+def changed_questions(questions, local, question_ids):
+    """
+    計画で書き込むことになった問題だけを1問ずつ返す
+
+    同じquestionIdが複数あるときは、local（後のものを使ったハッシュ）と同じ内容の1問だけを返す。
+    """
+    question_ids = set(question_ids)
+    for question in questions:
+        question_id = question["questionId"]
+        if question_id in question_ids and content_hash(question) == local[question_id]:
+            question_ids.discard(question_id)
+            yield question
+
+def write_groups(questions, local, keys, aggregates, builder, collection=COLLECTION):
+    """
+    書き込む件をバッチに詰めるグループにして返す（upload_questionsのgrouped=True用）
+
+    1回分の試験の変わった問題と、その試験の集計ドキュメントは同じグループ（同じバッチ）にする。
+    問題が変わっていない試験の集計と、分野の集計は最後にまとめて返す。
+    """
+    exams_collection, _ = aggregate_collections(collection)
+    keys = set(keys)
+    question_keys = {key for key in keys if key not in aggregates}
+    remaining = Counter(builder.questions[key][0] for key in question_keys)
+    pending = {}
+    for question in changed_questions(questions, local, question_keys):
+        exam_id = builder.questions[question["questionId"]][0]
+        pending.setdefault(exam_id, []).append(question)
+        remaining[exam_id] -= 1
+        if remaining[exam_id] == 0:
+            group = pending.pop(exam_id)
+            exam_key = f"{exams_collection}/{exam_id}"
+            if exam_key in keys:
+                group.append(aggregates[exam_key])
+                keys.discard(exam_key)
+            yield group
+
+    rest = [aggregates[key] for key in sorted(keys) if key in aggregates]
+    if rest:
+        yield rest
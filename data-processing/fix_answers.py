@@ -1,73 +1,293 @@
 """
-既存のJSONファイルに解答データを追加
+解答データで問題データの正解（correctAnswer）を直す
+
+複数の試験の解答を読み、正解が変わった問題だけを書き換える。
+- 手元: 試験ごとのJSON（今のファイルの correctAnswer だけを書き換え、手で直したほかの項目は残す）、
+  all_questions.jsonl（試験ごとのJSONからまとめ直す）
+- Firestore: 変わった問題の correctAnswer だけを update() で書き換える（バッチにまとめて並列に送る）
+  その試験・分野の集計ドキュメント（exams / categories）も同じバッチで書き直す
+
+解答は次の順に探す（OCRし直さない）。
+1. --answers-text で渡したテキスト（OCRの結果を貼り付けたもの。間→問 などの誤認識を直して読む）
+2. pipeline.py の extract が書き出した .pipeline/text/<試験>_解答.json
+3. 解答PDF（downloaded_pdfs/<試験>_午前解答.pdf）。OCRの結果は .ocr_cache/ から再利用する
+
+使い方:
+  python fix_answers.py R07_秋期 R07_春期            # 指定した試験
+  python fix_answers.py --all                        # 解答があるすべての試験
+  python fix_answers.py R07_秋期 --answers-text answers.txt
+  python fix_answers.py --all --dry-run              # 変わる問題を表示するだけ（何も書き換えない）
+  python fix_answers.py --all --no-firestore         # 手元だけを直す
 """
 
+import argparse
 import json
-import re
+import os
 from pathlib import Path
+import sys
 
-# R07秋期の解答データ（debug_matching.pyで取得済み）
-ANSWERS_TEXT = """
-問 1      エ     T       問 21     ア     T       問 41     ア     T       問 61     ア     S
-問 2      イ     T       問 22     ウ     T       問 42     ア     T       問 62     エ     S
-問 3      イ     T       問 23     エ     T       問 43     ウ     T       問 63     イ      S
-問 4      ウ     T        問 24     ウ     T        問 44     イ      T        問 64     ウ     S
-間 5      イ     T       問 25     ウ     T       問45 | ア     T       間65 | イ      S
-問 6      イ     T       問 26     イ     T       問 46     エ     T       間 66     ウ     S
-問 7      ア     T       問 27     エ     T       問 47     イ     T       問 67     ウ     S
-問8      エ     T        問 28     ア     T        問 48     イ      T        問 68     イ      S
-問 9      イ     T       問 29     イ     T       問 49     エ     T       間 69     ア     S
-問 10     ア     T       問 30     ウ     T       問 50     エ     T       問 70     イ     S
-"""
+from answer_key import extract_answer_key, parse_answer_text
+from exam_parser.exam import INPUT_DIR, OUTPUT_DIR, exam_pdfs
+from file_utils import atomic_write
+from firestore_upload import (COLLECTION, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, MAX_BATCH_SIZE, Update,
+                              content_hash, init_firestore, load_manifest, manifest_target, save_manifest, scan_questions,
+                              upload_questions)
+from question_aggregates import CATEGORIES_COLLECTION, EXAMS_COLLECTION
+from question_fields import add_query_fields, category_id
+from questions_jsonl import AGGREGATE_NAME, exam_files, iter_questions, merge_exam_files
+
+# pipeline.py の extract が書き出す解答のリスト（[[問番号, 正解, 分野], ...]）
+ANSWERS_CACHE_DIR = Path(".pipeline/text")
+
+CRED_PATH = Path("serviceAccountKey.json")
+
+# --dry-run で表示する変更の数（試験ごと）
+PREVIEW = 10
+
+def answer_exams():
+    """解答PDFか抽出済みの解答がある試験ID（新しい順）"""
+    exam_ids = {path.name[:-len("_午前解答.pdf")] for path in INPUT_DIR.glob("*_午前解答.pdf")}
+    exam_ids |= {path.name[:-len("_解答.json")] for path in ANSWERS_CACHE_DIR.glob("*_解答.json")}
+    return sorted(exam_ids, reverse=True)
+
+def load_answers(exam_id, answers_text=None, cache=None):
+    """
+    1回分の解答を読み、({問番号: 正解}, 読んだ場所) を返す（見つからなければ (None, None)）
+    """
+    if answers_text is not None:
+        answer_key = parse_answer_text(answers_text.read_text(encoding='utf-8'))
+        return {number: answer for number, answer, _ in answer_key}, str(answers_text)
 
-def parse_answers_from_text(text):
-    """テキストから解答を抽出"""
-    # 前処理
-    text = text.replace('間', '問')
-    
-    answers = {}
-    pattern = r'問\s*(\d+)\s+([アイウエ])'
-    matches = re.findall(pattern, text)
-    
-    answer_map = {"ア": "a", "イ": "b", "ウ": "c", "エ": "d"}
-    
-    for q_num, ans in matches:
-        answers[int(q_num)] = answer_map[ans]
-    
-    return answers
-
-def update_json_with_answers(json_file, answers):
-    """JSONファイルに解答を追加"""
+    cached = ANSWERS_CACHE_DIR / f"{exam_id}_解答.json"
+    if cached.exists():
+        with open(cached, 'r', encoding='utf-8') as f:
+            return {number: answer for number, answer, _ in json.load(f)}, str(cached)
+
+    year, season = exam_id.split('_', 1)
+    _, answer_pdf = exam_pdfs(year, season)
+    if answer_pdf.exists():
+        from exam_parser.poppler_tools import poppler_path
+        answer_key = extract_answer_key(answer_pdf, poppler_path=poppler_path(), cache=cache)
+        return {number: answer for number, answer, _ in answer_key}, str(answer_pdf)
+    return None, None
+
+def answer_changes(questions, answers):
+    """
+    {問番号: 'a'〜'd'} を当てたときに正解が変わる問題を返す（同じ問番号の問題はすべて）
+
+    戻り値: [(questionId, 今の正解, 新しい正解)]
+    """
+    changes = []
+    for question in questions:
+        answer = answers.get(question.get("questionNumber"))
+        if answer is not None and question.get("correctAnswer") != answer:
+            changes.append((question["questionId"], question.get("correctAnswer"), answer))
+    return changes
+
+def patch_exam(exam_id, answers, dry_run=False):
+    """
+    1回分の正解を試験ごとのJSONに当て、集計を返す
+
+    今のJSONを読んで correctAnswer だけを書き換えるので、手で直したほかの項目はそのまま残る。
+    dry_run なら何も書き換えない。
+    戻り値: {"exam", "changes": [(questionId, 今の正解, 新しい正解)], "unchanged", "missing"}
+            試験ごとのJSONがなければNone
+    """
+    json_file = OUTPUT_DIR / f"{exam_id}.json"
+    if not json_file.exists():
+        return None
     with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    updated = 0
-    for question in data:
-        q_num = question['questionNumber']
-        if q_num in answers:
-            question['correctAnswer'] = answers[q_num]
-            updated += 1
-    
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    print(f"✓ {updated}問の正解を更新しました")
-
-def main():
-    # 解答を抽出
-    answers = parse_answers_from_text(ANSWERS_TEXT)
-    print(f"抽出した解答数: {len(answers)}")
-    
-    # JSONファイルを更新
-    json_file = Path("parsed_questions/R07_秋期.json")
-    if json_file.exists():
-        update_json_with_answers(json_file, answers)
-        
-        # Firestoreに再アップロード
-        print("\nFirestoreに再アップロードしますか？ (y/n)")
-        # ここでは手動で upload_to_firebase.py を実行
-    else:
-        print(f"✗ {json_file} が見つかりません")
+        questions = json.load(f)
+
+    numbers = [question.get("questionNumber") for question in questions]
+    changes = answer_changes(questions, answers)
+    answered = sum(1 for number in numbers if number in answers)
+    if changes and not dry_run:
+        for question in questions:
+            if question.get("questionNumber") in answers:
+                question["correctAnswer"] = answers[question["questionNumber"]]
+        with atomic_write(json_file) as f:
+            json.dump(questions, f, ensure_ascii=False, indent=2)
+    return {
+        "exam": exam_id,
+        "changes": changes,
+        "unchanged": answered - len(changes),
+        "missing": len(numbers) - answered,
+    }
+
+def print_results(results, dry_run):
+    """試験ごとの 変更 / 変更なし / 解答なし を表示"""
+    print(f"\n{'試験':<12}{'変更':>6}{'変更なし':>8}{'解答なし':>8}  解答")
+    print("-" * 80)
+    for result in results:
+        if result.get("error"):
+            print(f"{result['exam']:<12}{'':>6}{'':>8}{'':>8}  ✗ {result['error']}")
+            continue
+        print(f"{result['exam']:<12}{len(result['changes']):>6}{result['unchanged']:>8}"
+              f"{result['missing']:>8}  {result['source']}")
+        if dry_run:
+            for question_id, current, answer in result["changes"][:PREVIEW]:
+                print(f"    {question_id}: {current} → {answer}")
+            if len(result["changes"]) > PREVIEW:
+                print(f"    ...ほか{len(result['changes']) - PREVIEW}件")
+    print("-" * 80)
+
+def update_firestore(results, args):
+    """
+    正解が変わった問題の correctAnswer だけをFirestoreで書き換える
+
+    1回分の試験の問題と、その試験の集計ドキュメントは同じバッチに入れる。
+    書き換えた分はアップロードのマニフェストにも反映し、次の差分アップロードで書き直さないようにする。
+    戻り値: upload_questions の集計
+    """
+    db = init_firestore(CRED_PATH)
+    target = manifest_target(db, COLLECTION)
+    manifest = load_manifest(target)
+
+    # 直したあとの内容のハッシュと集計ドキュメント（all_questions.jsonl から作る）
+    local, aggregates, builder = scan_questions(map(add_query_fields, iter_questions(OUTPUT_DIR / AGGREGATE_NAME)))
+
+    # 直す前の正解に戻したときのハッシュ（Firestoreの問題が前回アップロードした内容のままか確かめる）
+    previous = {question_id: current for result in results for question_id, current, _ in result["changes"]}
+    before = {}
+    for question in iter_questions(OUTPUT_DIR / AGGREGATE_NAME):
+        if question["questionId"] in previous:
+            before[question["questionId"]] = content_hash(
+                add_query_fields({**question, "correctAnswer": previous[question["questionId"]]}))
+
+    groups = []
+    categories = set()
+    for result in results:
+        if not result.get("changes"):
+            continue
+        # 同じquestionIdが複数あるときは後の正解を使う（アップロードと同じ）
+        answers = {question_id: answer for question_id, _, answer in result["changes"]}
+        group = [Update(question_id, {"correctAnswer": answer}) for question_id, answer in answers.items()]
+        exam_key = f"{EXAMS_COLLECTION}/{result['exam']}"
+        if exam_key in aggregates and manifest.get(exam_key) != local[exam_key]:
+            group.append(aggregates[exam_key])
+        groups.append(group)
+        categories |= {f"{CATEGORIES_COLLECTION}/{category_id(builder.questions[question_id][4])}"
+                       for question_id in answers if question_id in builder.questions}
+    rest = [aggregates[key] for key in sorted(categories)
+            if key in aggregates and manifest.get(key) != local[key]]
+    if rest:
+        groups.append(rest)
+
+    def on_batch(report):
+        if report["error"]:
+            print(f"  ✗ バッチ{report['batch']}（{report['firstId']}〜{report['lastId']}）失敗: {report['error']}")
+            return
+        print(f"  バッチ{report['batch']}: {report['count']}件完了")
+        for key in report["ids"]:
+            # 集計は丸ごと書いたので手元と同じ
+            if "/" in key:
+                manifest[key] = local[key]
+            # 問題は correctAnswer だけを書き換えたので、前回アップロードした内容が直す前の手元と
+            # 同じだったときだけ手元と同じになる。それ以外はマニフェストから消し、次の差分アップロードで書き直させる
+            elif manifest.get(key) == before.get(key):
+                manifest[key] = local[key]
+            else:
+                manifest.pop(key, None)
+
+    try:
+        return upload_questions(db, groups, collection=COLLECTION, batch_size=args.batch_size,
+                                workers=args.workers, on_batch=on_batch, grouped=True)
+    finally:
+        save_manifest(target, manifest)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="解答データで問題データの正解を直す")
+    parser.add_argument("exams", nargs="*", metavar="EXAM", help="直す試験（例: R07_秋期 R07_春期）")
+    parser.add_argument("--all", action="store_true", help="解答PDFか抽出済みの解答があるすべての試験")
+    parser.add_argument("--answers-text", type=Path,
+                        help="OCRの結果などの解答のテキスト（試験を1つだけ指定したとき）")
+    parser.add_argument("--no-firestore", action="store_true", help="手元のデータだけを直す")
+    parser.add_argument("--dry-run", action="store_true", help="変わる問題を表示するだけで書き換えない")
+    parser.add_argument("--no-cache", action="store_true", help="OCRキャッシュを使わない")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"1回のバッチの件数（最大{MAX_BATCH_SIZE}）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="同時に送るバッチ数")
+    args = parser.parse_args(argv)
+    if not args.exams and not args.all:
+        parser.error("試験を指定するか --all を付けてください")
+    if args.answers_text is not None and (args.all or len(args.exams) != 1):
+        parser.error("--answers-text は試験を1つだけ指定したときに使えます")
+    for exam in args.exams:
+        if '_' not in exam:
+            parser.error(f"試験は 年度_期 の形で指定してください: {exam}")
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size は1〜{MAX_BATCH_SIZE}で指定してください")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 80)
+    print("正解の修正")
+    print("=" * 80)
+
+    exam_ids = answer_exams() if args.all else args.exams
+    cache = None
+    if not args.no_cache:
+        from ocr_cache import OCRCache
+        cache = OCRCache()
+
+    results = []
+    for exam_id in exam_ids:
+        try:
+            answers, source = load_answers(exam_id, args.answers_text, cache)
+        except Exception as e:
+            results.append({"exam": exam_id, "error": f"解答を読めません: {e}"})
+            continue
+        if not answers:
+            results.append({"exam": exam_id, "error": "解答が見つかりません"})
+            continue
+        result = patch_exam(exam_id, answers, dry_run=args.dry_run)
+        if result is None:
+            results.append({"exam": exam_id, "error": f"{OUTPUT_DIR / (exam_id + '.json')} が見つかりません"})
+            continue
+        result["source"] = source
+        results.append(result)
+
+    print_results(results, args.dry_run)
+    changed = [result for result in results if result.get("changes")]
+    total = sum(len(result["changes"]) for result in changed)
+    if args.dry_run:
+        print(f"\n⚠ --dry-run のため書き換えません（{len(changed)}試験・{total}問が変わります）")
+        return
+    if not changed:
+        print("\n✓ 正解が変わった問題はありません")
+        return
+
+    # 直した試験ごとのJSONからall_questions.jsonlをまとめ直す
+    count = merge_exam_files(exam_files(OUTPUT_DIR), OUTPUT_DIR / AGGREGATE_NAME)
+    print(f"\n✓ {len(changed)}試験・{total}問の正解を更新しました")
+    print(f"  {OUTPUT_DIR / AGGREGATE_NAME}: {count}問")
+
+    if args.no_firestore:
+        print("\n⚠ --no-firestore のためFirestoreは書き換えません")
+        print("=" * 80)
+        return
+
+    # Firestoreの correctAnswer だけを書き換える
+    if not os.environ.get("FIRESTORE_EMULATOR_HOST") and not CRED_PATH.exists():
+        print(f"\n✗ {CRED_PATH} が見つかりません（--no-firestore で手元だけを直せます）")
+        sys.exit(1)
+    print("\nFirestoreの正解を書き換え中...")
+    try:
+        summary = update_firestore(changed, args)
+    except Exception as e:
+        print(f"  ✗ エラー: {e}")
+        sys.exit(1)
+    print(f"\n✓ Firestore: {summary['written']}件成功 / {summary['failed']}件失敗"
+          f"（{summary['batches']}バッチ、{summary['elapsed']:.1f}秒）")
+    if summary["failed"]:
+        print("  ✗ Firestoreにない問題があるときは、先に upload_to_firebase.py でアップロードしてください")
+    print("=" * 80)
+
+    if summary["failed"]:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,87 @@
+"""
+OCR結果のページ単位キャッシュ
+
+キーは (PDFのSHA-256, ページ番号, dpi, OCRエンジン, エンジン設定) のハッシュ。
+PDFの中身・変換条件・エンジンが同じなら、パーサーの正規表現を変えただけの
+再実行ではOCRを飛ばしてキャッシュのテキストを使う。
+
+- 1ページOCRするごとに書き込む（途中で落ちても、それまでのページは再利用できる）
+- 書き込みは一時ファイル経由のリネームなので、中途半端なファイルは残らない
+- 合計サイズが上限を超えたら、最近使われていないものから削除する
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from file_utils import atomic_write
+
+CACHE_DIR = Path(".ocr_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512MB
+
+class OCRCache:
+    """ページ単位のOCR結果キャッシュ（ディスク上）"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, pdf_sha256, page_index, dpi, engine, config):
+        """キャッシュキーを作成"""
+        raw = "\0".join([pdf_sha256, str(page_index), str(dpi), engine, config])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def get(self, key):
+        """キャッシュされたテキストを返す。なければNone"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            text = path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # 最近使ったものとして更新日時を新しくする（削除の優先度に使う）
+        os.utime(path)
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """テキストを保存"""
+        if not self.enabled or text is None:
+            return
+        with atomic_write(self._path(key)) as f:
+            f.write(text)
+
+    def evict(self):
+        """
+        合計サイズがmax_bytes以下になるまで古いものから削除
+
+        戻り値: (削除件数, 削除したバイト数)
+        """
+        if not self.enabled or not self.cache_dir.exists():
+            return 0, 0
+
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.txt"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        removed = 0
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
@@ -0,0 +1,166 @@
+"""
+PDFの構造マニフェスト（ページごとのテキスト層の文字数・画像の占有率）
+
+PDFごとに1回だけ走査して .pdf_structure/<sha256>.json に保存する。
+パーサーはこれを見てページごとに抽出方法を決める。
+- テキスト層が十分にあるページ → テキスト層をそのまま使う
+- テキスト層がなく画像があるページ → OCR
+- テキストも画像もないページ（白紙） → 何もしない
+
+使い方:
+  python pdf_manifest.py   # downloaded_pdfs/ 以下を走査して一覧を表示・pdf_manifest.jsonに保存
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+
+from file_utils import atomic_write, file_sha256
+
+STRUCTURE_DIR = Path(".pdf_structure")
+INPUT_DIR = Path("downloaded_pdfs")
+MANIFEST_FILE = INPUT_DIR / "pdf_manifest.json"
+
+# テキスト層をそのまま使うのに必要な1ページあたりの文字数
+MIN_TEXT_CHARS = 100
+
+# これ未満の画像占有率のページは、テキストがなければ白紙とみなす
+MIN_IMAGE_COVERAGE = 0.01
+
+# ページの抽出方法
+ROUTE_TEXT = "text"
+ROUTE_OCR = "ocr"
+ROUTE_BLANK = "blank"
+
+def _image_xobjects(page):
+    """ページのリソースから画像XObjectの名前を集める"""
+    resources = page.get('/Resources')
+    if resources is None:
+        return set()
+    xobjects = resources.get_object().get('/XObject')
+    if xobjects is None:
+        return set()
+    xobjects = xobjects.get_object()
+    return {
+        name for name, obj in xobjects.items()
+        if obj.get_object().get('/Subtype') == '/Image'
+    }
+
+def scan_page(page):
+    """
+    1ページを走査して (テキスト層の文字数, 画像の占有率, テキスト) を返す
+
+    画像の占有率は、描画された画像（単位正方形をCTMで変換した面積）の合計をページ面積で割ったもの。
+    """
+    image_names = _image_xobjects(page)
+    image_area = 0.0
+
+    def visitor(operator, operands, cm, tm):
+        nonlocal image_area
+        if operator == b'Do' and operands and operands[0] in image_names:
+            image_area += abs(cm[0] * cm[3] - cm[1] * cm[2])
+
+    text = page.extract_text(visitor_operand_before=visitor) or ""
+    page_area = float(page.mediabox.width) * float(page.mediabox.height)
+    coverage = min(1.0, image_area / page_area) if page_area > 0 else 0.0
+    return len(text.strip()), coverage, text
+
+def scan_pdf(pdf_path):
+    """
+    PDF全体を走査して構造情報を返す
+
+    戻り値: (構造情報, ページごとのテキスト層)
+    """
+    reader = PdfReader(pdf_path)
+    pages = []
+    texts = []
+    for page in reader.pages:
+        try:
+            chars, coverage, text = scan_page(page)
+        except Exception:
+            # 壊れたページはテキスト層なし・全面画像として扱う（OCRに回す）
+            chars, coverage, text = 0, 1.0, ""
+        pages.append({"chars": chars, "image_coverage": round(coverage, 3)})
+        texts.append(text)
+
+    structure = {
+        "name": Path(pdf_path).name,
+        "page_count": len(pages),
+        "pages": pages,
+    }
+    return structure, texts
+
+def load_structure(pdf_path, pdf_sha256=None):
+    """
+    PDFの構造情報を返す（保存済みならそれを使い、なければ走査して保存する）
+
+    戻り値: (構造情報, ページごとのテキスト層。保存済みを使った場合はNone)
+    """
+    if pdf_sha256 is None:
+        pdf_sha256 = file_sha256(pdf_path)
+    path = STRUCTURE_DIR / f"{pdf_sha256}.json"
+
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f), None
+
+    structure, texts = scan_pdf(pdf_path)
+    structure["sha256"] = pdf_sha256
+
+    # 内容のハッシュで名前を付けるので、並列に書き込んでも同じ内容になる
+    with atomic_write(path) as f:
+        json.dump(structure, f, ensure_ascii=False, indent=2)
+
+    return structure, texts
+
+def route_page(page_info):
+    """1ページ分の抽出方法を決める"""
+    if page_info["chars"] >= MIN_TEXT_CHARS:
+        return ROUTE_TEXT
+    if page_info["chars"] == 0 and page_info["image_coverage"] < MIN_IMAGE_COVERAGE:
+        return ROUTE_BLANK
+    return ROUTE_OCR
+
+def route_pages(structure):
+    """ページごとの抽出方法のリストを返す"""
+    return [route_page(page_info) for page_info in structure["pages"]]
+
+def read_text_layer(pdf_path, page_indices):
+    """指定ページのテキスト層を読み出す"""
+    reader = PdfReader(pdf_path)
+    return {i: reader.pages[i].extract_text() or "" for i in page_indices}
+
+def main():
+    pdf_files = sorted(INPUT_DIR.glob("*.pdf")) + sorted(INPUT_DIR.glob("old/*.pdf"))
+    if not pdf_files:
+        print("✗ PDFファイルが見つかりません")
+        sys.exit(1)
+
+    print("=" * 80)
+    print("PDF構造マニフェストの作成")
+    print("=" * 80)
+
+    manifest = {}
+    totals = {ROUTE_TEXT: 0, ROUTE_OCR: 0, ROUTE_BLANK: 0}
+    for pdf_file in pdf_files:
+        structure, _ = load_structure(pdf_file)
+        routes = route_pages(structure)
+        for route in routes:
+            totals[route] += 1
+        manifest[str(pdf_file.relative_to(INPUT_DIR))] = {**structure, "routes": routes}
+        print(f"  {pdf_file.name}: {structure['page_count']}ページ "
+              f"(テキスト{routes.count(ROUTE_TEXT)} / OCR{routes.count(ROUTE_OCR)} / 白紙{routes.count(ROUTE_BLANK)})")
+
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print("=" * 80)
+    print(f"✓ {len(manifest)}ファイルを走査しました")
+    print(f"  テキスト層: {totals[ROUTE_TEXT]}ページ / OCR: {totals[ROUTE_OCR]}ページ / 白紙: {totals[ROUTE_BLANK]}ページ")
+    print(f"  マニフェスト: {MANIFEST_FILE}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+過去問データ作成のパイプライン（download → extract → parse → merge → export → upload）
+
+各段階の入力（ファイルのハッシュ・コード・設定）からフィンガープリントを作り、
+.pipeline/state.json に前回の値を保存しておく。変わった試験・段階だけをやり直す。
+
+- download: 試験ごと。URLが変わったか、PDFがなければ取得する（--check-remote でサーバーの更新も確認）
+- extract : 試験ごと。PDFの中身・エンジンと設定・抽出のコードが変わったらテキストを取り出し直す
+- parse   : 試験ごと。取り出したテキスト・パースのコードが変わったら parsed_questions/<試験>.json を作り直す
+- merge   : 全体。試験ごとのJSONが変わったら all_questions.jsonl を作り直す（パースはし直さない）
+- export  : 全体。all_questions.jsonl が変わったらアプリ用のシャード（static_export/）を作り直す
+- upload  : 全体。all_questions.jsonl が変わったらアップロードする（--to upload のときだけ）
+
+extract・parse は試験ごとに独立しているので、--jobs でプロセスを分けて並列に処理する。
+
+使い方:
+  python pipeline.py                         # 変わったところだけ（exportまで）
+  python pipeline.py --only R07_秋期         # 指定した試験だけ
+  python pipeline.py --from parse            # parse以降を強制的にやり直す
+  python pipeline.py --to upload --jobs 4    # 4並列で処理し、最後にアップロード
+"""
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from exam_parser import BACKENDS, get_backend, release_at_exit
+from exam_parser.exam import (INPUT_DIR, OUTPUT_DIR, build_questions, exam_pdfs, extract_exam,
+                              find_exam_pairs, save_questions)
+from exam_parser.routing import evict_cache
+from exam_runner import default_jobs, run_exam_pairs
+from export_shards import EXPORT_DIR, INDEX_NAME, export_shards
+from file_utils import atomic_write, file_sha256
+from questions_jsonl import AGGREGATE_NAME, iter_questions, merge_exam_files
+
+PIPELINE_DIR = Path(".pipeline")
+STATE_FILE = PIPELINE_DIR / "state.json"
+TEXT_DIR = PIPELINE_DIR / "text"
+ALL_QUESTIONS_FILE = OUTPUT_DIR / AGGREGATE_NAME
+
+STAGES = ["download", "extract", "parse", "merge", "export", "upload"]
+
+# 段階ごとのコード（これが変わったらその段階をやり直す）
+SOURCE_DIR = Path(__file__).resolve().parent
+STAGE_SOURCES = {
+    "extract": [
+        "answer_key.py", "pdf_manifest.py", "exam_runner.py",
+        "exam_parser/registry.py", "exam_parser/routing.py", "exam_parser/poppler_tools.py",
+        "exam_parser/text_layer.py", "exam_parser/pdftotext_layer.py",
+        "exam_parser/tesseract_ocr.py", "exam_parser/tesserocr_ocr.py", "exam_parser/preprocess.py",
+        "exam_parser/yomitoku_ocr.py",
+    ],
+    "parse": ["question_tokenizer.py", "answer_key.py", "exam_parser/exam.py"],
+    "merge": ["pipeline.py", "questions_jsonl.py"],
+    "export": ["export_shards.py", "question_fields.py", "questions_jsonl.py"],
+    "upload": ["upload_to_firebase.py", "firestore_upload.py", "question_fields.py", "question_aggregates.py"],
+}
+
+# ワーカープロセスごとの設定（init_workerで設定）
+_settings = None
+_backend = None
+
+def fingerprint(*parts):
+    """入力の一覧からフィンガープリントを作る"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def source_version(stage):
+    """段階のコードのハッシュ"""
+    hasher = hashlib.sha256()
+    for name in STAGE_SOURCES.get(stage, []):
+        path = SOURCE_DIR / name
+        hasher.update(name.encode('utf-8'))
+        if path.exists():
+            hasher.update(path.read_bytes())
+    return hasher.hexdigest()
+
+def load_state():
+    if STATE_FILE.exists():
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_state(state):
+    """途中で落ちても壊れないように一時ファイル経由で保存"""
+    with atomic_write(STATE_FILE) as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+def write_atomic(path, text):
+    with atomic_write(path) as f:
+        f.write(text)
+
+def text_paths(exam_id):
+    """extractの出力（問題テキスト, 解答のリスト）のパス"""
+    return TEXT_DIR / f"{exam_id}_問題.txt", TEXT_DIR / f"{exam_id}_解答.json"
+
+def exam_urls():
+    """download_ipa_exams.pyの一覧から {試験ID: 試験の情報}"""
+    from download_ipa_exams import EXAM_URLS
+    return {f"{exam['year']}_{exam['season']}": exam for exam in EXAM_URLS}
+
+# ---------------------------------------------------------------- download
+
+def run_download(exam_ids, state, args, forced):
+    """URLが変わった試験・PDFがない試験をダウンロード"""
+    from download_ipa_exams import MANIFEST_NAME, build_tasks, download_all, load_manifest
+
+    exams = exam_urls()
+    stage_state = state.setdefault("download", {})
+    targets = []
+    skipped = 0
+    for exam_id in exam_ids:
+        exam = exams.get(exam_id)
+        if exam is None:
+            continue  # URLの一覧にない試験（手元のPDFだけ）はダウンロードしない
+        fp = fingerprint(exam.get("am_url"), exam.get("am_ans_url"), args.base_url)
+        question_pdf, answer_pdf = exam_pdfs(exam["year"], exam["season"])
+        if (forced or args.check_remote or stage_state.get(exam_id) != fp
+                or not question_pdf.exists() or not answer_pdf.exists()):
+            targets.append((exam_id, exam, fp))
+        else:
+            skipped += 1
+
+    print(f"\n[download] 対象{len(targets)}回 / 変更なし{skipped}回")
+    if not targets:
+        return 0, skipped, 0
+
+    INPUT_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = INPUT_DIR / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    tasks = build_tasks([exam for _, exam, _ in targets], INPUT_DIR, args.base_url)
+    results, _ = download_all(tasks, manifest, manifest_path, jobs=args.download_jobs)
+
+    ok_by_path = {task["path"]: result["ok"] for task, result in zip(tasks, results)}
+    failed = 0
+    for exam_id, exam, fp in targets:
+        if all(ok_by_path.get(path, False) for path in exam_pdfs(exam["year"], exam["season"])):
+            stage_state[exam_id] = fp
+        else:
+            failed += 1
+    save_state(state)
+    return len(targets) - failed, skipped, failed
+
+# ---------------------------------------------------------------- extract / parse（試験ごと）
+
+def init_worker(settings):
+    """ワーカープロセスごとの設定（exam_runnerのinitializerとして呼ばれる）"""
+    global _settings, _backend
+    _settings = settings
+    _backend = None
+    if "extract" in settings["stages"]:
+        _backend = release_at_exit(get_backend(settings["engine"])(settings["args"]))
+
+def _extract(exam_id, year, season, result):
+    question_pdf, answer_pdf = exam_pdfs(year, season)
+    if not question_pdf.exists() or not answer_pdf.exists():
+        print("  ✗ PDFが見つかりません")
+        return False
+
+    text_file, answers_file = text_paths(exam_id)
+    fp = fingerprint(file_sha256(question_pdf), file_sha256(answer_pdf),
+                     _settings["engine"], _backend.config(), _settings["sources"]["extract"])
+    if ("extract" not in _settings["forced"] and _settings["previous"]["extract"].get(exam_id) == fp
+            and text_file.exists() and answers_file.exists()):
+        print("  - extract: 変更なし")
+        result["fingerprints"]["extract"] = fp
+        return True
+
+    extracted = extract_exam(_backend, question_pdf, answer_pdf)
+    if extracted is None:
+        return False
+    question_text, answer_key = extracted
+    write_atomic(text_file, question_text)
+    write_atomic(answers_file, json.dumps(answer_key, ensure_ascii=False))
+    result["fingerprints"]["extract"] = fp
+    result["ran"].append("extract")
+    return True
+
+def _parse(exam_id, year, season, result):
+    text_file, answers_file = text_paths(exam_id)
+    if not text_file.exists() or not answers_file.exists():
+        print("  ✗ 取り出したテキストがありません（extractから実行してください）")
+        return False
+
+    output_file = OUTPUT_DIR / f"{exam_id}.json"
+    fp = fingerprint(file_sha256(text_file), file_sha256(answers_file), _settings["sources"]["parse"])
+    if ("parse" not in _settings["forced"] and _settings["previous"]["parse"].get(exam_id) == fp
+            and output_file.exists()):
+        print("  - parse: 変更なし")
+        result["fingerprints"]["parse"] = fp
+        return True
+
+    question_text = text_file.read_text(encoding='utf-8')
+    with open(answers_file, 'r', encoding='utf-8') as f:
+        answer_key = [tuple(item) for item in json.load(f)]
+    questions = build_questions(question_text, answer_key, year, season)
+    if not questions:
+        print("  ✗ 問題を抽出できませんでした")
+        return False
+    save_questions(questions, year, season)
+    result["fingerprints"]["parse"] = fp
+    result["ran"].append("parse")
+    return True
+
+def run_exam_stages(year, season):
+    """1回分の試験のextract・parseを（必要なものだけ）実行"""
+    exam_id = f"{year}_{season}"
+    print(f"\n【{year} {season}】")
+    result = {"exam": exam_id, "fingerprints": {}, "ran": [], "ok": True}
+    for stage, step in [("extract", _extract), ("parse", _parse)]:
+        if stage not in _settings["stages"]:
+            continue
+        try:
+            ok = step(exam_id, year, season, result)
+        except Exception as e:
+            print(f"  ✗ 処理エラー: {e}")
+            ok = False
+        if not ok:
+            result["ok"] = False
+            result["failed"] = stage
+            break
+    return result
+
+# ---------------------------------------------------------------- merge / upload（全体）
+
+def run_merge(exam_ids, state, forced):
+    """
+    試験ごとのJSONからall_questions.jsonlを作り直す（1回分ずつ読んで書き出す）
+
+    戻り値: "ran" / "skipped" / "failed"
+    """
+    files = [OUTPUT_DIR / f"{exam_id}.json" for exam_id in exam_ids]
+    files = [path for path in files if path.exists()]
+    if not files:
+        print(f"\n[merge] ✗ {OUTPUT_DIR} に試験ごとのJSONがありません")
+        return "failed"
+    fp = fingerprint([(path.name, file_sha256(path)) for path in files], source_version("merge"))
+    if not forced and state.get("merge") == fp and ALL_QUESTIONS_FILE.exists():
+        print("\n[merge] 変更なし")
+        return "skipped"
+
+    count = merge_exam_files(files, ALL_QUESTIONS_FILE)
+    state["merge"] = fp
+    save_state(state)
+    print(f"\n[merge] ✓ {len(files)}回分・{count}問を {ALL_QUESTIONS_FILE} にまとめました")
+    return "ran"
+
+def run_export(state, forced):
+    """
+    all_questions.jsonlからアプリ用のシャードを作り直す
+
+    戻り値: "ran" / "skipped" / "failed"
+    """
+    if not ALL_QUESTIONS_FILE.exists():
+        print(f"\n[export] ✗ {ALL_QUESTIONS_FILE} がありません")
+        return "failed"
+    fp = fingerprint(file_sha256(ALL_QUESTIONS_FILE), source_version("export"))
+    if not forced and state.get("export") == fp and (EXPORT_DIR / INDEX_NAME).exists():
+        print("\n[export] 変更なし")
+        return "skipped"
+
+    index = export_shards(iter_questions(ALL_QUESTIONS_FILE), EXPORT_DIR)
+    state["export"] = fp
+    save_state(state)
+    print(f"\n[export] ✓ {len(index['exams'])}試験・{len(index['categories'])}分野のシャードを"
+          f" {EXPORT_DIR} に書き出しました（バージョン {index['version']}）")
+    return "ran"
+
+def run_upload(state, forced):
+    """
+    all_questions.jsonlかアップロードのコードが変わっていればアップロード
+
+    戻り値: "ran" / "skipped" / "failed"
+    """
+    if not ALL_QUESTIONS_FILE.exists():
+        print(f"\n[upload] ✗ {ALL_QUESTIONS_FILE} がありません")
+        return "failed"
+    fp = fingerprint(file_sha256(ALL_QUESTIONS_FILE), source_version("upload"))
+    if not forced and state.get("upload") == fp:
+        print("\n[upload] 変更なし")
+        return "skipped"
+
+    print(f"\n[upload] {ALL_QUESTIONS_FILE} をアップロード中...")
+    completed = subprocess.run([sys.executable, str(SOURCE_DIR / "upload_to_firebase.py"), str(ALL_QUESTIONS_FILE)])
+    if completed.returncode != 0:
+        print(f"[upload] ✗ アップロードに失敗しました（終了コード {completed.returncode}）")
+        return "failed"
+    state["upload"] = fp
+    save_state(state)
+    return "ran"
+
+# ---------------------------------------------------------------- main
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="過去問データ作成のパイプライン")
+    parser.add_argument("--only", nargs="+", metavar="EXAM",
+                        help="処理する試験（例: R07_秋期 R07_春期）。省略時はすべて")
+    parser.add_argument("--from", dest="from_stage", choices=STAGES,
+                        help="この段階から実行し、この段階以降は変更がなくてもやり直す")
+    parser.add_argument("--to", dest="to_stage", choices=STAGES, default="export",
+                        help="この段階まで実行する（既定はexport。アップロードは --to upload）")
+    parser.add_argument("--force", action="store_true", help="すべての段階をやり直す")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="extract・parseを並列に処理する試験数（0でCPUコア数）")
+    parser.add_argument("--engine", choices=list(BACKENDS), default="tesseract",
+                        help="extractで使うエンジン（既定はtesseract）")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="OCR結果のキャッシュを使わない")
+    parser.add_argument("--check-remote", action="store_true",
+                        help="ダウンロード済みの試験もサーバーの更新を確認する")
+    parser.add_argument("--download-jobs", type=int, default=4, help="同時ダウンロード数")
+    parser.add_argument("--base-url", help="ダウンロード元のホストを差し替える")
+    for cls in BACKENDS.values():
+        cls.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs は0以上で指定してください（0でCPUコア数）")
+    if args.download_jobs < 1:
+        parser.error("--download-jobs は1以上で指定してください")
+    return args
+
+def main(argv=None):
+    """メイン処理"""
+    args = parse_args(argv)
+    args.jobs = args.jobs if args.jobs > 0 else default_jobs()
+
+    start = STAGES.index(args.from_stage) if args.from_stage else 0
+    end = STAGES.index(args.to_stage)
+    if start > end:
+        print(f"✗ --from {args.from_stage} が --to {args.to_stage} より後になっています")
+        sys.exit(1)
+    stages = STAGES[start:end + 1]
+    forced = set(STAGES) if args.force else set(stages if args.from_stage else [])
+
+    print("=" * 80)
+    print("過去問データ作成のパイプライン")
+    print(f"段階: {' → '.join(stages)}")
+    print("=" * 80)
+
+    # 試験の一覧（URLの一覧 + 手元にあるPDF）を新しい順に
+    known = set(exam_urls()) | {f"{year}_{season}" for year, season in find_exam_pairs(INPUT_DIR)}
+    exam_ids = sorted(known, reverse=True)
+    if args.only:
+        unknown = [exam_id for exam_id in args.only if exam_id not in known]
+        if unknown:
+            print(f"✗ 不明な試験: {', '.join(unknown)}")
+            sys.exit(1)
+        exam_ids = [exam_id for exam_id in exam_ids if exam_id in args.only]
+    print(f"\n対象: {len(exam_ids)}回分")
+
+    state = load_state()
+    summary = {}
+
+    if "download" in stages:
+        summary["download"] = run_download(exam_ids, state, args, "download" in forced)
+
+    exam_stages = [stage for stage in ("extract", "parse") if stage in stages]
+    if exam_stages:
+        settings = {
+            "engine": args.engine,
+            "args": args,
+            "stages": exam_stages,
+            "forced": forced,
+            "previous": {stage: state.get(stage, {}) for stage in exam_stages},
+            "sources": {stage: source_version(stage) for stage in exam_stages},
+        }
+        exam_pairs = [tuple(exam_id.split('_', 1)) for exam_id in exam_ids]
+        print(f"\n[{' / '.join(exam_stages)}] {len(exam_pairs)}回分（{args.jobs}並列）")
+        results = run_exam_pairs(run_exam_stages, exam_pairs, args.jobs,
+                                 initializer=init_worker, initargs=(settings,))
+
+        for stage in exam_stages:
+            ran = sum(1 for r in results if stage in r["ran"])
+            skipped = sum(1 for r in results if stage in r["fingerprints"] and stage not in r["ran"])
+            failed = sum(1 for r in results if r.get("failed") == stage)
+            summary[stage] = (ran, skipped, failed)
+        for r in results:
+            for stage, fp in r["fingerprints"].items():
+                state.setdefault(stage, {})[r["exam"]] = fp
+        save_state(state)
+
+        if "extract" in exam_stages and not args.no_cache:
+            # OCRキャッシュが上限を超えていれば古いものから削除（エンジンは作らない）
+            evict_cache()
+
+    # mergeは--onlyに関係なく、すべての試験のJSONからまとめ直す
+    if "merge" in stages:
+        outcome = run_merge(sorted(known, reverse=True), state, "merge" in forced)
+        summary["merge"] = tuple(int(outcome == kind) for kind in ("ran", "skipped", "failed"))
+
+    if "export" in stages:
+        outcome = run_export(state, "export" in forced)
+        summary["export"] = tuple(int(outcome == kind) for kind in ("ran", "skipped", "failed"))
+
+    if "upload" in stages:
+        outcome = run_upload(state, "upload" in forced)
+        summary["upload"] = tuple(int(outcome == kind) for kind in ("ran", "skipped", "failed"))
+
+    print("\n" + "=" * 80)
+    print("✓ パイプライン完了（実行 / 変更なし / 失敗）")
+    for stage in stages:
+        ran, skipped, failed = summary.get(stage, (0, 0, 0))
+        mark = "✗" if failed else "✓"
+        print(f"  {mark} {stage:<9} {ran} / {skipped} / {failed}")
+    print(f"  状態: {STATE_FILE}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+試験ごと・分野ごとの集計ドキュメント
+
+アプリのホーム・一覧画面が questions を全件読まなくても描画できるように、
+Firestoreに次のドキュメントを置く（アップロードのときに問題と同じバッチで更新する）。
+
+  exams/<年度>_<期>      問題ID・正解（解答表）・分野ごとの問題数
+  categories/<分野ID>    問題ID・試験ごとの問題数
+
+どちらも version（含まれる問題の内容のハッシュ）を持つので、アプリは version が
+変わったときだけ問題を読み直せばよい。
+"""
+
+import hashlib
+
+from question_fields import category_id
+
+EXAMS_COLLECTION = "exams"
+CATEGORIES_COLLECTION = "categories"
+
+# 分野が未設定の問題を数えるときの名前
+UNCATEGORIZED_NAME = "未分類"
+
+def _version(digests):
+    """問題の内容のハッシュの一覧から集計のバージョンを作る"""
+    return hashlib.sha256("".join(sorted(digests)).encode('utf-8')).hexdigest()[:16]
+
+class AggregateBuilder:
+    """
+    問題を1問ずつ受け取り、集計ドキュメントを作る
+
+    同じquestionIdが2回出てきたら後のものを使う（アップロードの結果と同じ）。
+    問題データそのものは持たず、集計に使う項目だけを覚える。
+    """
+
+    def __init__(self):
+        self.questions = {}
+
+    def add(self, question, digest):
+        """digestは問題の内容のハッシュ（firestore_upload.content_hash）"""
+        self.questions[question["questionId"]] = (
+            f"{question['examYear']}_{question['examSeason']}",
+            question["examYear"],
+            question["examSeason"],
+            question.get("questionNumber"),
+            question.get("category"),
+            question.get("correctAnswer"),
+            digest,
+        )
+
+    def exams(self):
+        """{試験ID: 試験の集計ドキュメント}"""
+        docs = {}
+        digests = {}
+        members = sorted(self.questions.items(), key=lambda item: (item[1][0], item[1][3] or 0, item[0]))
+        for question_id, (exam_id, year, season, _, category, answer, digest) in members:
+            doc = docs.setdefault(exam_id, {
+                "examId": exam_id,
+                "examYear": year,
+                "examSeason": season,
+                "questionCount": 0,
+                "questionIds": [],
+                "answerKey": {},
+                "categoryCounts": {},
+            })
+            doc["questionCount"] += 1
+            doc["questionIds"].append(question_id)
+            doc["answerKey"][question_id] = answer
+            name = category or UNCATEGORIZED_NAME
+            doc["categoryCounts"][name] = doc["categoryCounts"].get(name, 0) + 1
+            digests.setdefault(exam_id, []).append(digest)
+        for exam_id, doc in docs.items():
+            doc["version"] = _version(digests[exam_id])
+        return docs
+
+    def categories(self):
+        """{分野ID: 分野の集計ドキュメント}"""
+        docs = {}
+        digests = {}
+        members = sorted(self.questions.items(), key=lambda item: (item[1][0], item[1][3] or 0, item[0]))
+        for question_id, (exam_id, _, _, _, category, _, digest) in members:
+            doc_id = category_id(category)
+            doc = docs.setdefault(doc_id, {
+                "categoryId": doc_id,
+                "name": category or UNCATEGORIZED_NAME,
+                "questionCount": 0,
+                "questionIds": [],
+                "examCounts": {},
+            })
+            doc["questionCount"] += 1
+            doc["questionIds"].append(question_id)
+            doc["examCounts"][exam_id] = doc["examCounts"].get(exam_id, 0) + 1
+            digests.setdefault(doc_id, []).append(digest)
+        for doc_id, doc in docs.items():
+            doc["version"] = _version(digests[doc_id])
+        return docs
+
+    def documents(self, collections=(EXAMS_COLLECTION, CATEGORIES_COLLECTION)):
+        """{(コレクション, ドキュメントID): 集計ドキュメント}（collectionsは (試験, 分野) のコレクション名）"""
+        exams_collection, categories_collection = collections
+        docs = {(exams_collection, exam_id): doc for exam_id, doc in self.exams().items()}
+        docs.update({(categories_collection, doc_id): doc for doc_id, doc in self.categories().items()})
+        return docs
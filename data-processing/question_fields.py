@@ -0,0 +1,119 @@
+"""
+Firestoreの検索用に問題データへ加える項目と、その索引の定義（firestore.indexes.json）
+
+アップロードのときに各問題へ次の項目を加える。
+- sortKey      : 試験の実施順 + 問番号の整数（例: R07秋期 問5 → 20252005）。カーソルでのページ送りに使う
+- randomKey    : 0以上1未満の乱数。questionIdのハッシュから作るので、アップロードし直しても変わらない
+                 （where randomKey >= 乱数 / orderBy randomKey / limit n で、1回の読み込みでランダムに出題できる）
+- categoryId / subcategoryId : 分野名を正規化したID（全角・半角や空白の違いで別の分野にならない）
+
+使い方:
+  python question_fields.py                  # リポジトリのルートに firestore.indexes.json を書き出す
+  python question_fields.py --output firestore.indexes.json
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+# 元号の元年の西暦の前年（H21 → 1988 + 21 = 2009年）
+ERA_OFFSETS = {"H": 1988, "R": 2018}
+
+# 同じ年の中の実施順（春期 → 秋期）
+SEASON_ORDER = {"春期": 1, "秋期": 2}
+
+# 分野が未設定の問題のID
+UNCATEGORIZED = "uncategorized"
+
+# よく使う分野は読めるIDにする（それ以外は正規化した名前のハッシュ）
+KNOWN_CATEGORY_IDS = {
+    "テクノロジ系": "technology",
+    "マネジメント系": "management",
+    "ストラテジ系": "strategy",
+}
+
+# firestore.indexes.json の書き出し先（リポジトリのルート）
+INDEXES_PATH = Path(__file__).resolve().parent.parent / "firestore.indexes.json"
+
+def exam_chronology(year, season):
+    """
+    試験の実施順を表す整数（西暦 * 10 + 期の順番）
+
+    例: R07 秋期 → 20252、H21 春期 → 20091。わからない元号・期は0として扱う。
+    """
+    match = re.fullmatch(r"([A-Z])(\d+)", year or "")
+    western = ERA_OFFSETS.get(match.group(1), 0) + int(match.group(2)) if match else 0
+    return western * 10 + SEASON_ORDER.get(season, 0)
+
+def sort_key(question):
+    """試験の実施順 + 問番号（3桁）の整数"""
+    chronology = exam_chronology(question.get("examYear"), question.get("examSeason"))
+    return chronology * 1000 + (question.get("questionNumber") or 0)
+
+def random_key(question_id):
+    """questionIdから作る 0以上1未満の一様な乱数（同じIDなら毎回同じ値）"""
+    digest = hashlib.sha256(question_id.encode('utf-8')).hexdigest()
+    return int(digest[:13], 16) / 16 ** 13
+
+def normalize_category(name):
+    """分野名を正規化（NFKCで全角・半角をそろえ、空白を除く）"""
+    return re.sub(r"\s+", "", unicodedata.normalize("NFKC", name))
+
+def category_id(name):
+    """分野名からIDを作る（未設定ならuncategorized）"""
+    if not name or not normalize_category(name):
+        return UNCATEGORIZED
+    normalized = normalize_category(name)
+    if normalized in KNOWN_CATEGORY_IDS:
+        return KNOWN_CATEGORY_IDS[normalized]
+    return "c-" + hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:10]
+
+def add_query_fields(question):
+    """問題データに検索用の項目を加えたコピーを返す"""
+    return {
+        **question,
+        "sortKey": sort_key(question),
+        "randomKey": random_key(question["questionId"]),
+        "categoryId": category_id(question.get("category")),
+        "subcategoryId": category_id(question.get("subcategory")),
+    }
+
+def build_indexes(collection="questions"):
+    """アプリの検索に必要な複合索引（単一項目の索引はFirestoreが自動で作る）"""
+    def index(*fields):
+        return {
+            "collectionGroup": collection,
+            "queryScope": "COLLECTION",
+            "fields": [{"fieldPath": field, "order": "ASCENDING"} for field in fields],
+        }
+    return {
+        "indexes": [
+            # 分野ごとのページ送り・ランダム出題
+            index("categoryId", "sortKey"),
+            index("categoryId", "randomKey"),
+            index("subcategoryId", "sortKey"),
+            index("subcategoryId", "randomKey"),
+            # 1回分の試験を問番号の順に
+            index("examYear", "examSeason", "questionNumber"),
+        ],
+        "fieldOverrides": [],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="firestore.indexes.json を書き出す")
+    parser.add_argument("--output", type=Path, default=INDEXES_PATH,
+                        help=f"書き出し先（既定: {INDEXES_PATH}）")
+    args = parser.parse_args(argv)
+
+    indexes = build_indexes()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(indexes, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"✓ {len(indexes['indexes'])}件の複合索引を {args.output} に書き出しました")
+    print("  firebase deploy --only firestore:indexes で反映してください")
+
+if __name__ == "__main__":
+    main()
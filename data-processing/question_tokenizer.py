@@ -0,0 +1,80 @@
+"""
+午前問題のテキストを問題・問題文・選択肢に分ける（1パス）
+
+以前は re.split で全体を分割したあと、1問ごとに選択肢ア〜エを別々の
+DOTALLパターン（.+? と先読み）で探し、さらに問題文のために「ア」を探し直していた。
+ここでは「問N」「選択肢の記号（ア〜エ＋空白）」「空行」をまとめた1つのパターンで
+テキストを先頭から1回だけ走査し、状態（次に期待する記号）を見ながら区切り位置を決める。
+
+- 選択肢の記号は ア→イ→ウ→エ の順に現れたものだけを使う
+  （問題文中の「イ」や、選択肢の中の単語に含まれる「イ」では区切らない）
+- 問題文は選択肢アの記号の前まで
+- 選択肢エは空行または次の問の前まで
+
+使い方:
+  from question_tokenizer import tokenize_questions
+  for number, stem, choices in tokenize_questions(text):
+      ...
+"""
+
+import re
+
+CHOICE_MARKERS = "アイウエ"
+
+# 問N / 選択肢の記号 / 空行 のいずれか（どれも先頭の文字が決まっているので速い）
+TOKEN_PATTERN = re.compile(r'問\s*(\d+)\s+|([アイウエ])[\s　]+|\n\n')
+
+def normalize_space(text):
+    """前後の空白を除き、連続する空白・改行を1つの空白にする"""
+    return ' '.join(text.split())
+
+def _build_question(number, text, body_start, body_end, marks):
+    """
+    区切り位置から (問番号, 問題文, 選択肢リスト) を作る
+
+    marks: 見つかった選択肢ごとの (本文の開始位置, 記号の開始位置)
+    """
+    if not marks:
+        return number, normalize_space(text[body_start:body_end]), []
+
+    stem = normalize_space(text[body_start:marks[0][1]])
+    choices = []
+    for i, (start, _) in enumerate(marks):
+        end = marks[i + 1][1] if i + 1 < len(marks) else body_end
+        choices.append(normalize_space(text[start:end]))
+    return number, stem, choices
+
+def tokenize_questions(text):
+    """
+    テキストを1回走査して (問番号の文字列, 問題文, 選択肢リスト) を順に返す
+
+    選択肢が4つそろわなかった問も返す（呼び出し側で件数を見て判断する）。
+    """
+    number = None
+    body_start = 0
+    marks = []
+    last_end = None  # 選択肢エが空行で終わった位置
+
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastindex  # 1: 問N、2: 選択肢の記号、None: 空行
+
+        if kind == 1:
+            if number is not None:
+                end = last_end if last_end is not None else match.start()
+                yield _build_question(number, text, body_start, end, marks)
+            number = match.group(1)
+            body_start = match.end()
+            marks = []
+            last_end = None
+        elif number is None or last_end is not None:
+            continue
+        elif kind == 2:
+            if len(marks) < len(CHOICE_MARKERS) and match.group(2) == CHOICE_MARKERS[len(marks)]:
+                marks.append((match.end(), match.start()))
+        elif len(marks) == len(CHOICE_MARKERS):
+            # 選択肢エのあとの空行
+            last_end = match.start()
+
+    if number is not None:
+        end = last_end if last_end is not None else len(text)
+        yield _build_question(number, text, body_start, end, marks)
@@ -0,0 +1,101 @@
+"""
+問題データのJSON Lines（1行に1問）の読み書き
+
+all_questions は試験ごとのJSON（parsed_questions/<年度>_<期>.json）から作り直す。
+1回分ずつ読んで1行ずつ書き出すので、試験の数が増えてもメモリは1回分で済む。
+読むときも1行ずつ返すので、アップロードなどで全問をメモリに載せる必要はない。
+
+使い方:
+  python questions_jsonl.py                      # parsed_questions/all_questions.jsonl を作り直す
+  python questions_jsonl.py --output-dir outputs
+"""
+
+import argparse
+import json
+import re
+from pathlib import Path
+
+from file_utils import atomic_write
+
+OUTPUT_DIR = Path("parsed_questions")
+AGGREGATE_NAME = "all_questions.jsonl"
+
+# 試験ごとのJSONの名前（<年度>_<期>.json。例: R07_秋期.json、H21_春期.json）
+EXAM_FILE_PATTERN = re.compile(r"[A-Z]\d{2}_[^_]+")
+
+def write_jsonl(path, questions):
+    """
+    問題データをJSON Linesで書き出し、書いた問題数を返す
+
+    一時ファイルに書いてからリネームするので、途中で落ちても前のファイルは壊れない。
+    """
+    count = 0
+    with atomic_write(path, newline='\n') as f:
+        for question in questions:
+            f.write(json.dumps(question, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def iter_jsonl(path):
+    """JSON Linesのファイルから1問ずつ返す（空行は飛ばす）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}の{line_number}行目が読めません: {e}") from None
+
+def iter_questions(path):
+    """
+    問題データのファイルから1問ずつ返す
+
+    .jsonl は1行ずつ読む。.json（問題の配列）は従来の形式なので全体を読み込んでから返す。
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        yield from iter_jsonl(path)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from json.load(f)
+
+def exam_files(output_dir=OUTPUT_DIR):
+    """
+    試験ごとのJSONを新しい順に返す
+
+    同じフォルダの all_questions.* や engine_report.json（--engine auto の計測結果）は含めない。
+    """
+    return sorted(
+        (path for path in Path(output_dir).glob("*_*.json") if EXAM_FILE_PATTERN.fullmatch(path.stem)),
+        reverse=True,
+    )
+
+def merge_exam_files(files, output_path):
+    """
+    試験ごとのJSONを1回分ずつ読み、output_pathにJSON Linesでまとめる
+
+    パースし直さずに作り直せる。戻り値: まとめた問題数
+    """
+    def questions():
+        for path in files:
+            yield from iter_questions(path)
+    return write_jsonl(output_path, questions())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="試験ごとのJSONからall_questions.jsonlを作り直す")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR,
+                        help=f"試験ごとのJSONがあるフォルダ（既定: {OUTPUT_DIR}）")
+    args = parser.parse_args(argv)
+
+    files = exam_files(args.output_dir)
+    if not files:
+        print(f"✗ {args.output_dir} に試験ごとのJSONがありません")
+        return
+
+    output_path = args.output_dir / AGGREGATE_NAME
+    count = merge_exam_files(files, output_path)
+    print(f"✓ {len(files)}回分・{count}問を {output_path} にまとめました")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+テストの共通設定
+
+data-processing/ のスクリプトはモジュールとしてそのまま読み込む（python -m pytest tests）。
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,121 @@
+"""
+テスト用のFirestoreのクライアント（メモリ上。firebase-adminもエミュレータも使わない）
+
+firestore_upload・upload_to_firebase・clear_firestore が使う分だけを実装する。
+- collection / document / batch（set・update・delete・commit）/ get_all / list_documents
+- where("項目", "==", 値) / select / stream
+コミットしたバッチの中身は commits に残る。failures に例外を入れておくと、次のコミットでそれを投げる。
+"""
+
+import threading
+
+class NotFound(Exception):
+    """update() するドキュメントがない"""
+
+class FakeDocument:
+    def __init__(self, collection, doc_id):
+        self.collection = collection
+        self.id = doc_id
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeQuery:
+    def __init__(self, db, name, conditions=()):
+        self.db = db
+        self.name = name
+        self.conditions = conditions
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return FakeQuery(self.db, self.name, self.conditions + ((field, value),))
+
+    def select(self, fields):
+        return self
+
+    def stream(self):
+        docs = self.db.data.get(self.name, {})
+        return [FakeSnapshot(doc_id, data) for doc_id, data in sorted(docs.items())
+                if all(data.get(field) == value for field, value in self.conditions)]
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id):
+        return FakeDocument(self.name, doc_id)
+
+    def list_documents(self):
+        return [FakeDocument(self.name, doc_id) for doc_id in sorted(self.db.data.get(self.name, {}))]
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+
+    def set(self, doc_ref, data):
+        self.ops.append(("set", doc_ref, dict(data)))
+
+    def update(self, doc_ref, fields):
+        self.ops.append(("update", doc_ref, dict(fields)))
+
+    def delete(self, doc_ref):
+        self.ops.append(("delete", doc_ref, None))
+
+    def commit(self):
+        with self.db.lock:
+            if self.db.failures:
+                raise self.db.failures.pop(0)
+            # 1件でも失敗したらバッチ全体を書き込まない
+            data = {name: dict(docs) for name, docs in self.db.data.items()}
+            for op, doc_ref, fields in self.ops:
+                docs = data.setdefault(doc_ref.collection, {})
+                if op == "set":
+                    docs[doc_ref.id] = fields
+                elif op == "update":
+                    if doc_ref.id not in docs:
+                        raise NotFound(f"{doc_ref.collection}/{doc_ref.id}")
+                    docs[doc_ref.id] = {**docs[doc_ref.id], **fields}
+                else:
+                    docs.pop(doc_ref.id, None)
+            self.db.data = data
+            self.db.commits.append([(op, f"{doc_ref.collection}/{doc_ref.id}") for op, doc_ref, _ in self.ops])
+
+class FakeFirestore:
+    project = "fake-project"
+
+    def __init__(self):
+        self.data = {}  # {コレクション: {ドキュメントID: 内容}}
+        self.commits = []
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, doc_refs):
+        return [FakeSnapshot(doc_ref.id, self.data.get(doc_ref.collection, {}).get(doc_ref.id))
+                for doc_ref in doc_refs]
+
+    def written(self):
+        """コミットされた書き込み・削除のキー（"コレクション/ID"）の一覧"""
+        return [key for commit in self.commits for _, key in commit]
+
+def make_question(year, season, number, answer="a", category="テクノロジ系"):
+    """テスト用の問題データ"""
+    return {
+        "questionId": f"{year}_{season}_{number:03d}",
+        "examYear": year,
+        "examSeason": season,
+        "questionNumber": number,
+        "questionText": f"{year} {season} 問{number}",
+        "choices": {"a": "ア", "b": "イ", "c": "ウ", "d": "エ"},
+        "correctAnswer": answer,
+        "category": category,
+    }
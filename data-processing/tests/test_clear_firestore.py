@@ -0,0 +1,69 @@
+"""
+clear_firestore の範囲を絞った削除のテスト（メモリ上のFirestoreに対して main() を実行する）
+"""
+
+import pytest
+
+import clear_firestore
+from fake_firestore import FakeFirestore, make_question
+from firestore_upload import load_manifest, manifest_target, save_manifest, scan_questions, upload_questions
+from question_fields import add_query_fields
+
+QUESTIONS = [make_question("R07", season, number) for season in ("秋期", "春期") for number in (1, 2, 3)]
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """2回分の問題と集計ドキュメントをアップロード済みのFirestore（マニフェストも作っておく）"""
+    db = FakeFirestore()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(clear_firestore, "init_firestore", lambda: db)
+    questions = list(map(add_query_fields, QUESTIONS))
+    local, aggregates, _ = scan_questions(questions)
+    upload_questions(db, [*questions, *aggregates.values()])
+    save_manifest(manifest_target(db, "questions"), local)
+    db.commits = []
+    return db
+
+def test_clear_exam(db):
+    clear_firestore.main(["--exam", "R07_春期", "--yes"])
+
+    assert sorted(db.data["questions"]) == ["R07_秋期_001", "R07_秋期_002", "R07_秋期_003"]
+    assert sorted(db.data["exams"]) == ["R07_秋期"]
+    # 分野の集計は残った問題から作り直す
+    assert db.data["categories"]["technology"]["questionIds"] == ["R07_秋期_001", "R07_秋期_002", "R07_秋期_003"]
+    manifest = load_manifest(manifest_target(db, "questions"))
+    assert "R07_春期_001" not in manifest
+    assert "exams/R07_春期" not in manifest
+    assert "categories/technology" not in manifest
+    assert "R07_秋期_001" in manifest
+
+def test_clear_prefix(db):
+    clear_firestore.main(["--prefix", "R07_秋期_00", "--yes"])
+
+    assert sorted(db.data["questions"]) == ["R07_春期_001", "R07_春期_002", "R07_春期_003"]
+    assert sorted(db.data["exams"]) == ["R07_春期"]
+
+def test_clear_everything(db):
+    clear_firestore.main(["--yes"])
+
+    assert db.data["questions"] == {}
+    assert db.data["exams"] == {}
+    assert db.data["categories"] == {}
+
+def test_dry_run(db):
+    clear_firestore.main(["--exam", "R07_春期", "--dry-run"])
+    assert db.commits == []
+
+def test_exit_code_on_failed_batch(db):
+    db.failures = [ValueError("permission denied")]
+    with pytest.raises(SystemExit) as exited:
+        clear_firestore.main(["--exam", "R07_春期", "--yes"])
+    assert exited.value.code == 1
+
+def test_exit_code_on_error(db, monkeypatch):
+    def fail():
+        raise RuntimeError("could not connect")
+    monkeypatch.setattr(clear_firestore, "init_firestore", fail)
+    with pytest.raises(SystemExit) as exited:
+        clear_firestore.main(["--yes"])
+    assert exited.value.code == 1
@@ -0,0 +1,177 @@
+"""
+download_ipa_exams のテスト（ローカルのHTTPサーバーから取得する）
+
+サーバーは ETag / If-None-Match / Range / If-Range に対応し、指定した回数だけ503を返せる。
+"""
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from download_ipa_exams import (HostRateLimiter, create_session, download_all, download_file,
+                                load_manifest, parse_args)
+
+PATH = "/exam/2025r07a_ap_am_qs.pdf"
+CONTENT = b"%PDF-1.4\n" + bytes(range(256)) * 64
+
+class FakeServer:
+    """1つのファイルを配るHTTPサーバー（contentを差し替えるとETagも変わる）"""
+
+    def __init__(self, content=CONTENT):
+        self.content = content
+        self.failures = 0  # 残りの503の回数
+        self.requests = []  # 受け取ったリクエストのヘッダー
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def etag(self):
+        return f'"{hashlib.sha256(self.content).hexdigest()[:16]}"'
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{PATH}"
+
+    def handle(self, request):
+        if self.failures:
+            self.failures -= 1
+            self.reply(request, 503, b"busy")
+            return
+        headers = request.headers
+        if headers.get("If-None-Match") == self.etag:
+            self.reply(request, 304, b"")
+            return
+        range_header = headers.get("Range")
+        if range_header and headers.get("If-Range", self.etag) == self.etag:
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if start >= len(self.content):
+                self.reply(request, 416, b"", {"Content-Range": f"bytes */{len(self.content)}"})
+                return
+            self.reply(request, 206, self.content[start:],
+                       {"Content-Range": f"bytes {start}-{len(self.content) - 1}/{len(self.content)}"})
+            return
+        self.reply(request, 200, self.content)
+
+    def reply(self, request, status, body, headers=None):
+        request.send_response(status)
+        request.send_header("ETag", self.etag)
+        request.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+@pytest.fixture
+def server():
+    server = FakeServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+def fetch(server, path, entry=None, retries=0):
+    with create_session(1) as session:
+        return download_file(session, server.url, path, HostRateLimiter(1000, 1000), entry,
+                             retries=retries, backoff=0)
+
+def write_part(path, data, validator):
+    path.with_name(path.name + ".part").write_bytes(data)
+    if validator is not None:
+        path.with_name(path.name + ".part.validator").write_text(validator, encoding='utf-8')
+
+def test_download_then_not_modified(server, tmp_path):
+    path = tmp_path / "R07_秋期_午前問題.pdf"
+    manifest_path = tmp_path / "manifest.json"
+    tasks = [{"label": "R07 秋期 午前問題", "url": server.url, "path": path}]
+
+    results, _ = download_all(tasks, {}, manifest_path, jobs=1, rate=1000, burst=1000, backoff=0)
+    assert results[0]["status"] == "downloaded"
+    assert results[0]["changed"]
+    assert path.read_bytes() == CONTENT
+    entry = load_manifest(manifest_path)[server.url]
+    assert entry["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert entry["etag"] == server.etag
+
+    results, _ = download_all(tasks, load_manifest(manifest_path), manifest_path,
+                              jobs=1, rate=1000, burst=1000, backoff=0)
+    assert results[0]["status"] == "not_modified"
+    assert results[0]["bytes"] == 0
+    assert not results[0]["changed"]
+    assert server.requests[-1]["If-None-Match"] == server.etag
+
+def test_retry_on_5xx(server, tmp_path):
+    path = tmp_path / "a.pdf"
+    server.failures = 2
+    result = fetch(server, path, retries=2)
+    assert result["ok"]
+    assert result["attempts"] == 3
+    assert path.read_bytes() == CONTENT
+
+def test_give_up_after_retries(server, tmp_path):
+    path = tmp_path / "a.pdf"
+    server.failures = 2
+    result = fetch(server, path, retries=1)
+    assert not result["ok"]
+    assert result["attempts"] == 2
+    assert result["error"] == "HTTPエラー (503)"
+    assert not path.exists()
+
+def test_resume_part_file(server, tmp_path):
+    path = tmp_path / "a.pdf"
+    write_part(path, CONTENT[:1000], server.etag)
+
+    result = fetch(server, path)
+    assert result["status"] == "resumed"
+    assert result["bytes"] == len(CONTENT) - 1000
+    assert result["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert path.read_bytes() == CONTENT
+    assert server.requests[-1]["Range"] == "bytes=1000-"
+    assert server.requests[-1]["If-Range"] == server.etag
+    assert not path.with_name("a.pdf.part").exists()
+    assert not path.with_name("a.pdf.part.validator").exists()
+
+def test_resume_after_server_file_changed(server, tmp_path):
+    path = tmp_path / "a.pdf"
+    old_etag = server.etag
+    server.content = CONTENT[::-1]
+    write_part(path, CONTENT[:1000], old_etag)
+
+    result = fetch(server, path)
+    assert result["status"] == "downloaded"
+    assert path.read_bytes() == server.content
+
+def test_part_file_without_validator_restarts(server, tmp_path):
+    path = tmp_path / "a.pdf"
+    write_part(path, b"garbage", None)
+
+    result = fetch(server, path)
+    assert result["status"] == "downloaded"
+    assert "Range" not in server.requests[-1]
+    assert path.read_bytes() == CONTENT
+
+def test_416_restarts_from_zero(server, tmp_path):
+    path = tmp_path / "a.pdf"
+    write_part(path, CONTENT + b"extra", server.etag)
+
+    result = fetch(server, path)
+    assert result["ok"]
+    assert result["status"] == "downloaded"
+    assert path.read_bytes() == CONTENT
+    assert [request.get("Range") for request in server.requests] == [f"bytes={len(CONTENT) + 5}-", None]
+
+def test_retries_argument():
+    assert parse_args(["--retries", "0"]).retries == 0
+    with pytest.raises(SystemExit):
+        parse_args(["--retries", "-1"])
@@ -0,0 +1,22 @@
+"""
+エンジンごとの引数をまとめたコマンドラインのテスト（エンジン同士で引数がぶつからないこと）
+"""
+
+import pytest
+
+import pipeline
+from exam_parser import get_backend
+from exam_parser.cli import build_parser
+
+def test_build_parser():
+    args = build_parser().parse_args(["--engine", "tesserocr", "--ocr-workers", "3"])
+    assert get_backend("tesserocr")(args).ocr_workers == 3
+
+def test_pipeline_arguments():
+    args = pipeline.parse_args(["--engine", "tesseract", "--ocr-workers", "2"])
+    assert args.ocr_workers == 2
+
+@pytest.mark.parametrize("option", [["--download-jobs", "0"], ["--download-jobs", "-2"], ["--jobs", "-1"]])
+def test_pipeline_rejects_job_counts(option):
+    with pytest.raises(SystemExit):
+        pipeline.parse_args(option)
@@ -0,0 +1,90 @@
+"""
+firestore_upload のテスト（バッチ書き込み・並列・バックオフ）
+"""
+
+import pytest
+
+import firestore_upload
+from fake_firestore import FakeFirestore, make_question
+from firestore_upload import AdaptiveBackoff, delete_documents, iter_batches, upload_questions
+
+class Throttled(Exception):
+    """RESOURCE_EXHAUSTED の代わり"""
+
+@pytest.fixture
+def throttling(monkeypatch):
+    """Throttled を一時的なエラーとして扱う（google-api-core がなくても送り直しを試せるように）"""
+    monkeypatch.setattr(firestore_upload, "is_retryable", lambda error: isinstance(error, Throttled))
+
+def questions(count):
+    return [make_question("R07", "秋期", number) for number in range(1, count + 1)]
+
+def test_iter_batches():
+    assert [len(batch) for batch in iter_batches(range(1001), 400)] == [400, 400, 201]
+
+def test_adaptive_backoff():
+    backoff = AdaptiveBackoff(base_delay=0.5, max_delay=3.0)
+    for expected in [0.5, 1.0, 2.0, 3.0, 3.0]:
+        backoff.on_throttle()
+        assert backoff.delay == expected
+    assert backoff.throttled == 5
+    for expected in [1.5, 0.75, 0.375, 0.0]:
+        backoff.on_success()
+        assert backoff.delay == expected
+
+def test_upload_in_batches():
+    db = FakeFirestore()
+    reports = []
+    summary = upload_questions(db, questions(80), batch_size=25, workers=4, on_batch=reports.append)
+
+    assert summary["written"] == 80
+    assert summary["failed"] == 0
+    assert summary["batches"] == 4
+    assert sorted(len(commit) for commit in db.commits) == [5, 25, 25, 25]
+    assert sorted(report["batch"] for report in reports) == [1, 2, 3, 4]
+    assert len(db.data["questions"]) == 80
+
+def test_retry_throttled_batch(throttling):
+    db = FakeFirestore()
+    db.failures = [Throttled("429 RESOURCE_EXHAUSTED")]
+    summary = upload_questions(db, questions(10), batch_size=10, workers=1)
+
+    assert summary["written"] == 10
+    assert summary["retries"] == 1
+    assert summary["throttled"] == 1
+    assert len(db.data["questions"]) == 10
+
+def test_report_failed_batch(throttling):
+    db = FakeFirestore()
+    db.failures = [ValueError("invalid argument")]
+    summary = upload_questions(db, questions(30), batch_size=10, workers=1)
+
+    assert summary["written"] == 20
+    assert summary["failed"] == 10
+    [report] = summary["errors"]
+    assert report["batch"] == 1
+    assert (report["firstId"], report["lastId"]) == ("R07_秋期_001", "R07_秋期_010")
+    assert report["error"] == "ValueError: invalid argument"
+
+def test_give_up_after_max_retries(throttling):
+    db = FakeFirestore()
+    db.failures = [Throttled("503 UNAVAILABLE")] * 2
+    summary = upload_questions(db, questions(5), batch_size=5, workers=1, max_retries=1)
+
+    assert summary["failed"] == 5
+    assert summary["errors"][0]["attempts"] == 2
+    assert "questions" not in db.data
+
+def test_delete_documents():
+    db = FakeFirestore()
+    upload_questions(db, questions(12), batch_size=5)
+    summary = delete_documents(db, ["R07_秋期_001", "R07_秋期_002", "exams/R07_秋期"], batch_size=5)
+
+    assert summary["written"] == 3
+    assert sorted(db.data["questions"]) == [f"R07_秋期_{number:03d}" for number in range(3, 13)]
+    assert db.commits[-1] == [("delete", "questions/R07_秋期_001"), ("delete", "questions/R07_秋期_002"),
+                              ("delete", "exams/R07_秋期")]
+
+def test_batch_size_limit():
+    with pytest.raises(ValueError):
+        upload_questions(FakeFirestore(), questions(1), batch_size=501)
@@ -0,0 +1,70 @@
+"""
+集計ドキュメント（question_aggregates）と、問題と同じバッチに詰める処理（firestore_upload）のテスト
+"""
+
+from fake_firestore import FakeFirestore, make_question
+from firestore_upload import (Write, aggregate_collections, content_hash, pack_groups, scan_questions,
+                              upload_questions, write_groups)
+from question_aggregates import AggregateBuilder
+
+def build(questions):
+    builder = AggregateBuilder()
+    for question in questions:
+        builder.add(question, content_hash(question))
+    return builder
+
+def test_exam_and_category_documents():
+    questions = [
+        make_question("R07", "秋期", 2, answer="b"),
+        make_question("R07", "秋期", 1, answer="a", category="ストラテジ系"),
+        make_question("R07", "春期", 1, answer="c"),
+    ]
+    builder = build(questions)
+
+    exam = builder.exams()["R07_秋期"]
+    assert exam["questionIds"] == ["R07_秋期_001", "R07_秋期_002"]
+    assert exam["answerKey"] == {"R07_秋期_001": "a", "R07_秋期_002": "b"}
+    assert exam["categoryCounts"] == {"ストラテジ系": 1, "テクノロジ系": 1}
+    assert exam["questionCount"] == 2
+
+    category = builder.categories()["technology"]
+    assert category["questionIds"] == ["R07_春期_001", "R07_秋期_002"]
+    assert category["examCounts"] == {"R07_春期": 1, "R07_秋期": 1}
+
+def test_version_follows_content():
+    questions = [make_question("R07", "秋期", number) for number in (1, 2)]
+    version = build(questions).exams()["R07_秋期"]["version"]
+    assert build(reversed(questions)).exams()["R07_秋期"]["version"] == version
+
+    questions[1]["correctAnswer"] = "d"
+    assert build(questions).exams()["R07_秋期"]["version"] != version
+
+def test_pack_groups_keeps_groups_together():
+    groups = [list("abc"), list("de"), list("fghi"), list("j")]
+    assert list(pack_groups(groups, 5)) == [list("abcde"), list("fghij")]
+    assert list(pack_groups(groups, 4)) == [list("abc"), list("de"), list("fghi"), list("j")]
+
+def test_pack_groups_splits_oversized_group():
+    assert list(pack_groups([list("ab"), list("cdefg"), list("h")], 3)) == [
+        list("ab"), list("cde"), list("fg"), list("h")]
+
+def test_exam_aggregate_in_same_batch_as_questions():
+    questions = [make_question("R07", season, number) for season in ("秋期", "春期") for number in (1, 2, 3)]
+    local, aggregates, builder = scan_questions(questions)
+    db = FakeFirestore()
+    upload_questions(db, write_groups(questions, local, list(local), aggregates, builder), batch_size=4,
+                     workers=1, grouped=True)
+
+    batches = sorted(sorted(key for _, key in commit) for commit in db.commits)
+    assert batches == [
+        ["categories/technology"],
+        ["exams/R07_春期", "questions/R07_春期_001", "questions/R07_春期_002", "questions/R07_春期_003"],
+        ["exams/R07_秋期", "questions/R07_秋期_001", "questions/R07_秋期_002", "questions/R07_秋期_003"],
+    ]
+
+def test_other_collection_keeps_app_aggregates():
+    assert aggregate_collections("questions") == ("exams", "categories")
+    assert aggregate_collections("staging") == ("staging_exams", "staging_categories")
+    _, aggregates, _ = scan_questions([make_question("R07", "秋期", 1)], "staging")
+    assert sorted(aggregates) == ["staging_categories/technology", "staging_exams/R07_秋期"]
+    assert all(isinstance(write, Write) for write in aggregates.values())
@@ -0,0 +1,101 @@
+"""
+upload_to_firebase の差分アップロードのテスト（メモリ上のFirestoreに対して main() を実行する）
+"""
+
+import importlib.machinery
+import json
+import sys
+import types
+
+import pytest
+
+import upload_to_firebase
+from fake_firestore import FakeFirestore, make_question
+from firestore_upload import MANIFEST_PATH, plan_upload
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """作業フォルダを tmp_path にし、main() が FakeFirestore に接続するようにする"""
+    db = FakeFirestore()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FIRESTORE_EMULATOR_HOST", "localhost:8080")
+    firebase_admin = types.ModuleType("firebase_admin")
+    firebase_admin.__spec__ = importlib.machinery.ModuleSpec("firebase_admin", None)
+    monkeypatch.setitem(sys.modules, "firebase_admin", firebase_admin)
+    monkeypatch.setattr(upload_to_firebase, "init_firestore", lambda cred_path: db)
+    return db
+
+def write_questions(path, questions):
+    with open(path, 'w', encoding='utf-8') as f:
+        for question in questions:
+            f.write(json.dumps(question, ensure_ascii=False) + "\n")
+    return path
+
+def exam_questions(year="R07", season="秋期", count=3):
+    return [make_question(year, season, number) for number in range(1, count + 1)]
+
+def upload(path, *options):
+    upload_to_firebase.main([str(path), "--workers", "2", *options])
+
+def test_plan_upload():
+    local = {"a": "1", "b": "2", "c": "3"}
+    remote = {"b": "2", "c": "x", "d": "4"}
+    assert plan_upload(local, remote) == {"create": ["a"], "update": ["c"], "delete": [], "unchanged": ["b"]}
+    assert plan_upload(local, remote, delete_orphans=True)["delete"] == ["d"]
+
+def test_upload_only_changes(db, tmp_path):
+    questions = exam_questions() + exam_questions(season="春期")
+    data_file = write_questions(tmp_path / "all_questions.jsonl", questions)
+
+    upload(data_file)
+    assert sorted(db.data["questions"]) == sorted(question["questionId"] for question in questions)
+    assert sorted(db.data["exams"]) == ["R07_春期", "R07_秋期"]
+    assert MANIFEST_PATH.exists()
+
+    # 変わっていなければ何も書き込まない
+    commits = len(db.commits)
+    upload(data_file)
+    assert len(db.commits) == commits
+
+    # 1問の正解を直すと、その問題と集計ドキュメントだけを書き込む
+    questions[0]["correctAnswer"] = "d"
+    write_questions(data_file, questions)
+    upload(data_file)
+    assert sorted(db.written()[-3:]) == ["categories/technology", "exams/R07_秋期", "questions/R07_秋期_001"]
+    assert len(db.written()) == len(questions) + 3 + 3
+    assert db.data["questions"]["R07_秋期_001"]["correctAnswer"] == "d"
+    assert db.data["exams"]["R07_秋期"]["answerKey"]["R07_秋期_001"] == "d"
+
+def test_dry_run_writes_nothing(db, tmp_path, capsys):
+    data_file = write_questions(tmp_path / "all_questions.jsonl", exam_questions())
+    upload(data_file, "--dry-run")
+
+    assert db.commits == []
+    assert not MANIFEST_PATH.exists()
+    output = capsys.readouterr().out
+    assert "新規 5件" in output  # 3問 + 試験の集計 + 分野の集計
+    assert "R07_秋期_001" in output
+
+def test_remote_delete_orphans(db, tmp_path):
+    data_file = write_questions(tmp_path / "all_questions.jsonl", exam_questions() + exam_questions(season="春期"))
+    upload(data_file)
+
+    # 春期を手元から消し、Firestoreの内容と比べて削除する（マニフェストは使わない）
+    MANIFEST_PATH.unlink()
+    commits = len(db.commits)
+    write_questions(data_file, exam_questions())
+    upload(data_file, "--remote", "--delete-orphans")
+
+    assert sorted(db.data["questions"]) == ["R07_秋期_001", "R07_秋期_002", "R07_秋期_003"]
+    assert sorted(db.data["exams"]) == ["R07_秋期"]
+    # 秋期の問題は同じ内容なので書き直さない
+    assert not any(op == "set" and key.startswith("questions/")
+                   for commit in db.commits[commits:] for op, key in commit)
+
+def test_remote_without_delete_orphans_keeps_remote(db, tmp_path):
+    data_file = write_questions(tmp_path / "all_questions.jsonl", exam_questions() + exam_questions(season="春期"))
+    upload(data_file)
+
+    write_questions(data_file, exam_questions())
+    upload(data_file, "--remote")
+    assert len(db.data["questions"]) == 6
@@ -1,100 +1,260 @@
 """
-Firestoreにサンプルデータをアップロードするスクリプト（デバッグ版）
+Firestoreに問題データをアップロードするスクリプト
+
+問題をバッチ書き込み（最大500件）にまとめ、複数のバッチを並列に送る（firestore_upload.py）。
+混雑などの一時的なエラーはバックオフして送り直し、それでも失敗したバッチは最後に一覧で表示する。
+
+前回アップロードした内容のハッシュ（.upload_manifest.json）と比べて、
+新しい問題・変わった問題だけを書き込む（正解を1問直しただけなら1件だけ書き込む）。
+試験ごと・分野ごとの集計ドキュメント（exams / categories）も、問題と同じバッチで更新する。
+--collection で別のコレクションに書くときは、集計も <コレクション>_exams / <コレクション>_categories に書く。
+各問題には検索用の項目（sortKey・randomKey・categoryId・subcategoryId、question_fields.py）を加える。
+
+使い方:
+  python upload_to_firebase.py                                    # sample_questions.json
+  python upload_to_firebase.py parsed_questions/all_questions.jsonl
+  python upload_to_firebase.py parsed_questions/all_questions.jsonl --batch-size 500 --workers 16
+  python upload_to_firebase.py ... --report upload_report.json    # バッチごとの結果をJSONに保存
+  python upload_to_firebase.py ... --dry-run                      # 書き込みの計画だけを表示
+  python upload_to_firebase.py ... --remote --delete-orphans      # Firestoreの内容と比べ、手元にない問題は削除
+  python upload_to_firebase.py ... --force                        # 変わっていない問題も書き込む
+
+エミュレータで試すとき:
+  FIRESTORE_EMULATOR_HOST=localhost:8080 python upload_to_firebase.py parsed_questions/all_questions.jsonl
+
+.jsonl（1行に1問）は1行ずつ読みながらアップロードするので、全問をメモリに載せない。
 """
 
+import argparse
+import importlib.util
 import json
+import os
 from pathlib import Path
 import sys
 
-print("=" * 80)
-print("Firestore データアップロード（デバッグ版）")
-print("=" * 80)
-
-# Step 1: Firebase Admin SDKのインポート
-print("\n[1] Firebase Admin SDKをインポート中...")
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-    print("  ✓ インポート成功")
-except ImportError as e:
-    print(f"  ✗ インポートエラー: {e}")
-    print("  pip install firebase-admin を実行してください")
-    sys.exit(1)
-
-# Step 2: serviceAccountKey.jsonの確認
-print("\n[2] serviceAccountKey.jsonを確認中...")
-cred_path = Path("serviceAccountKey.json")
-
-if not cred_path.exists():
-    print(f"  ✗ serviceAccountKey.jsonが見つかりません")
-    print(f"  場所: {cred_path.absolute()}")
-    sys.exit(1)
-else:
-    print(f"  ✓ ファイルが存在します: {cred_path.absolute()}")
-
-# Step 3: Firebaseの初期化
-print("\n[3] Firebaseを初期化中...")
-try:
-    # 既に初期化されている場合はスキップ
-    if firebase_admin._apps:
-        print("  ⚠ 既に初期化されています。既存の接続を使用します")
-        app = firebase_admin.get_app()
-    else:
-        cred = credentials.Certificate(str(cred_path))
-        app = firebase_admin.initialize_app(cred)
-        print("  ✓ 初期化成功")
-    
-    db = firestore.client()
-    print("  ✓ Firestoreに接続しました")
-except Exception as e:
-    print(f"  ✗ 初期化エラー: {e}")
-    sys.exit(1)
-
-# Step 4: データファイルの確認
-print("\n[4] データファイルを確認中...")
-data_file = Path("sample_questions.json")
-
-if not data_file.exists():
-    print(f"  ✗ sample_questions.jsonが見つかりません")
+from firestore_upload import (COLLECTION, DEFAULT_BATCH_SIZE, DEFAULT_MAX_RETRIES, DEFAULT_WORKERS,
+                              MAX_BATCH_SIZE, MANIFEST_PATH, aggregate_collections, delete_documents, fetch_remote_hashes,
+                              init_firestore, list_remote_keys, load_manifest, manifest_target, plan_upload,
+                              save_manifest, scan_questions, upload_questions, write_groups)
+from question_fields import add_query_fields
+from questions_jsonl import iter_questions
+
+CRED_PATH = Path("serviceAccountKey.json")
+
+# --dry-run で表示するIDの数（操作ごと）
+PLAN_PREVIEW = 30
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Firestoreに問題データをアップロード")
+    parser.add_argument("data_file", nargs="?", type=Path,
+                        help="アップロードするファイル（.jsonl / .json、既定はsample_questions.json）")
+    parser.add_argument("--collection", default=COLLECTION,
+                        help=f"書き込むコレクション（既定: {COLLECTION}。ほかを指定すると集計は <コレクション>_exams などに書く）")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"1回のバッチ書き込みの件数（最大{MAX_BATCH_SIZE}）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="同時に送るバッチ数")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="一時的なエラーのときにバッチを送り直す回数")
+    parser.add_argument("--report", type=Path, help="バッチごとの結果（失敗したバッチ）を保存するJSON")
+    parser.add_argument("--dry-run", action="store_true", help="書き込みの計画だけを表示して終わる")
+    parser.add_argument("--remote", action="store_true",
+                        help=f"{MANIFEST_PATH} の代わりにFirestoreの今の内容と比べる（get_allで読み込む）")
+    parser.add_argument("--delete-orphans", action="store_true",
+                        help="手元のファイルにない問題をFirestoreから削除する")
+    parser.add_argument("--force", action="store_true", help="変わっていない問題も書き込む")
+    args = parser.parse_args(argv)
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size は1〜{MAX_BATCH_SIZE}で指定してください")
+    return args
+
+def find_data_file(data_file):
+    """アップロードするファイルを決める（見つからなければNone）"""
+    if data_file is not None:
+        if not data_file.exists():
+            print(f"  ✗ {data_file}が見つかりません")
+            return None
+        print(f"  ✓ ファイルが存在します: {data_file.absolute()}")
+        return data_file
+
+    data_file = Path("sample_questions.json")
+    if data_file.exists():
+        print(f"  ✓ ファイルが存在します: {data_file.absolute()}")
+        return data_file
+
+    print("  ✗ sample_questions.jsonが見つかりません")
     print(f"  場所: {data_file.absolute()}")
-    
+
     # 代替ファイルを探す
-    alt_file = Path("parsed_questions/all_questions.json")
-    if alt_file.exists():
+    alt_files = [Path("parsed_questions/all_questions.jsonl"), Path("parsed_questions/all_questions.json")]
+    alt_file = next((path for path in alt_files if path.exists()), None)
+    if alt_file is not None:
         print(f"  ⚠ 代わりに {alt_file} を使用します")
-        data_file = alt_file
+        return alt_file
+    print("  ✗ 代替ファイルも見つかりません")
+    return None
+
+def print_plan(plan, dry_run):
+    """書き込みの計画を表示（--dry-run ならIDも表示）"""
+    labels = [("create", "新規"), ("update", "変更"), ("delete", "削除"), ("unchanged", "変更なし")]
+    print("  " + " / ".join(f"{label} {len(plan[key])}件" for key, label in labels))
+    aggregate_writes = sum(1 for key in plan["create"] + plan["update"] if "/" in key)
+    aggregate_deletes = sum(1 for key in plan["delete"] if "/" in key)
+    if aggregate_writes or aggregate_deletes:
+        print(f"  （うち集計ドキュメント: 書き込み {aggregate_writes}件 / 削除 {aggregate_deletes}件）")
+    if not dry_run:
+        return
+    for key, label in labels[:3]:
+        ids = plan[key]
+        if not ids:
+            continue
+        print(f"\n  【{label}】")
+        for question_id in ids[:PLAN_PREVIEW]:
+            print(f"    {question_id}")
+        if len(ids) > PLAN_PREVIEW:
+            print(f"    ...ほか{len(ids) - PLAN_PREVIEW}件")
+
+def show_progress(report):
+    label = "削除" if report["operation"] == "delete" else "書き込み"
+    if report["error"]:
+        print(f"  ✗ {label}バッチ{report['batch']}（{report['firstId']}〜{report['lastId']}）失敗: {report['error']}")
+    elif report["attempts"] > 1:
+        print(f"  ⚠ {label}バッチ{report['batch']}: {report['count']}件（{report['attempts']}回目で成功）")
+    else:
+        print(f"  {label}バッチ{report['batch']}: {report['count']}件完了")
+
+def print_summary(title, summary):
+    rate = summary["written"] / summary["elapsed"] if summary["elapsed"] > 0 else 0
+    print(f"\n✓ {title}: {summary['written']}成功 / {summary['failed']}失敗"
+          f"（{summary['batches']}バッチ、{summary['elapsed']:.1f}秒、{rate:.0f}件/秒）")
+    if summary["retries"]:
+        print(f"  ⚠ 送り直し: {summary['retries']}回（混雑・一時的なエラー {summary['throttled']}回）")
+    for report in summary["errors"]:
+        print(f"  ✗ バッチ{report['batch']}: {report['firstId']}〜{report['lastId']}"
+              f"（{report['count']}件）{report['error']}")
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 80)
+    print("Firestore データアップロード")
+    print("=" * 80)
+
+    # Step 1: Firebase Admin SDKの確認
+    print("\n[1] Firebase Admin SDKを確認中...")
+    if importlib.util.find_spec("firebase_admin") is None:
+        print("  ✗ firebase_admin が見つかりません")
+        print("  pip install firebase-admin を実行してください")
+        sys.exit(1)
+    print("  ✓ インストールされています")
+
+    # Step 2: serviceAccountKey.jsonの確認（エミュレータなら不要）
+    emulator = os.environ.get("FIRESTORE_EMULATOR_HOST")
+    print("\n[2] serviceAccountKey.jsonを確認中...")
+    if emulator:
+        print(f"  ⚠ エミュレータ（{emulator}）に接続するので使いません")
+    elif not CRED_PATH.exists():
+        print("  ✗ serviceAccountKey.jsonが見つかりません")
+        print(f"  場所: {CRED_PATH.absolute()}")
+        sys.exit(1)
     else:
-        print("  ✗ 代替ファイルも見つかりません")
+        print(f"  ✓ ファイルが存在します: {CRED_PATH.absolute()}")
+
+    # Step 3: Firebaseの初期化
+    print("\n[3] Firebaseを初期化中...")
+    try:
+        db = init_firestore(CRED_PATH)
+        print("  ✓ Firestoreに接続しました")
+    except Exception as e:
+        print(f"  ✗ 初期化エラー: {e}")
         sys.exit(1)
-else:
-    print(f"  ✓ ファイルが存在します: {data_file.absolute()}")
-
-# Step 5: JSONファイルの読み込み
-print("\n[5] JSONファイルを読み込み中...")
-try:
-    with open(data_file, 'r', encoding='utf-8') as f:
-        questions = json.load(f)
-    print(f"  ✓ {len(questions)}問を読み込みました")
-except Exception as e:
-    print(f"  ✗ 読み込みエラー: {e}")
-    sys.exit(1)
-
-# Step 6: Firestoreにアップロード
-print(f"\n[6] {len(questions)}問をアップロード中...")
-success_count = 0
-error_count = 0
-
-for i, question in enumerate(questions, 1):
+
+    # Step 4: データファイルの確認
+    print("\n[4] データファイルを確認中...")
+    data_file = find_data_file(args.data_file)
+    if data_file is None:
+        sys.exit(1)
+
+    # Step 5: 前回の内容と比べて書き込みの計画を作る
+    target = manifest_target(db, args.collection)
+    print(f"\n[5] 書き込みの計画を作成中（比較先: {'Firestore' if args.remote else MANIFEST_PATH}）...")
+    print(f"  書き込み先: {args.collection} / 集計: {' / '.join(aggregate_collections(args.collection))}")
     try:
-        doc_ref = db.collection('questions').document(question['questionId'])
-        doc_ref.set(question)
-        success_count += 1
-        
-        if i % 10 == 0:
-            print(f"  {i}/{len(questions)}問完了...")
+        local, aggregates, builder = scan_questions(map(add_query_fields, iter_questions(data_file)), args.collection)
+        if args.remote:
+            baseline = fetch_remote_hashes(db, local, args.collection)
+            if args.delete_orphans:
+                # 手元にないドキュメントは中身を読まずにIDだけ比べる
+                baseline.update({key: None for key in list_remote_keys(db, args.collection)
+                                 if key not in baseline})
+        else:
+            baseline = load_manifest(target)
     except Exception as e:
-        error_count += 1
-        print(f"  ✗ {question['questionId']}のアップロード失敗: {e}")
+        print(f"  ✗ 読み込みエラー: {e}")
+        sys.exit(1)
+
+    plan = plan_upload(local, baseline, delete_orphans=args.delete_orphans)
+    if args.force:
+        plan["update"] += plan["unchanged"]
+        plan["unchanged"] = []
+    print_plan(plan, args.dry_run)
+    if args.dry_run:
+        print("\n⚠ --dry-run のため書き込みません")
+        print("=" * 80)
+        return
+
+    # Step 6: 新しい問題・変わった問題だけを1バッチ分ずつ読みながらアップロードし、不要な問題を削除
+    writes = plan["create"] + plan["update"]
+    print(f"\n[6] {len(writes)}件を書き込み、{len(plan['delete'])}件を削除中"
+          f"（{args.batch_size}件/バッチ、{args.workers}並列）...")
+
+    # 成功したバッチの分だけマニフェストに反映する
+    manifest = {question_id: digest for question_id, digest in baseline.items() if digest is not None}
+
+    def on_batch(report):
+        show_progress(report)
+        if report["error"]:
+            return
+        for key in report["ids"]:
+            if report["operation"] == "delete":
+                manifest.pop(key, None)
+            else:
+                manifest[key] = local[key]
+
+    options = dict(collection=args.collection, batch_size=args.batch_size, workers=args.workers,
+                   max_retries=args.max_retries, on_batch=on_batch)
+    summaries = {}
+    try:
+        if writes:
+            # 1回分の試験の問題とその試験の集計ドキュメントは同じバッチに入れる
+            groups = write_groups(map(add_query_fields, iter_questions(data_file)), local, writes, aggregates, builder,
+                                  args.collection)
+            summaries["upload"] = upload_questions(db, groups, grouped=True, **options)
+        if plan["delete"]:
+            summaries["delete"] = delete_documents(db, plan["delete"], **options)
+    except Exception as e:
+        print(f"  ✗ 読み込みエラー: {e}")
+        sys.exit(1)
+    finally:
+        save_manifest(target, manifest)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({"plan": {key: len(ids) for key, ids in plan.items()}, **summaries},
+                      f, ensure_ascii=False, indent=2)
+
+    if "upload" in summaries:
+        print_summary("アップロード完了", summaries["upload"])
+    if "delete" in summaries:
+        print_summary("削除完了", summaries["delete"])
+    if not summaries:
+        print(f"\n✓ 変更はありません（{len(plan['unchanged'])}問）")
+    if args.report:
+        print(f"  結果: {args.report}")
+    print(f"  マニフェスト: {MANIFEST_PATH}")
+    print("=" * 80)
+
+    if any(summary["failed"] for summary in summaries.values()):
+        sys.exit(1)
 
-print(f"\n✓ アップロード完了: {success_count}成功 / {error_count}失敗")
-print("=" * 80)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
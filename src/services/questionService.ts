@@ -1,4 +1,13 @@
-import { collection, getDocs, query, limit } from 'firebase/firestore';
+import {
+  collection,
+  getDocs,
+  query,
+  limit,
+  orderBy,
+  startAfter,
+  where,
+  QueryConstraint,
+} from 'firebase/firestore';
 import { db } from '../config/firebase';
 import { Question } from '../types/Question';
 
@@ -41,4 +50,65 @@ export const getQuestionsLimit = async (limitCount: number): Promise<Question[]>
     console.error('問題の取得に失敗しました:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+
+/**
+ * 試験の実施順・問番号の順に1ページ分の問題を取得
+ * afterSortKey に前のページの最後の問題の sortKey を渡すと続きを取得する
+ */
+export const getQuestionsPage = async (
+  pageSize: number,
+  afterSortKey?: number,
+  categoryId?: string
+): Promise<Question[]> => {
+  try {
+    const constraints: QueryConstraint[] = [];
+    if (categoryId) {
+      constraints.push(where('categoryId', '==', categoryId));
+    }
+    constraints.push(orderBy('sortKey'));
+    if (afterSortKey !== undefined) {
+      constraints.push(startAfter(afterSortKey));
+    }
+    constraints.push(limit(pageSize));
+
+    const snapshot = await getDocs(query(collection(db, 'questions'), ...constraints));
+    return snapshot.docs.map((doc) => doc.data() as Question);
+  } catch (error) {
+    console.error('問題の取得に失敗しました:', error);
+    throw error;
+  }
+};
+
+/**
+ * ランダムに count 問を取得（randomKey で検索するので全件は読まない）
+ */
+export const getRandomQuestions = async (count: number, categoryId?: string): Promise<Question[]> => {
+  try {
+    const questionsRef = collection(db, 'questions');
+    const filters: QueryConstraint[] = categoryId ? [where('categoryId', '==', categoryId)] : [];
+    const start = Math.random();
+
+    // start 以上から取得し、足りなければ先頭（0以上）から補う
+    const first = await getDocs(
+      query(questionsRef, ...filters, where('randomKey', '>=', start), orderBy('randomKey'), limit(count))
+    );
+    const questions = first.docs.map((doc) => doc.data() as Question);
+    if (questions.length < count) {
+      const rest = await getDocs(
+        query(
+          questionsRef,
+          ...filters,
+          where('randomKey', '<', start),
+          orderBy('randomKey'),
+          limit(count - questions.length)
+        )
+      );
+      rest.forEach((doc) => questions.push(doc.data() as Question));
+    }
+    return questions;
+  } catch (error) {
+    console.error('問題の取得に失敗しました:', error);
+    throw error;
+  }
+};
@@ -15,6 +15,11 @@ export interface Question {
   subcategory: string;
   difficulty: number;
   explanation: string;
+  // アップロード時に追加される検索用の項目（data-processing/question_fields.py）
+  sortKey?: number;
+  randomKey?: number;
+  categoryId?: string;
+  subcategoryId?: string;
 }
 
 export type ChoiceKey = 'a' | 'b' | 'c' | 'd';
\ No newline at end of file